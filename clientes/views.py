@@ -46,9 +46,7 @@ class ClienteViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request):
-        ids = request.data.get('ids', [])
-        qs = super().get_queryset().filter(id__in=ids)
-        qs.update(is_active=False)
+        self.desativar(request.data.get('ids', []))
         return Response({"message": "Clientes excluídos com sucesso."}, status=status.HTTP_200_OK)
 
 class ClienteSelectViewSet(CompanyScopedMixin, viewsets.ReadOnlyModelViewSet):
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContasPagarConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contas_pagar'
+
+    def ready(self):
+        # Registra o post_delete que mantém o livro de lançamentos
+        from . import ledger  # noqa: F401
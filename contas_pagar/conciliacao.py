@@ -0,0 +1,228 @@
+# contas_pagar/conciliacao.py
+"""
+Conciliação conta ↔ ProjecaoFaturamento.
+
+Regra única: dentro de cada (contrato, mês), as contas ativas e não
+estornadas pagam as projeções do mês em ordem de data (a 1ª conta paga a
+1ª projeção, e assim por diante). Sobra de conta vira "conta sem projeção";
+projeção marcada como paga sem conta correspondente é "paga sem conta".
+
+A varredura é um sort/merge: projeções e contas são lidas já ordenadas por
+(contrato, data, id) em streaming e casadas mês a mês, então a memória fica
+no tamanho de um mês de um contrato e cada tabela é lida uma vez. As
+alterações de `pago` são gravadas em lotes.
+
+Usada pelo save das contas (um contrato), pelos endpoints em lote e pelo
+comando conciliar_projecoes (empresa inteira ou incremental desde a marca).
+"""
+import heapq
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from contratos.models import ProjecaoFaturamento
+
+from .models import ContaAPagar, ContaAReceber, ExclusaoLancamento, Lancamento, MarcaConciliacao
+from .resumo import Deltas
+from multipla_teste.core.versoes import incrementar
+
+# Releitura na marca incremental, para transações que commitaram fora de ordem
+MARGEM_INCREMENTAL = timedelta(minutes=5)
+
+FONTES = ((ContaAPagar, 'data_pagamento'), (ContaAReceber, 'data_recebimento'))
+
+
+class ResultadoConciliacao:
+    def __init__(self):
+        self.contratos = 0
+        self.projecoes = 0
+        self.contas = 0
+        # Listas de (contrato_id, 'AAAA-MM', id)
+        self.marcar = []               # projeções a marcar como pagas
+        self.desmarcar = []            # projeções pagas sem conta no mês
+        self.contas_sem_projecao = []  # contas além das projeções do mês
+
+    @property
+    def divergencias(self):
+        return len(self.marcar) + len(self.desmarcar) + len(self.contas_sem_projecao)
+
+    def as_dict(self):
+        return {
+            'contratos': self.contratos,
+            'projecoes': self.projecoes,
+            'contas': self.contas,
+            'marcar': len(self.marcar),
+            'desmarcar': len(self.desmarcar),
+            'contas_sem_projecao': len(self.contas_sem_projecao),
+        }
+
+
+def _chave(linha):
+    contrato_id, data = linha[0], linha[1]
+    return contrato_id, data.year, data.month
+
+
+def _fluxo_projecoes(empresa_id, contrato_ids):
+    qs = ProjecaoFaturamento.objects.all()
+    if empresa_id is not None:
+        qs = qs.filter(contrato__empresa_id=empresa_id)
+    if contrato_ids is not None:
+        qs = qs.filter(contrato_id__in=contrato_ids)
+    return (
+        qs.order_by('contrato_id', 'data_vencimento', 'pk')
+        .values_list('contrato_id', 'data_vencimento', 'pk', 'pago')
+        .iterator(chunk_size=5000)
+    )
+
+
+def _fluxo_contas(empresa_id, contrato_ids):
+    fluxos = []
+    for modelo, campo_data in FONTES:
+        qs = modelo.objects.filter(is_active=True).exclude(status='estornado')
+        if empresa_id is not None:
+            qs = qs.filter(empresa_id=empresa_id)
+        if contrato_ids is not None:
+            qs = qs.filter(contrato_id__in=contrato_ids)
+        fluxos.append(
+            qs.order_by('contrato_id', campo_data, 'pk')
+            .values_list('contrato_id', campo_data, 'pk')
+            .iterator(chunk_size=5000)
+        )
+    # Cada contrato é de fornecedor ou de cliente: a intercalação mantém a ordem (contrato, data, id)
+    return heapq.merge(*fluxos)
+
+
+def varrer(projecoes, contas):
+    """
+    Casa dois fluxos ordenados por (contrato, data, id) e gera, por
+    (contrato, ano, mes), (chave, projeções do mês, contas do mês).
+    """
+    grupos_p = groupby(projecoes, key=_chave)
+    grupos_c = groupby(contas, key=_chave)
+    p = next(grupos_p, None)
+    c = next(grupos_c, None)
+    while p is not None or c is not None:
+        if c is None or (p is not None and p[0] < c[0]):
+            yield p[0], list(p[1]), []
+            p = next(grupos_p, None)
+        elif p is None or c[0] < p[0]:
+            yield c[0], [], list(c[1])
+            c = next(grupos_c, None)
+        else:
+            yield p[0], list(p[1]), list(c[1])
+            p = next(grupos_p, None)
+            c = next(grupos_c, None)
+
+
+def comparar(projecoes, contas):
+    """Iterável de (chave, projeções, contas) -> ResultadoConciliacao (nada é gravado)."""
+    resultado = ResultadoConciliacao()
+    contrato_atual = None
+    for (contrato_id, ano, mes), projecoes_mes, contas_mes in varrer(projecoes, contas):
+        if contrato_id != contrato_atual:
+            contrato_atual = contrato_id
+            resultado.contratos += 1
+        resultado.projecoes += len(projecoes_mes)
+        resultado.contas += len(contas_mes)
+
+        competencia = f"{ano:04d}-{mes:02d}"
+        pagas = len(contas_mes)
+        for posicao, (_, _, projecao_id, pago) in enumerate(projecoes_mes):
+            if posicao < pagas and not pago:
+                resultado.marcar.append((contrato_id, competencia, projecao_id))
+            elif posicao >= pagas and pago:
+                resultado.desmarcar.append((contrato_id, competencia, projecao_id))
+        for _, _, conta_id in contas_mes[len(projecoes_mes):]:
+            resultado.contas_sem_projecao.append((contrato_id, competencia, conta_id))
+    return resultado
+
+
+def aplicar(resultado, desmarcar=False, lote=1000):
+    """Grava os flags `pago`, um lote por transação. Retorna quantas projeções mudaram."""
+    # Transação no banco do tenant: é nele que o select_for_update trava as projeções
+    using = router.db_for_write(ProjecaoFaturamento)
+    projecoes = ProjecaoFaturamento.objects.using(using)
+    alteradas = 0
+    mudancas = [(True, resultado.marcar)] + ([(False, resultado.desmarcar)] if desmarcar else [])
+    for pago, itens in mudancas:
+        ids = [projecao_id for _, _, projecao_id in itens]
+        for i in range(0, len(ids), lote):
+            with transaction.atomic(using=using):
+                # Só as que mudam de fato, com lock: o resumo mensal recebe o delta de pendente_*
+                mudam = list(
+                    projecoes.filter(pk__in=ids[i:i + lote])
+                    .exclude(pago=pago).select_for_update()
+                    .values('pk', 'contrato__empresa_id', 'contrato__tipo', 'data_vencimento', 'valor_parcela', 'pago')
+                )
+                if not mudam:
+                    continue
+                deltas = Deltas()
+                for projecao in mudam:
+                    argumentos = (projecao['contrato__empresa_id'], projecao['contrato__tipo'],
+                                  projecao['data_vencimento'], projecao['valor_parcela'])
+                    deltas.projecao(*argumentos, projecao['pago'], sinal=-1)
+                    deltas.projecao(*argumentos, pago)
+                alteradas += projecoes.filter(pk__in=[p['pk'] for p in mudam]).update(pago=pago)
+                deltas.aplicar(using)
+                incrementar(ProjecaoFaturamento, {p['contrato__empresa_id'] for p in mudam}, using)
+    return alteradas
+
+
+def conciliar(empresa_id=None, contrato_ids=None, gravar=True, desmarcar=False, lote=1000):
+    """Concilia a empresa (ou só `contrato_ids`) e, com gravar=True, aplica o resultado."""
+    if contrato_ids is not None:
+        contrato_ids = {contrato_id for contrato_id in contrato_ids if contrato_id}
+        if not contrato_ids:
+            return ResultadoConciliacao()
+    resultado = comparar(
+        _fluxo_projecoes(empresa_id, contrato_ids),
+        _fluxo_contas(empresa_id, contrato_ids),
+    )
+    if gravar:
+        aplicar(resultado, desmarcar=desmarcar, lote=lote)
+    return resultado
+
+
+def contratos_alterados_desde(empresa_id, marca):
+    """Contratos com lançamentos (contas de contrato) alterados ou excluídos a partir de `marca`."""
+    desde = marca - MARGEM_INCREMENTAL
+    alterados = set(
+        Lancamento.objects.filter(empresa_id=empresa_id, origem='normal', atualizado_em__gte=desde)
+        .exclude(contrato_id=None)
+        .values_list('contrato_id', flat=True)
+        .distinct()
+    )
+    excluidos = (
+        ExclusaoLancamento.objects.filter(empresa_id=empresa_id, excluido_em__gte=desde)
+        .values_list('contrato_id', flat=True)
+        .distinct()
+    )
+    return alterados.union(excluidos)
+
+
+def conciliar_empresa(empresa_id, incremental=False, gravar=True, desmarcar=False, lote=1000):
+    """
+    Conciliação completa ou incremental (desde a MarcaConciliacao) de uma empresa;
+    com gravar=True avança a marca para o início desta execução.
+    """
+    inicio = timezone.now()
+    contrato_ids = None
+    if incremental:
+        marca = MarcaConciliacao.objects.filter(empresa_id=empresa_id).values_list('marca', flat=True).first()
+        if marca is not None:
+            contrato_ids = contratos_alterados_desde(empresa_id, marca)
+
+    if contrato_ids is not None and not contrato_ids:
+        resultado = ResultadoConciliacao()
+    else:
+        resultado = conciliar(empresa_id, contrato_ids, gravar=gravar, desmarcar=desmarcar, lote=lote)
+
+    if gravar:
+        MarcaConciliacao.objects.update_or_create(empresa_id=empresa_id, defaults={'marca': inicio})
+        # A próxima execução relê a partir de inicio - margem; o que vem antes já foi visto
+        ExclusaoLancamento.objects.filter(
+            empresa_id=empresa_id, excluido_em__lt=inicio - MARGEM_INCREMENTAL,
+        ).delete()
+    return resultado
@@ -0,0 +1,200 @@
+# contas_pagar/consolidado.py
+"""
+Listagem consolidada (normais + avulsas) feita no banco com UNION ALL.
+
+Cada tabela é projetada para as mesmas colunas (CAMPOS), o filtro de cursor
+é aplicado em cada ramo e a ordenação/limite acontecem no SQL. Onde o banco
+permite (PostgreSQL), cada ramo também leva ORDER BY + LIMIT, então uma
+página lê no máximo page_size+1 linhas de cada tabela pelo índice
+(empresa, data, id).
+
+Como os ids das duas tabelas se repetem, a chave da listagem é
+(data_vencimento, origem, id).
+
+Com CONSOLIDATED_USE_LEDGER a listagem lê um único ramo, o livro de
+lançamentos (Lancamento, ver contas_pagar/ledger.py), sem UNION.
+
+Cada linha da API leva 'detalhes' (a conta no formato do serializer dela),
+montado por com_detalhes() para a página inteira de uma vez: uma query por
+origem mais a dos projetos, como na listagem rápida (contas_pagar/listagem.py).
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, CharField, F, IntegerField, Value, When
+from django.db.models.functions import Concat
+
+from multipla_teste.pagination import KeysetPagination, keyset_filter
+
+from .listagem import TIPOS, linhas_avulsas, montar_linhas, projetar
+from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, Lancamento
+
+# Ordem importa: o UNION casa as colunas por posição
+CAMPOS = ('id', 'origem', 'tipo', 'descricao', 'data_vencimento', 'valor_total', 'status', 'contrato')
+ORDENACAO = ('-data_vencimento', '-origem', '-id')
+# Linhas lidas do cursor por vez quando a listagem sai inteira (sem paginação ou NDJSON)
+CHUNK = 2000
+
+# tipo -> (modelo normal, modelo avulso, campo de data, relação da contraparte no contrato, na avulsa)
+FONTES = {
+    'pagar': (ContaAPagar, ContaPagarAvulso, 'data_pagamento', 'fornecedor', 'fornecedor'),
+    'receber': (ContaAReceber, ContaReceberAvulso, 'data_recebimento', 'cliente', 'cliente'),
+}
+
+
+def descricao_conta(rotulo, relacao):
+    """'<rótulo> - <nome da contraparte>', ou só o rótulo quando não há contraparte."""
+    return Case(
+        When(**{f"{relacao}__isnull": True}, then=Value(rotulo)),
+        default=Concat(Value(f"{rotulo} - "), F(f"{relacao}__nome")),
+        output_field=CharField(),
+    )
+
+
+def _projetar(qs, **colunas):
+    # Só anotações, na ordem de CAMPOS: a ordem das colunas no SELECT é a mesma nos dois ramos
+    return qs.annotate(**{f"_{nome}": colunas[nome] for nome in CAMPOS}).values(*(f"_{nome}" for nome in CAMPOS))
+
+
+def usa_ledger():
+    return getattr(settings, 'CONSOLIDATED_USE_LEDGER', False)
+
+
+def ramo_ledger(tipo, empresa_id, status=None, data_inicio=None, data_fim=None):
+    """Lançamentos do livro já filtrados e projetados em CAMPOS (um único ramo)."""
+    filtros = {'empresa_id': empresa_id, 'tipo': tipo, 'is_active': True}
+    if status:
+        filtros['status'] = status
+    if data_inicio:
+        filtros['data__gte'] = data_inicio
+    if data_fim:
+        filtros['data__lte'] = data_fim
+
+    return _projetar(
+        Lancamento.objects.filter(**filtros).order_by(),
+        id=F('origem_id'),
+        origem=F('origem'),
+        tipo=F('tipo'),
+        descricao=F('descricao'),
+        data_vencimento=F('data'),
+        valor_total=F('valor'),
+        status=F('status'),
+        contrato=F('contrato_id'),
+    )
+
+
+def origem_no_ledger(tipo, empresa_id, pk):
+    """'normal' ou 'avulso' para a conta `pk` segundo o livro (normal primeiro), ou None."""
+    origens = set(
+        Lancamento.objects.filter(empresa_id=empresa_id, tipo=tipo, origem_id=pk, is_active=True)
+        .values_list('origem', flat=True)
+    )
+    if 'normal' in origens:
+        return 'normal'
+    return 'avulso' if origens else None
+
+
+def ramos_consolidados(tipo, empresa_id, status=None, data_inicio=None, data_fim=None):
+    """Os querysets da listagem já filtrados e projetados em CAMPOS: normal e avulso, ou só o livro."""
+    if usa_ledger():
+        return [ramo_ledger(tipo, empresa_id, status, data_inicio, data_fim)]
+
+    modelo, modelo_avulso, campo_data, contraparte, contraparte_avulsa = FONTES[tipo]
+    rotulo = 'Conta a Pagar' if tipo == 'pagar' else 'Conta a Receber'
+
+    filtros = {'empresa_id': empresa_id, 'is_active': True}
+    if status:
+        filtros['status'] = status
+    if data_inicio:
+        filtros[f"{campo_data}__gte"] = data_inicio
+    if data_fim:
+        filtros[f"{campo_data}__lte"] = data_fim
+
+    normal = _projetar(
+        modelo.objects.filter(**filtros).order_by(),
+        id=F('id'),
+        origem=Value('normal', output_field=CharField()),
+        tipo=Value(tipo, output_field=CharField()),
+        descricao=descricao_conta(rotulo, f"contrato__{contraparte}"),
+        data_vencimento=F(campo_data),
+        valor_total=F('valor_total'),
+        status=F('status'),
+        contrato=F('contrato_id'),
+    )
+    avulso = _projetar(
+        modelo_avulso.objects.filter(**filtros).order_by(),
+        id=F('id'),
+        origem=Value('avulso', output_field=CharField()),
+        tipo=Value(tipo, output_field=CharField()),
+        descricao=descricao_conta(f"{rotulo} Avulso", contraparte_avulsa),
+        data_vencimento=F(campo_data),
+        valor_total=F('valor'),
+        status=F('status'),
+        contrato=Value(None, output_field=IntegerField()),
+    )
+    return [normal, avulso]
+
+
+def _interno(ordem):
+    return [f"-_{c[1:]}" if c.startswith('-') else f"_{c}" for c in ordem]
+
+
+def unir(ramos, ordem, limite=None):
+    """UNION ALL dos ramos ordenado por `ordem` (nomes de CAMPOS), com LIMIT opcional."""
+    ordem = _interno(ordem)
+    alias = router.db_for_read(ContaAPagar)
+    primeiro, *resto = ramos
+    if not resto:
+        unido = primeiro.order_by(*ordem).using(alias)
+        return unido[:limite] if limite is not None else unido
+    if limite is not None and connections[alias].features.supports_slicing_ordering_in_compound:
+        primeiro, *resto = [ramo.order_by(*ordem)[:limite] for ramo in ramos]
+    unido = primeiro.union(*resto, all=True).order_by(*ordem).using(alias)
+    return unido[:limite] if limite is not None else unido
+
+
+def linha_para_saida(linha):
+    """Linha do UNION (colunas _campo) no formato da API."""
+    saida = {nome: linha[f"_{nome}"] for nome in CAMPOS}
+    if saida['contrato'] is None:
+        saida['contrato'] = "Avulso"
+    return saida
+
+
+
+def com_detalhes(tipo, saidas):
+    """Acrescenta 'detalhes' às saídas de uma página: normais e avulsas buscadas em lote."""
+    normais = [saida['id'] for saida in saidas if saida['origem'] == 'normal']
+    avulsas = [saida['id'] for saida in saidas if saida['origem'] == 'avulso']
+    detalhes = {}
+    if normais:
+        modelo = TIPOS[tipo][0]
+        for linha in montar_linhas(tipo, list(projetar(tipo, modelo.objects.filter(id__in=normais)))):
+            detalhes[('normal', linha['id'])] = linha
+    if avulsas:
+        for conta_id, linha in linhas_avulsas(tipo, avulsas).items():
+            detalhes[('avulso', conta_id)] = linha
+    for saida in saidas:
+        saida['detalhes'] = detalhes.get((saida['origem'], saida['id']), {})
+    return saidas
+
+
+def saidas_em_blocos(tipo, linhas):
+    """Linhas do UNION (iterador) -> saídas com 'detalhes', montadas a cada CHUNK linhas."""
+    linhas = iter(linhas)
+    while bloco := list(islice(linhas, CHUNK)):
+        yield from com_detalhes(tipo, [linha_para_saida(linha) for linha in bloco])
+
+class ConsolidadoPagination(KeysetPagination):
+    """KeysetPagination sobre a lista de ramos: o cursor filtra cada ramo antes do UNION."""
+
+    def aplicar_cursor(self, ramos, valores, reverso):
+        filtro = keyset_filter(_interno(self.ordering), valores, reverso)
+        return [ramo.filter(filtro) for ramo in ramos]
+
+    def buscar_pagina(self, ramos, ordem, limite):
+        return unir(ramos, ordem, limite)
+
+    def valor_de(self, linha, campo):
+        return linha[f"_{campo}"]
@@ -0,0 +1,227 @@
+# contas_pagar/criacao_lote.py
+"""
+Criação em lote de ContaAPagar / ContaAReceber (POST .../lote/).
+
+As regras do create unitário (lançamento duplicado no mês do contrato e
+diferença contra o valor da projeção) são checadas para o lote inteiro com
+consultas agrupadas: uma por tabela relacionada, uma para os meses já
+lançados e uma para as projeções. As contas entram com bulk_create, o livro
+de lançamentos é sincronizado por lote e os contratos afetados são
+conciliados com as projeções de uma vez (contas_pagar/conciliacao.py).
+
+Modos:
+- tudo_ou_nada (padrão): qualquer item com erro cancela o lote inteiro;
+- melhor_esforco: grava os itens válidos e devolve os erros dos demais.
+"""
+from datetime import date
+
+from django.db import router, transaction
+from django.db.models.functions import ExtractMonth, ExtractYear
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from contratos.models import Contrato, ProjecaoFaturamento
+from financeiro.models import CentroCusto, ContaFinanceira
+from pagamentos.models import FormaPagamento
+
+from .conciliacao import conciliar
+from .ledger import sincronizar_lote
+from .models import ContaAPagar, ContaAReceber
+from .serializers import ContaLoteItemSerializer
+from multipla_teste.core.versoes import incrementar
+
+MAX_ITENS = 1000
+MODOS = ('tudo_ou_nada', 'melhor_esforco')
+
+# tipo -> (modelo, campo de data, tipo do contrato)
+MODELOS = {
+    'pagar': (ContaAPagar, 'data_pagamento', 'fornecedor'),
+    'receber': (ContaAReceber, 'data_recebimento', 'cliente'),
+}
+
+# campo do item -> modelo relacionado (todos com empresa)
+RELACIONADOS = {
+    'forma_pagamento': FormaPagamento,
+    'conta_financeira': ContaFinanceira,
+    'centro_custo': CentroCusto,
+}
+
+
+def _mes(data):
+    inicio = data.replace(day=1)
+    fim = date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio, fim
+
+
+def _ids(itens, campo):
+    return {dados[campo] for _, dados in itens if dados.get(campo) is not None}
+
+
+def validar_lote(tipo, itens, empresa_id):
+    """
+    `itens`: [(indice, dados validados pelo ContaLoteItemSerializer)].
+    Retorna {indice: erro} e completa `diferenca` nos dados dos itens válidos.
+    """
+    modelo, campo_data, tipo_contrato = MODELOS[tipo]
+    erros = {}
+
+    # Relacionados: uma query por tabela, sempre restrita à empresa
+    contratos = dict(
+        Contrato.objects.filter(pk__in=_ids(itens, 'contrato'), empresa_id=empresa_id)
+        .values_list('pk', 'tipo')
+    )
+    existentes = {
+        campo: set(
+            relacionado.objects.filter(pk__in=_ids(itens, campo), empresa_id=empresa_id)
+            .values_list('pk', flat=True)
+        )
+        for campo, relacionado in RELACIONADOS.items()
+        if _ids(itens, campo)
+    }
+    validos_status = [valor for valor, _ in modelo._meta.get_field('status').choices]
+
+    for indice, dados in itens:
+        if contratos.get(dados['contrato']) != tipo_contrato:
+            erros[indice] = {'contrato': 'Contrato não encontrado para esta empresa e tipo de conta.'}
+            continue
+        faltando = [
+            campo for campo in RELACIONADOS
+            if dados.get(campo) is not None and dados[campo] not in existentes.get(campo, ())
+        ]
+        if faltando:
+            erros[indice] = {campo: 'Registro não encontrado para esta empresa.' for campo in faltando}
+            continue
+        if dados.get('status') and dados['status'] not in validos_status:
+            erros[indice] = {'status': f'Status inválido. Opções válidas: {validos_status}'}
+
+    candidatos = [(indice, dados) for indice, dados in itens if indice not in erros]
+    if not candidatos:
+        return erros
+
+    # Regra 1: lançamento duplicado no mês (no banco e dentro do próprio lote) — uma query
+    datas = [dados[campo_data] for _, dados in candidatos]
+    ja_lancados = set(
+        modelo.objects.filter(
+            contrato_id__in=_ids(candidatos, 'contrato'),
+            is_active=True,
+            **{f"{campo_data}__gte": _mes(min(datas))[0], f"{campo_data}__lt": _mes(max(datas))[1]},
+        )
+        .annotate(ano=ExtractYear(campo_data), mes=ExtractMonth(campo_data))
+        .values_list('contrato_id', 'ano', 'mes')
+        .distinct()
+    )
+
+    # Regra 2: valor esperado na projeção do mesmo dia — uma query
+    projecoes = {}
+    for contrato_id, data_vencimento, valor_parcela in (
+        ProjecaoFaturamento.objects.filter(
+            contrato_id__in=_ids(candidatos, 'contrato'), data_vencimento__in=set(datas)
+        )
+        .order_by('pk')
+        .values_list('contrato_id', 'data_vencimento', 'valor_parcela')
+    ):
+        projecoes.setdefault((contrato_id, data_vencimento), valor_parcela)
+
+    for indice, dados in candidatos:
+        data = dados[campo_data]
+        chave_mes = (dados['contrato'], data.year, data.month)
+        if chave_mes in ja_lancados:
+            erros[indice] = {'non_field_errors': ['Já existe um lançamento para este contrato no mesmo mês.']}
+            continue
+
+        esperado = projecoes.get((dados['contrato'], data))
+        if esperado is not None and dados['valor_total'] != esperado:
+            if not dados.get('justificativa_diferenca'):
+                erros[indice] = {'non_field_errors': [
+                    'Justificativa da diferença é obrigatória quando o valor lançado difere do esperado.'
+                ]}
+                continue
+            dados['diferenca'] = dados['valor_total'] - esperado
+        ja_lancados.add(chave_mes)
+
+    return erros
+
+
+def criar_em_lote(tipo, itens, empresa_id, modo='tudo_ou_nada'):
+    """
+    `itens`: [(indice, dados validados)]. Retorna (criados, erros), com
+    criados = {indice: id} e erros = {indice: detalhe}.
+    """
+    modelo, campo_data, _ = MODELOS[tipo]
+    erros = validar_lote(tipo, itens, empresa_id)
+    if erros and modo == 'tudo_ou_nada':
+        return {}, erros
+
+    validos = [(indice, dados) for indice, dados in itens if indice not in erros]
+    contas = [
+        modelo(
+            empresa_id=empresa_id,
+            contrato_id=dados['contrato'],
+            forma_pagamento_id=dados['forma_pagamento'],
+            conta_financeira_id=dados.get('conta_financeira'),
+            centro_custo_id=dados.get('centro_custo'),
+            competencia=dados['competencia'],
+            valor_total=dados['valor_total'],
+            status=dados.get('status') or 'pendente',
+            justificativa_diferenca=dados.get('justificativa_diferenca'),
+            **({'diferenca': dados['diferenca']} if 'diferenca' in dados else {}),
+            **{campo_data: dados[campo_data]},
+        )
+        for _, dados in validos
+    ]
+    if not contas:
+        return {}, erros
+
+    with transaction.atomic(using=router.db_for_write(modelo)):
+        modelo.objects.bulk_create(contas, batch_size=500)
+        # bulk_create não passa pelo save(): o livro de lançamentos é sincronizado aqui
+        sincronizar_lote(modelo, [conta.pk for conta in contas])
+        incrementar(modelo, [empresa_id])
+        conciliar(empresa_id, {conta.contrato_id for conta in contas})
+
+    return {indice: conta.pk for (indice, _), conta in zip(validos, contas)}, erros
+
+
+class CriacaoEmLoteMixin:
+    """
+    POST .../lote/ nas viewsets de conta com contrato.
+    Corpo: {"modo": "tudo_ou_nada" | "melhor_esforco", "itens": [{...}, ...]}
+    """
+    lote_tipo = None  # 'pagar' ou 'receber'
+
+    @action(detail=False, methods=['post'], url_path='lote')
+    def criar_lote(self, request):
+        modo = request.data.get('modo', 'tudo_ou_nada')
+        itens = request.data.get('itens')
+        if modo not in MODOS:
+            return Response({'error': f'Modo inválido. Opções válidas: {list(MODOS)}'}, status=400)
+        if not isinstance(itens, list) or not itens:
+            return Response({'error': 'Envie "itens" com uma lista de contas'}, status=400)
+        if len(itens) > MAX_ITENS:
+            return Response({'error': f'No máximo {MAX_ITENS} itens por chamada'}, status=400)
+
+        _, campo_data, _ = MODELOS[self.lote_tipo]
+        validos, erros = [], {}
+        for indice, dados in enumerate(itens):
+            serializer = ContaLoteItemSerializer(data=dados, context={'campo_data': campo_data})
+            if serializer.is_valid():
+                validos.append((indice, dict(serializer.validated_data)))
+            else:
+                erros[indice] = serializer.errors
+
+        if erros and modo == 'tudo_ou_nada':
+            criados = {}
+        else:
+            criados, erros_lote = criar_em_lote(self.lote_tipo, validos, self.get_current_company_id(), modo)
+            erros.update(erros_lote)
+
+        resultados = [
+            {'indice': indice, 'id': criados[indice]} if indice in criados
+            else {'indice': indice, 'erro': erros.get(indice, 'Lote cancelado por erro em outro item')}
+            for indice in range(len(itens))
+        ]
+        return Response(
+            {'modo': modo, 'criados': len(criados), 'com_erro': len(erros), 'resultados': resultados},
+            status=status.HTTP_201_CREATED if criados else status.HTTP_400_BAD_REQUEST,
+        )
@@ -0,0 +1,144 @@
+# contas_pagar/dashboard.py
+"""
+Tela inicial numa chamada só (GET /api/dashboard/).
+
+Junta o que a home buscava em oito requisições — valor_total,
+total_pagas_mes_vencimento, total_faturamento_pagar, proximo_vencimento,
+proximo_vencimento_nao_pago, vencimentos_proximos e ProximosVencimentosViewSet —
+com número fixo de queries:
+
+- totais: um aggregate no resumo mensal (contas_pagar/resumo.py);
+- próxima conta a pagar: uma query, mais duas de prefetch dos projetos do contrato;
+- vencimentos: as projeções não pagas do mês corrente numa query; a próxima
+  projeção a pagar depois do mês só é buscada quando o mês não tem nenhuma.
+
+O resultado fica em cache por empresa e dia, sob a versão do resumo
+(resumo.versao_resumo), que muda em qualquer escrita de conta ou projeção.
+"""
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, Q, Sum
+from django.utils import timezone
+
+from contratos.models import ContratoProjeto, ProjecaoFaturamento
+from contratos.serializers import ProjecaoFaturamentoSerializer
+
+from .models import ContaAPagar, ResumoMensal
+from .resumo import ZERO, versao_resumo
+from .serializers import ContaAPagarSerializer
+
+# ProximosVencimentosViewSet: ?conta=pagar / ?conta=receber
+TIPOS_CONTRATO = {
+    'pagar': ('fornecedor', 'funcionario'),
+    'receber': ('cliente',),
+}
+
+
+def _chave_cache(empresa_id, hoje):
+    return f"dashboard:{empresa_id}:{versao_resumo(empresa_id)}:{hoje.isoformat()}"
+
+
+def _totais(empresa_id, ano, mes):
+    do_mes = Q(ano=ano, mes=mes)
+    somas = ResumoMensal.objects.filter(empresa_id=empresa_id).aggregate(
+        valor_total=Sum('pago'),
+        total_pagas_mes_vencimento=Sum('pago', filter=do_mes),
+        total_faturamento_pagar=Sum('pendente_pagar', filter=do_mes),
+        valor_total_receber=Sum('recebido'),
+        total_recebidas_mes_vencimento=Sum('recebido', filter=do_mes),
+        total_faturamento_receber=Sum('pendente_receber', filter=do_mes),
+    )
+    return {chave: valor or ZERO for chave, valor in somas.items()}
+
+
+def _proxima_conta(empresa_id):
+    conta = (
+        ContaAPagar.objects.filter(empresa_id=empresa_id, is_active=True)
+        .select_related('contrato', 'contrato__fornecedor', 'contrato__cliente')
+        .prefetch_related(Prefetch(
+            'contrato__contrato_projetos', queryset=ContratoProjeto.objects.select_related('projeto'),
+        ))
+        .order_by('data_pagamento', 'pk')
+        .first()
+    )
+    return dict(ContaAPagarSerializer(conta).data) if conta else None
+
+
+def _projecao_com_contrato(projecao):
+    """Mesmo formato de ContaAPagarViewSet.proximo_vencimento_nao_pago."""
+    return {
+        'id': projecao.id,
+        'data_vencimento': projecao.data_vencimento,
+        'valor': float(projecao.valor_parcela),
+        'contrato': {
+            'id': projecao.contrato.id,
+            'numero': projecao.contrato.numero,
+            'descricao': projecao.contrato.descricao,
+        },
+    }
+
+
+def _projecao(projecao):
+    return dict(ProjecaoFaturamentoSerializer(projecao).data) if projecao else None
+
+
+def separar_vencimentos(projecoes, hoje):
+    """
+    A partir das projeções não pagas do mês (ordenadas por vencimento), monta:
+    - proximo_vencimento_nao_pago: 1ª de fornecedor a partir de hoje (None se o mês não tiver);
+    - vencimentos_proximos: as de fornecedor de amanhã até o fim do mês;
+    - proximos_vencimentos: a 1ª do mês de cada lado, como ProximosVencimentosViewSet.
+    """
+    proxima_nao_paga = next(
+        (p for p in projecoes if p.contrato.tipo == 'fornecedor' and p.data_vencimento >= hoje), None,
+    )
+    vencimentos = [p for p in projecoes if p.contrato.tipo == 'fornecedor' and p.data_vencimento > hoje]
+    proximos = {
+        lado: next((p for p in projecoes if p.contrato.tipo in tipos), None)
+        for lado, tipos in TIPOS_CONTRATO.items()
+    }
+    return proxima_nao_paga, vencimentos, proximos
+
+
+def montar_dashboard(empresa_id, hoje=None):
+    hoje = hoje or date.today()
+    primeiro_dia = hoje.replace(day=1)
+    ultimo_dia = primeiro_dia + relativedelta(months=1) - relativedelta(days=1)
+
+    nao_pagas = ProjecaoFaturamento.objects.filter(contrato__empresa_id=empresa_id, pago=False)
+    do_mes = list(
+        nao_pagas.filter(data_vencimento__gte=primeiro_dia, data_vencimento__lte=ultimo_dia)
+        .select_related('contrato')
+        .order_by('data_vencimento', 'pk')
+    )
+    proxima_nao_paga, vencimentos, proximos = separar_vencimentos(do_mes, hoje)
+    if proxima_nao_paga is None:
+        proxima_nao_paga = (
+            nao_pagas.filter(contrato__tipo='fornecedor', data_vencimento__gt=ultimo_dia)
+            .select_related('contrato')
+            .order_by('data_vencimento', 'pk')
+            .first()
+        )
+
+    return {
+        **_totais(empresa_id, hoje.year, hoje.month),
+        'proximo_vencimento': _proxima_conta(empresa_id),
+        'proximo_vencimento_nao_pago': _projecao_com_contrato(proxima_nao_paga) if proxima_nao_paga else None,
+        'vencimentos_proximos': [_projecao(p) for p in vencimentos],
+        'proximos_vencimentos': {lado: _projecao(p) for lado, p in proximos.items()},
+        'gerado_em': timezone.now(),
+    }
+
+
+def dashboard(empresa_id):
+    """Dashboard da empresa, do cache enquanto a versão do resumo não mudar."""
+    hoje = date.today()
+    chave = _chave_cache(empresa_id, hoje)
+    dados = cache.get(chave)
+    if dados is None:
+        dados = montar_dashboard(empresa_id, hoje)
+        cache.set(chave, dados, getattr(settings, 'DASHBOARD_CACHE_TTL', 60))
+    return dados
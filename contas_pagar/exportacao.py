@@ -0,0 +1,192 @@
+# contas_pagar/exportacao.py
+"""
+Exportação em streaming das contas e projeções (CSV ou NDJSON).
+
+    GET <listagem>/exportar/?formato=csv|ndjson&data_inicio=&data_fim=&status=
+
+Parte do queryset da própria view (filter_queryset(get_queryset()): empresa,
+is_active etc.), lê com values_list(...).iterator(chunk_size) — cursor no
+servidor, sem instanciar modelos — e escreve linha a linha num
+StreamingHttpResponse. A memória fica constante seja qual for o número de
+linhas, e o cabeçalho sai antes da primeira consulta terminar de ler.
+
+Uma linha por conta: projetos (M2M) ficam de fora; quem precisar deles usa
+a listagem paginada.
+"""
+import csv
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from contratos.models import ProjecaoFaturamento
+
+from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso
+
+CHUNK = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+@dataclass(frozen=True)
+class Exportacao:
+    nome: str            # prefixo do arquivo
+    campo_data: str      # filtrado por data_inicio / data_fim e usado na ordenação
+    colunas: tuple       # (cabeçalho, lookup do values_list)
+    filtra_status: bool = True
+
+
+_CLASSIFICACAO = (
+    ('conta_financeira', 'conta_financeira__descricao'),
+    ('centro_custo', 'centro_custo__descricao'),
+)
+
+EXPORTACOES = {
+    ContaAPagar: Exportacao('contas_pagar', 'data_pagamento', (
+        ('id', 'id'),
+        ('status', 'status'),
+        ('data_pagamento', 'data_pagamento'),
+        ('competencia', 'competencia'),
+        ('valor_total', 'valor_total'),
+        ('diferenca', 'diferenca'),
+        ('contrato_id', 'contrato_id'),
+        ('contrato_numero', 'contrato__numero'),
+        ('fornecedor', 'contrato__fornecedor__nome'),
+        ('cliente', 'contrato__cliente__nome'),
+        ('forma_pagamento', 'forma_pagamento__descricao'),
+        *_CLASSIFICACAO,
+    )),
+    ContaAReceber: Exportacao('contas_receber', 'data_recebimento', (
+        ('id', 'id'),
+        ('status', 'status'),
+        ('data_recebimento', 'data_recebimento'),
+        ('competencia', 'competencia'),
+        ('valor_total', 'valor_total'),
+        ('diferenca', 'diferenca'),
+        ('contrato_id', 'contrato_id'),
+        ('contrato_numero', 'contrato__numero'),
+        ('cliente', 'contrato__cliente__nome'),
+        ('forma_pagamento', 'forma_pagamento__descricao'),
+        *_CLASSIFICACAO,
+    )),
+    ContaPagarAvulso: Exportacao('contas_pagar_avulso', 'data_pagamento', (
+        ('id', 'id'),
+        ('status', 'status'),
+        ('descricao', 'descricao'),
+        ('data_pagamento', 'data_pagamento'),
+        ('competencia', 'competencia'),
+        ('valor', 'valor'),
+        ('tipo_pagador', 'tipo_pagador'),
+        ('fornecedor', 'fornecedor__nome'),
+        ('funcionario', 'funcionario__nome_completo'),
+        *_CLASSIFICACAO,
+    )),
+    ContaReceberAvulso: Exportacao('contas_receber_avulso', 'data_recebimento', (
+        ('id', 'id'),
+        ('status', 'status'),
+        ('descricao', 'descricao'),
+        ('data_recebimento', 'data_recebimento'),
+        ('competencia', 'competencia'),
+        ('valor', 'valor'),
+        ('cliente', 'cliente__nome'),
+        *_CLASSIFICACAO,
+    )),
+    ProjecaoFaturamento: Exportacao('projecoes_faturamento', 'data_vencimento', (
+        ('id', 'id'),
+        ('data_vencimento', 'data_vencimento'),
+        ('valor_parcela', 'valor_parcela'),
+        ('pago', 'pago'),
+        ('contrato_id', 'contrato_id'),
+        ('contrato_numero', 'contrato__numero'),
+        ('tipo_contrato', 'contrato__tipo'),
+    ), filtra_status=False),
+}
+
+
+class _Eco:
+    """Buffer do csv.writer que só devolve a linha escrita (nada acumula)."""
+
+    def write(self, valor):
+        return valor
+
+
+def filtrar(exportacao, qs, params):
+    """Filtros de período (campo de data do modelo) e status da exportação."""
+    filtros = {}
+    for param, lookup in (('data_inicio', 'gte'), ('data_fim', 'lte')):
+        valor = params.get(param)
+        if not valor:
+            continue
+        data = parse_date(valor)
+        if data is None:
+            raise ValidationError({param: "Use o formato AAAA-MM-DD."})
+        filtros[f"{exportacao.campo_data}__{lookup}"] = data
+    if exportacao.filtra_status and params.get('status'):
+        filtros['status'] = params['status']
+    return qs.filter(**filtros)
+
+
+def linhas(exportacao, qs):
+    """Tuplas na ordem das colunas, lidas do banco em blocos de CHUNK."""
+    # using(qs.db): fixa o banco (tenant/réplica) agora — o corpo é consumido depois da view retornar
+    qs = qs.using(qs.db).select_related(None).prefetch_related(None)
+    return (
+        qs.order_by(exportacao.campo_data, 'pk')
+        .values_list(*(lookup for _, lookup in exportacao.colunas))
+        .iterator(chunk_size=CHUNK)
+    )
+
+
+def _texto(valor):
+    # Decimal como texto, igual aos serializers (sem passar por float)
+    return str(valor) if isinstance(valor, Decimal) else valor
+
+
+def csv_stream(exportacao, tuplas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow([cabecalho for cabecalho, _ in exportacao.colunas])
+    for tupla in tuplas:
+        yield escritor.writerow(tupla)
+
+
+def ndjson_stream(exportacao, tuplas):
+    cabecalhos = [cabecalho for cabecalho, _ in exportacao.colunas]
+    encoder = JSONEncoder(ensure_ascii=False)
+    for tupla in tuplas:
+        yield encoder.encode(dict(zip(cabecalhos, map(_texto, tupla)))) + "\n"
+
+
+def exportar_resposta(modelo, qs, params):
+    """StreamingHttpResponse com as linhas de `qs` no formato de ?formato= (csv por padrão)."""
+    formato = (params.get('formato') or 'csv').lower()
+    if formato not in FORMATOS:
+        raise ValidationError({'formato': f"Use um de: {', '.join(FORMATOS)}."})
+    exportacao = EXPORTACOES[modelo]
+    tuplas = linhas(exportacao, filtrar(exportacao, qs, params))
+    corpo = csv_stream(exportacao, tuplas) if formato == 'csv' else ndjson_stream(exportacao, tuplas)
+
+    resposta = StreamingHttpResponse(corpo, content_type=FORMATOS[formato])
+    arquivo = f"{exportacao.nome}_{timezone.localdate():%Y%m%d}.{formato}"
+    resposta['Content-Disposition'] = f'attachment; filename="{arquivo}"'
+    # Proxies (nginx) não devem segurar o corpo até o fim
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
+
+
+class ExportacaoMixin:
+    """Action GET exportar/ sobre o queryset da view (ver docstring do módulo)."""
+    # Com ReplicaReadMixin a exportação também lê da réplica
+    replica_actions = ('list', 'exportar')
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        qs = self.filter_queryset(self.get_queryset())
+        return exportar_resposta(qs.model, qs, request.query_params)
@@ -0,0 +1,202 @@
+# contas_pagar/ledger.py
+"""
+Sincronização do livro de lançamentos (Lancamento) a partir das quatro contas.
+
+- save de qualquer conta: LancamentoSincronizado grava o lançamento na mesma transação;
+- exclusão: post_delete abaixo (roda dentro da transação do delete); o contrato
+  da conta excluída fica em ExclusaoLancamento para a conciliação incremental;
+- update()/bulk_create: quem alterar em lote chama sincronizar_lote(modelo, ids);
+- backfill_lancamentos / verificar_lancamentos: carga inicial e auditoria. Não
+  mexem no resumo mensal: a conta sem lançamento já está no resumo (a migração
+  0008 o calcula das contas), então os comandos terminam com reconstruir.
+
+A projeção é feita no banco (.values()), então um lote de N contas custa uma
+query de leitura e um INSERT ... ON CONFLICT.
+"""
+from collections import namedtuple
+
+from django.db import router, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .consolidado import descricao_conta
+from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, ExclusaoLancamento, Lancamento
+from .resumo import Deltas
+
+Fonte = namedtuple('Fonte', ['tipo', 'origem', 'campo_data', 'campo_valor', 'contraparte', 'rotulo', 'tem_contrato'])
+
+FONTES = {
+    ContaAPagar: Fonte('pagar', 'normal', 'data_pagamento', 'valor_total', 'contrato__fornecedor', 'Conta a Pagar', True),
+    ContaAReceber: Fonte('receber', 'normal', 'data_recebimento', 'valor_total', 'contrato__cliente', 'Conta a Receber', True),
+    ContaPagarAvulso: Fonte('pagar', 'avulso', 'data_pagamento', 'valor', 'fornecedor', 'Conta a Pagar Avulso', False),
+    ContaReceberAvulso: Fonte('receber', 'avulso', 'data_recebimento', 'valor', 'cliente', 'Conta a Receber Avulso', False),
+}
+
+# Campos copiados da conta; são os comparados pelo verificador
+CAMPOS = ['empresa_id', 'contrato_id', 'data', 'valor', 'status', 'descricao',
+          'centro_custo_id', 'conta_financeira_id', 'is_active']
+
+# O que o resumo mensal (contas_pagar/resumo.py) lê de cada lançamento
+CAMPOS_RESUMO = ['tipo', 'origem', 'empresa_id', 'data', 'valor', 'is_active']
+
+
+def _projecao(modelo, qs):
+    """Contas de `qs` como dicts id + CAMPOS (anotações com '_': valor/descricao já são campos das avulsas)."""
+    fonte = FONTES[modelo]
+    return qs.annotate(
+        _data=F(fonte.campo_data),
+        _valor=F(fonte.campo_valor),
+        _descricao=descricao_conta(fonte.rotulo, fonte.contraparte),
+    ).values(
+        'id', 'empresa_id', '_data', '_valor', 'status', '_descricao',
+        'centro_custo_id', 'conta_financeira_id', 'is_active',
+        *(['contrato_id'] if fonte.tem_contrato else []),
+    )
+
+
+def _lancamentos_da_origem(modelo, using):
+    fonte = FONTES[modelo]
+    return Lancamento.objects.using(using).filter(tipo=fonte.tipo, origem=fonte.origem)
+
+
+def _remover(lancamentos, using):
+    """
+    Apaga `lancamentos`; os contratos das contas de contrato ficam em
+    ExclusaoLancamento para a conciliação incremental.
+    """
+    ExclusaoLancamento.objects.using(using).bulk_create([
+        ExclusaoLancamento(empresa_id=empresa_id, contrato_id=contrato_id)
+        for empresa_id, contrato_id in (
+            lancamentos.exclude(contrato_id=None).order_by()
+            .values_list('empresa_id', 'contrato_id').distinct()
+        )
+    ])
+    lancamentos.delete()
+
+
+def esperados(modelo, ids, using):
+    """origem_id -> dict de CAMPOS como o lançamento deveria estar."""
+    linhas = _projecao(modelo, modelo.objects.using(using).filter(pk__in=ids))
+    return {
+        linha['id']: {
+            campo: linha.get(campo, linha.get(f"_{campo}")) for campo in CAMPOS
+        }
+        for linha in linhas
+    }
+
+
+def sincronizar_lote(modelo, ids, using=None, aplicar_resumo=True):
+    """
+    Grava (upsert) os lançamentos das contas `ids`; ids que não existem mais são removidos.
+    aplicar_resumo=False (backfill/verificar): o resumo mensal não recebe deltas.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    using = using or router.db_for_write(modelo)
+    fonte = FONTES[modelo]
+    linhas = esperados(modelo, ids, using)
+    with transaction.atomic(using=using):
+        deltas = Deltas()
+        if aplicar_resumo:
+            # Linhas antigas (com lock) para o delta do resumo mensal: sai o valor antigo, entra o novo
+            for anterior in (
+                _lancamentos_da_origem(modelo, using).filter(origem_id__in=ids)
+                .select_for_update().values(*CAMPOS_RESUMO)
+            ):
+                deltas.conta(anterior, sinal=-1)
+            for campos in linhas.values():
+                deltas.conta({'tipo': fonte.tipo, 'origem': fonte.origem, **campos})
+
+        Lancamento.objects.using(using).bulk_create(
+            [
+                Lancamento(tipo=fonte.tipo, origem=fonte.origem, origem_id=origem_id, **campos)
+                for origem_id, campos in linhas.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['tipo', 'origem', 'origem_id'],
+            update_fields=[campo.removesuffix('_id') for campo in CAMPOS] + ['atualizado_em'],
+        )
+        removidos = set(ids) - set(linhas)
+        if removidos:
+            _remover(_lancamentos_da_origem(modelo, using).filter(origem_id__in=removidos), using)
+        deltas.aplicar(using)
+    return len(linhas)
+
+
+def sincronizar_instancia(instancia, using):
+    sincronizar_lote(type(instancia), [instancia.pk], using)
+
+
+@receiver(post_delete, sender=ContaAPagar)
+@receiver(post_delete, sender=ContaAReceber)
+@receiver(post_delete, sender=ContaPagarAvulso)
+@receiver(post_delete, sender=ContaReceberAvulso)
+def remover_lancamento(sender, instance, using, **kwargs):
+    lancamentos = _lancamentos_da_origem(sender, using).filter(origem_id=instance.pk)
+    deltas = Deltas()
+    for anterior in lancamentos.values(*CAMPOS_RESUMO):
+        deltas.conta(anterior, sinal=-1)
+    _remover(lancamentos, using)
+    deltas.aplicar(using)
+
+
+def _lotes_de_ids(qs, lote):
+    """pks de `qs` em lotes, por keyset (sem OFFSET)."""
+    ultimo = None
+    while True:
+        pagina = qs.order_by('pk')
+        if ultimo is not None:
+            pagina = pagina.filter(pk__gt=ultimo)
+        ids = list(pagina.values_list('pk', flat=True)[:lote])
+        if not ids:
+            return
+        yield ids
+        ultimo = ids[-1]
+
+
+def backfill(modelo, using, lote=1000):
+    """Sincroniza todas as contas de `modelo`, um lote por transação. Gera o total acumulado."""
+    total = 0
+    for ids in _lotes_de_ids(modelo.objects.using(using), lote):
+        total += sincronizar_lote(modelo, ids, using, aplicar_resumo=False)
+        yield total
+
+
+def verificar(modelo, using, lote=1000, corrigir=False):
+    """
+    Compara contas e lançamentos de `modelo`. Retorna dict com as listas de
+    origem_id faltando, divergentes e órfãos (lançamento sem conta).
+    Com corrigir=True ressincroniza o que encontrar, sem deltas no resumo mensal
+    (quem chama reconstrói o resumo depois).
+    """
+    faltando, divergentes, orfaos = [], [], []
+
+    for ids in _lotes_de_ids(modelo.objects.using(using), lote):
+        esperado = esperados(modelo, ids, using)
+        atuais = {
+            linha.pop('origem_id'): linha
+            for linha in _lancamentos_da_origem(modelo, using).filter(origem_id__in=ids).values('origem_id', *CAMPOS)
+        }
+        for origem_id, campos in esperado.items():
+            if origem_id not in atuais:
+                faltando.append(origem_id)
+            elif atuais[origem_id] != campos:
+                divergentes.append(origem_id)
+
+    for ids in _lotes_de_ids(_lancamentos_da_origem(modelo, using), lote):
+        origem_ids = list(
+            _lancamentos_da_origem(modelo, using).filter(pk__in=ids).values_list('origem_id', flat=True)
+        )
+        existentes = set(modelo.objects.using(using).filter(pk__in=origem_ids).values_list('pk', flat=True))
+        orfaos.extend(origem_id for origem_id in origem_ids if origem_id not in existentes)
+
+    if corrigir:
+        pendentes = faltando + divergentes
+        for i in range(0, len(pendentes), lote):
+            sincronizar_lote(modelo, pendentes[i:i + lote], using, aplicar_resumo=False)
+        if orfaos:
+            _remover(_lancamentos_da_origem(modelo, using).filter(origem_id__in=orfaos), using)
+
+    return {'faltando': faltando, 'divergentes': divergentes, 'orfaos': orfaos}
@@ -0,0 +1,155 @@
+# contas_pagar/listagem.py
+"""
+Listagem rápida de ContaAPagar / ContaAReceber (GET de list).
+
+Em vez de instanciar os modelos e passar cada linha pelo serializer (com
+SerializerMethodField para projetos e cliente/fornecedor), a página é lida
+com .values() — contrato, cliente/fornecedor e tipo vêm no mesmo SELECT — e
+os projetos dos contratos da página vêm numa query só. São duas queries por
+página e o JSON é o mesmo dos serializers (ContaAPagarSerializer /
+ContaAReceberSerializer).
+
+Só leitura: create, retrieve e update continuam nos serializers.
+linhas_avulsas() faz o mesmo para as avulsas (usado pelo 'detalhes' da
+listagem consolidada).
+Benchmark: manage.py benchmark_listagem_contas.
+"""
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from contratos.models import ContratoProjeto
+
+from .models import (
+    ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, ProjetoConta, ProjetoContaPagar,
+)
+from .serializers import (
+    ContaAPagarSerializer, ContaAReceberSerializer, ContaPagarAvulsoSerializer, ContaReceberAvulsoSerializer,
+    ProjetoContaOutputSerializer, ProjetoContaPagarOutputSerializer,
+)
+
+# tipo -> (modelo, serializer com o formato de referência, campo de data)
+TIPOS = {
+    'pagar': (ContaAPagar, ContaAPagarSerializer, 'data_pagamento'),
+    'receber': (ContaAReceber, ContaAReceberSerializer, 'data_recebimento'),
+}
+
+# tipo -> (modelo avulso, serializer, ligação com projetos, serializer da ligação)
+AVULSAS = {
+    'pagar': (ContaPagarAvulso, ContaPagarAvulsoSerializer, ProjetoContaPagar, ProjetoContaPagarOutputSerializer),
+    'receber': (ContaReceberAvulso, ContaReceberAvulsoSerializer, ProjetoConta, ProjetoContaOutputSerializer),
+}
+
+# Campos calculados pelo serializer; os demais saem direto do .values()
+CALCULADOS = ('projetos', 'cliente_fornecedor', 'tipo_contrato')
+
+
+def _conversores(serializer_class):
+    """{campo: to_representation} só para os campos em que o valor do banco não serve como está."""
+    campos = serializer_class().fields
+    return {
+        nome: campo.to_representation
+        for nome, campo in campos.items()
+        if nome not in CALCULADOS and isinstance(campo, (serializers.DecimalField, serializers.DateField))
+    }
+
+
+def projetar(tipo, qs):
+    """`qs` de contas -> queryset de dicts com os campos simples do serializer e os do contrato."""
+    _, serializer_class, _ = TIPOS[tipo]
+    simples = [campo for campo in serializer_class.Meta.fields if campo not in CALCULADOS]
+    return qs.select_related(None).prefetch_related(None).values(
+        *simples,
+        _tipo_contrato=F('contrato__tipo'),
+        _fornecedor_id=F('contrato__fornecedor_id'),
+        _fornecedor_nome=F('contrato__fornecedor__nome'),
+        _cliente_id=F('contrato__cliente_id'),
+        _cliente_nome=F('contrato__cliente__nome'),
+    )
+
+
+def _projetos_por_contrato(contrato_ids):
+    projetos = {}
+    for contrato_id, projeto_id, nome, valor in (
+        ContratoProjeto.objects.filter(contrato_id__in=contrato_ids)
+        .values_list('contrato_id', 'projeto_id', 'projeto__nome', 'valor_projeto')
+    ):
+        projetos.setdefault(contrato_id, []).append({'id': projeto_id, 'nome': nome, 'valor': valor})
+    return projetos
+
+
+def _cliente_fornecedor(tipo, linha):
+    # Mesma regra dos serializers: a pagar usa o cliente só em contrato de cliente
+    if tipo == 'receber' or linha['_tipo_contrato'] == 'cliente':
+        chave = '_cliente'
+    else:
+        chave = '_fornecedor'
+    if linha[f"{chave}_id"] is None:
+        return None
+    return {'id': linha[f"{chave}_id"], 'nome': linha[f"{chave}_nome"]}
+
+
+def montar_linhas(tipo, linhas):
+    """Dicts de projetar() -> lista no formato do serializer, com uma query para os projetos."""
+    _, serializer_class, _ = TIPOS[tipo]
+    conversores = _conversores(serializer_class)
+    projetos = _projetos_por_contrato({linha['contrato'] for linha in linhas})
+    resultado = []
+    for linha in linhas:
+        saida = {}
+        for campo in serializer_class.Meta.fields:
+            if campo == 'projetos':
+                saida[campo] = projetos.get(linha['contrato'], [])
+            elif campo == 'cliente_fornecedor':
+                saida[campo] = _cliente_fornecedor(tipo, linha)
+            elif campo == 'tipo_contrato':
+                saida[campo] = linha['_tipo_contrato']
+            else:
+                valor = linha[campo]
+                conversor = conversores.get(campo)
+                saida[campo] = conversor(valor) if conversor and valor is not None else valor
+        resultado.append(saida)
+    return resultado
+
+
+def linhas_avulsas(tipo, ids):
+    """{id: conta avulsa no formato do serializer dela (com projetos_info)} para `ids`, em duas queries."""
+    modelo, serializer_class, ligacao, ligacao_serializer = AVULSAS[tipo]
+    campos = [nome for nome, campo in serializer_class().fields.items() if not campo.write_only]
+    conversores = _conversores(serializer_class)
+    valor_projeto = ligacao_serializer().fields['valor'].to_representation
+
+    projetos = {}
+    for conta_id, projeto_id, nome, valor in (
+        ligacao.objects.filter(conta_id__in=ids).values_list('conta_id', 'projeto_id', 'projeto__nome', 'valor')
+    ):
+        projetos.setdefault(conta_id, []).append(
+            {'projeto_id': projeto_id, 'projeto_nome': nome, 'valor': valor_projeto(valor)}
+        )
+
+    resultado = {}
+    for linha in modelo.objects.filter(id__in=ids).values(*(c for c in campos if c != 'projetos_info')):
+        saida = {}
+        for campo in campos:
+            if campo == 'projetos_info':
+                saida[campo] = projetos.get(linha['id'], [])
+            else:
+                valor = linha[campo]
+                conversor = conversores.get(campo)
+                saida[campo] = conversor(valor) if conversor and valor is not None else valor
+        resultado[linha['id']] = saida
+    return resultado
+
+class ListagemRapidaMixin:
+    """
+    `list` pela listagem rápida; entra depois do CrossTenantListMixin, que
+    continua tratando o `X-Company-Id: all`.
+    """
+    listagem_tipo = None  # 'pagar' ou 'receber'
+
+    def list(self, request, *args, **kwargs):
+        linhas = projetar(self.listagem_tipo, self.filter_queryset(self.get_queryset()))
+        pagina = self.paginate_queryset(linhas)
+        if pagina is None:
+            return Response(montar_linhas(self.listagem_tipo, list(linhas)))
+        return self.get_paginated_response(montar_linhas(self.listagem_tipo, pagina))
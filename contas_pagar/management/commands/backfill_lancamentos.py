@@ -0,0 +1,47 @@
+# contas_pagar/management/commands/backfill_lancamentos.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from contas_pagar.ledger import FONTES, backfill
+from contas_pagar.models import Lancamento
+from contas_pagar.resumo import reconstruir
+from empresas.models import Empresa
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Preenche o livro de lançamentos (Lancamento) a partir das contas a pagar/receber, '
+        'normais e avulsas, em lotes por keyset. Pode ser rodado de novo: é um upsert. '
+        'Termina recalculando o resumo mensal de cada empresa.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Contas por lote/transação (padrão: 1000)')
+        parser.add_argument('--empresa', type=int, action='append', default=None,
+                            help='Só esta empresa (pode repetir); padrão: todos os tenants prontos')
+
+    def handle(self, *args, **options):
+        tenants = [d for d in tenant_registry.load_all() if d.status == Empresa.STATUS_PRONTO]
+        if options['empresa']:
+            tenants = [d for d in tenants if d.id in options['empresa']]
+
+        for tenant in tenants:
+            inicio = time.monotonic()
+            with tenant_context(tenant):
+                using = router.db_for_write(Lancamento)
+                for modelo in FONTES:
+                    total = 0
+                    for total in backfill(modelo, using, lote=options['batch_size']):
+                        pass
+                    self.stdout.write(f"{tenant.alias:<20} {modelo.__name__:<20} {total} conta(s)")
+                # Edições de contas ainda sem lançamento somaram de novo o que o resumo já tinha
+                meses = reconstruir(tenant.id, using)
+                self.stdout.write(f"{tenant.alias:<20} {'ResumoMensal':<20} {meses} mês(es)")
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {tenant.alias} em {time.monotonic() - inicio:.2f}s"
+            ))
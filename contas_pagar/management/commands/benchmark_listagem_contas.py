@@ -0,0 +1,161 @@
+# contas_pagar/management/commands/benchmark_listagem_contas.py
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from rest_framework.renderers import JSONRenderer
+
+from clientes.models import Cliente
+from contas_pagar.ledger import sincronizar_lote
+from contas_pagar.listagem import TIPOS, montar_linhas, projetar
+from contas_pagar.resumo import reconstruir
+from contratos.models import Contrato, ContratoProjeto
+from fornecedores.models import Fornecedor
+from multipla_teste.core.versoes import incrementar
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+from pagamentos.models import FormaPagamento
+from projetos.models import Projeto
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede linhas/s da listagem de contas a pagar/receber: serializer (antes) x '
+        '.values() + projetos em lote (contas_pagar/listagem.py). Semeia o tenant numa '
+        'transação que é desfeita ao final, a menos que --manter seja usado (aí o livro de '
+        'lançamentos, o resumo mensal e as versões das tabelas são atualizados antes do commit).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, required=True, help='Tenant onde semear e medir')
+        parser.add_argument('--linhas', type=int, default=50000, help='Contas semeadas por tipo')
+        parser.add_argument('--contratos', type=int, default=200, help='Contratos por tipo')
+        parser.add_argument('--projetos', type=int, default=3, help='Projetos por contrato')
+        parser.add_argument('--page-size', type=int, default=500, help='Linhas por página medida')
+        parser.add_argument('--manter', action='store_true',
+                            help='Não desfaz a semeadura (livro, resumo e versões são atualizados)')
+
+    def handle(self, *args, **options):
+        tenant = next((d for d in tenant_registry.load_all() if d.id == options['empresa']), None)
+        if tenant is None:
+            raise CommandError(f"Empresa {options['empresa']} não encontrada")
+
+        with tenant_context(tenant):
+            using = router.db_for_write(Contrato)
+            with transaction.atomic(using=using):
+                inicio = time.perf_counter()
+                contas = self._semear(tenant.id, options)
+                self.stdout.write(f"Semeadura: {time.perf_counter() - inicio:.1f}s")
+
+                resultados = {}
+                for tipo in TIPOS:
+                    resultados[tipo] = {
+                        'antes': self._medir(tipo, tenant.id, options['page_size'], rapido=False),
+                        'depois': self._medir(tipo, tenant.id, options['page_size'], rapido=True),
+                    }
+                if options['manter']:
+                    self._manter(tenant.id, contas, using)
+                else:
+                    transaction.set_rollback(True, using=using)
+
+        self._relatorio(options, resultados)
+
+    # --- preparação ---
+
+    def _semear(self, empresa_id, options):
+        """Cria contratos, projetos e contas por bulk_create; retorna {modelo: ids das contas}."""
+        contas = {}
+        hoje = date.today()
+        forma = FormaPagamento.objects.create(descricao='bench', tipo=FormaPagamento._meta.get_field('tipo').choices[0][0],
+                                              empresa_id=empresa_id)
+        fornecedor = Fornecedor.objects.create(nome='Fornecedor bench', endereco='-', cidade='-', estado='SP',
+                                               telefone='-', empresa_id=empresa_id)
+        cliente = Cliente.objects.create(nome='Cliente bench', endereco='-', cidade='-', estado='SP',
+                                         telefone='-', empresa_id=empresa_id)
+        projetos = Projeto.objects.bulk_create([
+            Projeto(nome=f"Projeto bench {n}", descricao='-', data_inicio=hoje, empresa_id=empresa_id)
+            for n in range(options['projetos'])
+        ])
+
+        for tipo, (modelo, _, campo_data) in TIPOS.items():
+            contratos = Contrato.objects.bulk_create([
+                Contrato(
+                    numero=f"BENCH-{tipo}-{n}-{time.time_ns()}", descricao='bench', data_inicio=hoje,
+                    valor_total=Decimal('1000.00'), tipo='fornecedor' if tipo == 'pagar' else 'cliente',
+                    fornecedor=fornecedor if tipo == 'pagar' else None,
+                    cliente=cliente if tipo == 'receber' else None, empresa_id=empresa_id,
+                )
+                for n in range(options['contratos'])
+            ])
+            ContratoProjeto.objects.bulk_create([
+                ContratoProjeto(contrato=contrato, projeto=projeto, valor_projeto=Decimal('100.00'))
+                for contrato in contratos for projeto in projetos
+            ])
+            # bulk_create direto, sem livro nem resumo: o benchmark mede leitura (--manter acerta depois)
+            criadas = modelo.objects.bulk_create(
+                [
+                    modelo(
+                        contrato=contratos[n % len(contratos)], forma_pagamento=forma, empresa_id=empresa_id,
+                        competencia=hoje, valor_total=Decimal(n % 1000) + Decimal('0.50'),
+                        **{campo_data: hoje - timedelta(days=n % 365)},
+                    )
+                    for n in range(options['linhas'])
+                ],
+                batch_size=2000,
+            )
+            contas[modelo] = [conta.pk for conta in criadas]
+        return contas
+
+    def _manter(self, empresa_id, contas, using, lote=1000):
+        """O que o bulk_create pulou: lançamentos das contas, resumo mensal e versões do ETag."""
+        for modelo, ids in contas.items():
+            for inicio in range(0, len(ids), lote):
+                sincronizar_lote(modelo, ids[inicio:inicio + lote], using, aplicar_resumo=False)
+        meses = reconstruir(empresa_id, using)
+        for modelo in (Projeto, Contrato, ContratoProjeto, *contas):
+            incrementar(modelo, [empresa_id], using)
+        self.stdout.write(f"Mantido: {sum(map(len, contas.values()))} contas no livro, {meses} meses no resumo")
+
+    # --- execução ---
+
+    def _medir(self, tipo, empresa_id, page_size, rapido):
+        """Percorre todas as contas da empresa em páginas por pk; retorna (linhas, segundos)."""
+        modelo, serializer_class, _ = TIPOS[tipo]
+        base = modelo.objects.filter(empresa_id=empresa_id, is_active=True)
+        if not rapido:
+            # Mesmo queryset de ContaAPagarViewSet / ContaAReceberViewSet.get_queryset
+            base = base.select_related(
+                'contrato', 'forma_pagamento', 'conta_financeira', 'centro_custo',
+                'contrato__fornecedor', 'contrato__cliente',
+            ).prefetch_related('contrato__contrato_projetos', 'contrato__contrato_projetos__projeto')
+        renderer = JSONRenderer()
+
+        total, ultimo = 0, 0
+        inicio = time.perf_counter()
+        while True:
+            if rapido:
+                pagina = list(projetar(tipo, base).filter(pk__gt=ultimo).order_by('pk')[:page_size])
+                dados = montar_linhas(tipo, pagina)
+            else:
+                pagina = list(base.filter(pk__gt=ultimo).order_by('pk')[:page_size])
+                dados = serializer_class(pagina, many=True).data
+            if not pagina:
+                break
+            renderer.render(dados)
+            total += len(pagina)
+            ultimo = dados[-1]['id']
+        return total, time.perf_counter() - inicio
+
+    def _relatorio(self, options, resultados):
+        self.stdout.write(self.style.MIGRATE_HEADING("=== Benchmark: listagem de contas (serializer x .values()) ==="))
+        self.stdout.write(f"Linhas por tipo: {options['linhas']}  Página: {options['page_size']}")
+        for tipo, medicoes in resultados.items():
+            taxas = {}
+            for modo, (linhas, segundos) in medicoes.items():
+                taxas[modo] = linhas / segundos if segundos else 0
+                self.stdout.write(f"{tipo:<8} {modo:<7} {linhas} linhas em {segundos:.2f}s  {taxas[modo]:.0f} linhas/s")
+            if taxas['antes']:
+                self.stdout.write(f"{tipo:<8} ganho   {taxas['depois'] / taxas['antes']:.1f}x")
+        self.stdout.write(self.style.SUCCESS("Benchmark concluído"))
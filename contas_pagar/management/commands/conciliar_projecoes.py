@@ -0,0 +1,76 @@
+# contas_pagar/management/commands/conciliar_projecoes.py
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from contas_pagar.conciliacao import conciliar_empresa
+from empresas.models import Empresa
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Concilia contas a pagar/receber com as projeções de faturamento (contrato × mês) '
+        'e grava os flags "pago" em lotes. Por padrão revisita só os contratos alterados '
+        'desde a última execução; --completo varre a empresa inteira.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true',
+                            help='Varre todos os contratos (também pega projeções criadas/alteradas)')
+        parser.add_argument('--empresa', type=int, action='append', default=None,
+                            help='Só esta empresa (pode repetir); padrão: todos os tenants prontos')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Só relata; não grava flags nem avança a marca')
+        parser.add_argument('--desmarcar', action='store_true',
+                            help='Também desmarca projeções pagas sem conta no mês')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Projeções atualizadas por transação (padrão: 1000)')
+        parser.add_argument('--relatorio', metavar='ARQUIVO',
+                            help='CSV com cada divergência encontrada')
+
+    def handle(self, *args, **options):
+        tenants = [d for d in tenant_registry.load_all() if d.status == Empresa.STATUS_PRONTO]
+        if options['empresa']:
+            tenants = [d for d in tenants if d.id in options['empresa']]
+
+        arquivo = open(options['relatorio'], 'w', newline='') if options['relatorio'] else None
+        relatorio = csv.writer(arquivo) if arquivo else None
+        if relatorio:
+            relatorio.writerow(['empresa', 'divergencia', 'contrato', 'mes', 'id'])
+
+        try:
+            for tenant in tenants:
+                inicio = time.monotonic()
+                with tenant_context(tenant):
+                    resultado = conciliar_empresa(
+                        tenant.id,
+                        incremental=not options['completo'],
+                        gravar=not options['dry_run'],
+                        desmarcar=options['desmarcar'],
+                        lote=options['batch_size'],
+                    )
+                resumo = resultado.as_dict()
+                self.stdout.write(
+                    f"{tenant.alias:<20} contratos={resumo['contratos']} projeções={resumo['projecoes']} "
+                    f"contas={resumo['contas']} marcar={resumo['marcar']} desmarcar={resumo['desmarcar']} "
+                    f"contas_sem_projecao={resumo['contas_sem_projecao']} "
+                    f"({time.monotonic() - inicio:.2f}s)"
+                )
+                if relatorio:
+                    for divergencia, itens in (
+                        ('projecao_nao_marcada', resultado.marcar),
+                        ('projecao_paga_sem_conta', resultado.desmarcar),
+                        ('conta_sem_projecao', resultado.contas_sem_projecao),
+                    ):
+                        relatorio.writerows([tenant.id, divergencia, *item] for item in itens)
+        finally:
+            if arquivo:
+                arquivo.close()
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry-run: nada foi gravado"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Conciliação concluída"))
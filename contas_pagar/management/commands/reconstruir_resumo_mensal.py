@@ -0,0 +1,34 @@
+# contas_pagar/management/commands/reconstruir_resumo_mensal.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from contas_pagar.resumo import reconstruir
+from empresas.models import Empresa
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula do zero o resumo mensal (ResumoMensal) usado pelos contadores do dashboard, '
+        'a partir das contas e projeções. A migração 0008 já popula o resumo; rodar sempre que '
+        'houver suspeita de deriva (escritas fora do ORM).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, action='append', default=None,
+                            help='Só esta empresa (pode repetir); padrão: todos os tenants prontos')
+
+    def handle(self, *args, **options):
+        tenants = [d for d in tenant_registry.load_all() if d.status == Empresa.STATUS_PRONTO]
+        if options['empresa']:
+            tenants = [d for d in tenants if d.id in options['empresa']]
+
+        for tenant in tenants:
+            inicio = time.monotonic()
+            with tenant_context(tenant):
+                meses = reconstruir(tenant.id)
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {tenant.alias}: {meses} mês(es) em {time.monotonic() - inicio:.2f}s"
+            ))
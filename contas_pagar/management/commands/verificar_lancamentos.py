@@ -0,0 +1,59 @@
+# contas_pagar/management/commands/verificar_lancamentos.py
+from django.core.management.base import BaseCommand
+from django.db import router
+
+from contas_pagar.ledger import FONTES, verificar
+from contas_pagar.models import Lancamento
+from contas_pagar.resumo import reconstruir
+from empresas.models import Empresa
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Confere o livro de lançamentos contra as contas: lançamentos faltando, '
+        'divergentes e órfãos. Com --corrigir, ressincroniza o que encontrar e recalcula '
+        'o resumo mensal da empresa.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--empresa', type=int, action='append', default=None,
+                            help='Só esta empresa (pode repetir); padrão: todos os tenants prontos')
+        parser.add_argument('--corrigir', action='store_true',
+                            help='Corrige as diferenças encontradas')
+
+    def handle(self, *args, **options):
+        tenants = [d for d in tenant_registry.load_all() if d.status == Empresa.STATUS_PRONTO]
+        if options['empresa']:
+            tenants = [d for d in tenants if d.id in options['empresa']]
+
+        inconsistentes = 0
+        for tenant in tenants:
+            with tenant_context(tenant):
+                using = router.db_for_write(Lancamento)
+                encontrados = 0
+                for modelo in FONTES:
+                    resultado = verificar(modelo, using, lote=options['batch_size'], corrigir=options['corrigir'])
+                    problemas = {chave: ids for chave, ids in resultado.items() if ids}
+                    if not problemas:
+                        continue
+                    encontrados += sum(len(ids) for ids in problemas.values())
+                    detalhes = ', '.join(
+                        f"{chave}={len(ids)} (ex.: {ids[:5]})" for chave, ids in problemas.items()
+                    )
+                    self.stdout.write(self.style.WARNING(f"{tenant.alias} {modelo.__name__}: {detalhes}"))
+                inconsistentes += encontrados
+                if encontrados and options['corrigir']:
+                    # A correção não aplica deltas: o resumo é recalculado das contas
+                    reconstruir(tenant.id, using)
+
+        if not inconsistentes:
+            self.stdout.write(self.style.SUCCESS("Livro de lançamentos consistente"))
+        elif options['corrigir']:
+            self.stdout.write(self.style.SUCCESS(f"{inconsistentes} lançamento(s) corrigido(s)"))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f"{inconsistentes} inconsistência(s); rode com --corrigir para ressincronizar"
+            ))
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas_pagar', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contaapagar',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['empresa', 'data_pagamento', 'id'], name='cpagar_emp_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contaareceber',
+            index=models.Index(fields=['empresa', 'data_recebimento', 'id'], name='creceber_emp_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contapagaravulso',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['empresa', 'data_pagamento', 'id'], name='cpavulso_emp_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contareceberavulso',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['empresa', 'data_recebimento', 'id'], name='cravulso_emp_data_id_idx'),
+        ),
+    ]
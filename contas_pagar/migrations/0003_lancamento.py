@@ -0,0 +1,43 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financeiro', '0001_initial'),
+        ('contratos', '0001_initial'),
+        ('empresas', '0002_empresa_status_provisionamento'),
+        ('contas_pagar', '0002_indices_listagem_keyset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lancamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('pagar', 'A pagar'), ('receber', 'A receber')], max_length=10)),
+                ('origem', models.CharField(choices=[('normal', 'Conta de contrato'), ('avulso', 'Conta avulsa')], max_length=10)),
+                ('origem_id', models.BigIntegerField()),
+                ('data', models.DateField()),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(max_length=20)),
+                ('descricao', models.CharField(blank=True, default='', max_length=512)),
+                ('is_active', models.BooleanField(default=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('centro_custo', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='financeiro.centrocusto')),
+                ('conta_financeira', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='financeiro.contafinanceira')),
+                ('contrato', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='contratos.contrato')),
+                ('empresa', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='empresas.empresa')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('is_active', True)), fields=['empresa', 'tipo', 'data', 'origem', 'origem_id'], name='lanc_emp_tipo_data_idx'), models.Index(fields=['empresa', 'contrato'], name='lanc_emp_contrato_idx'), models.Index(fields=['empresa', 'centro_custo'], name='lanc_emp_ccusto_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='lancamento',
+            constraint=models.UniqueConstraint(fields=('tipo', 'origem', 'origem_id'), name='lancamento_origem_unica'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0002_empresa_status_provisionamento'),
+        ('contas_pagar', '0003_lancamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaConciliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marca', models.DateTimeField()),
+                ('executado_em', models.DateTimeField(auto_now=True)),
+                ('empresa', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='empresas.empresa')),
+            ],
+        ),
+    ]
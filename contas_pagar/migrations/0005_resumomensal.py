@@ -0,0 +1,35 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:05
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0002_empresa_status_provisionamento'),
+        ('contas_pagar', '0004_marcaconciliacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('pago', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('recebido', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('projetado_pagar', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('projetado_receber', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('pendente_pagar', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('pendente_receber', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('empresa', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='empresas.empresa')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='resumomensal',
+            constraint=models.UniqueConstraint(fields=('empresa', 'ano', 'mes'), name='resumo_mensal_empresa_mes_unico'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas_pagar', '0005_resumomensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoTabela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('empresa_id', models.PositiveIntegerField()),
+                ('tabela', models.CharField(max_length=100)),
+                ('versao', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='versaotabela',
+            constraint=models.UniqueConstraint(fields=('empresa_id', 'tabela'), name='versao_tabela_empresa_unica'),
+        ),
+    ]
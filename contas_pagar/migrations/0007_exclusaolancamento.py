@@ -0,0 +1,28 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0001_initial'),
+        ('empresas', '0002_empresa_status_provisionamento'),
+        ('contas_pagar', '0006_versaotabela'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExclusaoLancamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('excluido_em', models.DateTimeField(auto_now_add=True)),
+                ('contrato', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='contratos.contrato')),
+                ('empresa', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='empresas.empresa')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['empresa', 'excluido_em'], name='exclusao_emp_data_idx')],
+            },
+        ),
+    ]
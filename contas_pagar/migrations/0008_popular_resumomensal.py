@@ -0,0 +1,87 @@
+# Generated by Django 4.2.14 on 2026-10-18 15:10
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+ZERO = Decimal('0.00')
+
+# Cópia de contas_pagar.resumo.COLUNAS_PROJECAO na época desta migração
+COLUNAS_PROJECAO = {
+    'fornecedor': ('projetado_pagar', 'pendente_pagar'),
+    'funcionario': ('projetado_pagar', None),
+    'cliente': ('projetado_receber', 'pendente_receber'),
+}
+
+
+def _decimal(expressao):
+    return models.Sum(expressao, output_field=models.DecimalField(max_digits=14, decimal_places=2))
+
+
+def popular_resumo(apps, schema_editor):
+    # Sem isso os contadores do dashboard ficam zerados até alguém rodar reconstruir_resumo_mensal.
+    # Mesma agregação de contas_pagar.resumo.reconstruir, com os modelos históricos e todas as empresas de uma vez.
+    using = schema_editor.connection.alias
+    ResumoMensal = apps.get_model('contas_pagar', 'ResumoMensal')
+    ProjecaoFaturamento = apps.get_model('contratos', 'ProjecaoFaturamento')
+    meses = defaultdict(dict)
+
+    for modelo, campo_data, coluna in (
+        ('ContaAPagar', 'data_pagamento', 'pago'),
+        ('ContaAReceber', 'data_recebimento', 'recebido'),
+    ):
+        linhas = (
+            apps.get_model('contas_pagar', modelo).objects.using(using)
+            .filter(is_active=True, empresa_id__isnull=False)
+            .annotate(ano=ExtractYear(campo_data), mes=ExtractMonth(campo_data))
+            .values('empresa_id', 'ano', 'mes')
+            .annotate(total=_decimal('valor_total'))
+            .order_by()
+        )
+        for linha in linhas:
+            meses[(linha['empresa_id'], linha['ano'], linha['mes'])][coluna] = linha['total']
+
+    linhas = (
+        ProjecaoFaturamento.objects.using(using).filter(contrato__empresa_id__isnull=False)
+        .annotate(ano=ExtractYear('data_vencimento'), mes=ExtractMonth('data_vencimento'))
+        .values('contrato__empresa_id', 'ano', 'mes', 'contrato__tipo')
+        .annotate(
+            projetado=_decimal('valor_parcela'),
+            pendente=_decimal(models.Case(
+                models.When(pago=True, then=models.Value(ZERO)), default=models.F('valor_parcela'),
+            )),
+        )
+        .order_by()
+    )
+    for linha in linhas:
+        if linha['contrato__tipo'] not in COLUNAS_PROJECAO:
+            continue
+        projetado, pendente = COLUNAS_PROJECAO[linha['contrato__tipo']]
+        mes = meses[(linha['contrato__empresa_id'], linha['ano'], linha['mes'])]
+        mes[projetado] = mes.get(projetado, ZERO) + linha['projetado']
+        if pendente:
+            mes[pendente] = mes.get(pendente, ZERO) + (linha['pendente'] or ZERO)
+
+    empresas = {empresa_id for empresa_id, _, _ in meses}
+    ResumoMensal.objects.using(using).filter(empresa_id__in=empresas).delete()
+    ResumoMensal.objects.using(using).bulk_create(
+        [
+            ResumoMensal(empresa_id=empresa_id, ano=ano, mes=mes, **colunas)
+            for (empresa_id, ano, mes), colunas in sorted(meses.items())
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contratos', '0001_initial'),
+        ('contas_pagar', '0007_exclusaolancamento'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_resumo, migrations.RunPython.noop),
+    ]
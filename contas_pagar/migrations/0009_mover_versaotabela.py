@@ -0,0 +1,21 @@
+# Generated by Django 4.2.14 on 2026-10-18 18:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas_pagar', '0008_popular_resumomensal'),
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        # VersaoTabela passou para multipla_teste.core com a mesma tabela: só o estado muda
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.DeleteModel(name='VersaoTabela'),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -1,5 +1,5 @@
 #contas_pagar/models.py
-from django.db import models
+from django.db import models, router, transaction
 from projetos.models import Projeto
 from contratos.models import Contrato
 from pagamentos.models import FormaPagamento
@@ -9,7 +9,27 @@ from pagamentos.models import FormaPagamento
 from financeiro.models import ContaFinanceira,CentroCusto
 from decimal import Decimal
 
-class ContaAPagar(models.Model):
+
+class LancamentoSincronizado(models.Model):
+    """
+    Base das quatro contas: o save grava a conta e o Lancamento correspondente
+    (contas_pagar/ledger.py) na mesma transação. Exclusões são tratadas pelo
+    post_delete em ledger.py; update()/bulk_create não passam por aqui e são
+    cobertos por ledger.sincronizar_lote, pelo backfill e pelo verificador.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from .ledger import sincronizar_instancia
+
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            sincronizar_instancia(self, using)
+
+class ContaAPagar(LancamentoSincronizado):
     STATUS_CHOICES = [
         ('pendente', 'Pendente'),
         ('pago', 'Pago'),
@@ -41,6 +61,16 @@ class ContaAPagar(models.Model):
     diferenca = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     justificativa_diferenca = models.TextField(null=True, blank=True)
 
+    class Meta:
+        # Listagem paginada por (data_pagamento, id) dentro da empresa (KeysetPagination)
+        indexes = [
+            models.Index(
+                fields=['empresa', 'data_pagamento', 'id'],
+                condition=models.Q(is_active=True),
+                name='cpagar_emp_data_id_idx',
+            ),
+        ]
+
     @property
     def projetos(self):
         return self.contrato.contrato_projetos.all()
@@ -48,7 +78,7 @@ class ContaAPagar(models.Model):
 
 #contas a receber
 
-class ContaAReceber(models.Model):
+class ContaAReceber(LancamentoSincronizado):
     STATUS_CHOICES = [
         ('pendente', 'Pendente'),
         ('recebido', 'Recebido'),
@@ -86,11 +116,15 @@ class ContaAReceber(models.Model):
 
     class Meta:
         ordering = ['-data_recebimento']
+        # Listagem paginada por (data_recebimento, id) dentro da empresa (KeysetPagination)
+        indexes = [
+            models.Index(fields=['empresa', 'data_recebimento', 'id'], name='creceber_emp_data_id_idx'),
+        ]
 
     def __str__(self):
         return f"Conta a Receber #{self.id}"
 
-class ContaPagarAvulso(models.Model):
+class ContaPagarAvulso(LancamentoSincronizado):
     
     tipo_pagador = models.CharField(
         max_length=20,
@@ -140,12 +174,21 @@ class ContaPagarAvulso(models.Model):
         self.is_active = False
         self.save()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['empresa', 'data_pagamento', 'id'],
+                condition=models.Q(is_active=True),
+                name='cpavulso_emp_data_id_idx',
+            ),
+        ]
+
 class ProjetoContaPagar(models.Model):
     conta = models.ForeignKey(ContaPagarAvulso, on_delete=models.CASCADE)
     projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE)
     valor = models.DecimalField(max_digits=10, decimal_places=2)
 
-class ContaReceberAvulso(models.Model):
+class ContaReceberAvulso(LancamentoSincronizado):
     descricao = models.CharField(max_length=255)
     valor = models.DecimalField(max_digits=10, decimal_places=2)
     data_recebimento = models.DateField()
@@ -177,8 +220,146 @@ class ContaReceberAvulso(models.Model):
         self.is_active = False
         self.save()
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['empresa', 'data_recebimento', 'id'],
+                condition=models.Q(is_active=True),
+                name='cravulso_emp_data_id_idx',
+            ),
+        ]
+
 # Modelo intermediário para armazenar o valor de cada projeto
 class ProjetoConta(models.Model):
     conta = models.ForeignKey(ContaReceberAvulso, on_delete=models.CASCADE)
     projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE)
     valor = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class Lancamento(models.Model):
+    """
+    Livro único de lançamentos: uma linha por conta (a pagar/receber, normal
+    ou avulsa), mantida pelo save das contas. A conta de origem é
+    (tipo, origem, origem_id); o id próprio não colide entre tabelas.
+    """
+    TIPO_CHOICES = [('pagar', 'A pagar'), ('receber', 'A receber')]
+    ORIGEM_CHOICES = [('normal', 'Conta de contrato'), ('avulso', 'Conta avulsa')]
+
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
+    origem = models.CharField(max_length=10, choices=ORIGEM_CHOICES)
+    origem_id = models.BigIntegerField()
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    contrato = models.ForeignKey(
+        Contrato, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    data = models.DateField()
+    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    status = models.CharField(max_length=20)
+    descricao = models.CharField(max_length=512, blank=True, default='')
+    centro_custo = models.ForeignKey(
+        CentroCusto, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    conta_financeira = models.ForeignKey(
+        ContaFinanceira, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+'
+    )
+    is_active = models.BooleanField(default=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'origem', 'origem_id'], name='lancamento_origem_unica'),
+        ]
+        indexes = [
+            # Listagem consolidada: (data, origem, origem_id) dentro de empresa/tipo
+            models.Index(
+                fields=['empresa', 'tipo', 'data', 'origem', 'origem_id'],
+                condition=models.Q(is_active=True),
+                name='lanc_emp_tipo_data_idx',
+            ),
+            models.Index(fields=['empresa', 'contrato'], name='lanc_emp_contrato_idx'),
+            models.Index(fields=['empresa', 'centro_custo'], name='lanc_emp_ccusto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo}/{self.origem} #{self.origem_id}"
+
+
+class MarcaConciliacao(models.Model):
+    """
+    Até onde a conciliação conta ↔ projeção (contas_pagar/conciliacao.py) já
+    rodou para a empresa; o modo incremental só revisita contratos com
+    lançamentos alterados ou excluídos (ExclusaoLancamento) depois desta marca.
+    """
+    empresa = models.OneToOneField(
+        'empresas.Empresa',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    marca = models.DateTimeField()
+    executado_em = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Conciliação empresa {self.empresa_id} até {self.marca:%Y-%m-%d %H:%M}"
+
+
+class ExclusaoLancamento(models.Model):
+    """
+    Contrato de uma conta excluída (o lançamento some junto): sem esta linha
+    a conciliação incremental não saberia que o contrato mudou. Gravada pelo
+    ledger ao remover lançamentos de conta de contrato; a conciliação apaga
+    as que já ficaram para trás da marca.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    contrato = models.ForeignKey(Contrato, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    excluido_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['empresa', 'excluido_em'], name='exclusao_emp_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"Exclusão contrato {self.contrato_id} em {self.excluido_em:%Y-%m-%d %H:%M}"
+
+
+class ResumoMensal(models.Model):
+    """
+    Totais do mês por empresa para os contadores do dashboard, mantidos por
+    incremento a cada escrita de conta (via livro de lançamentos) ou de
+    projeção — ver contas_pagar/resumo.py. Só contas de contrato entram em
+    pago/recebido, como nos contadores que ele substitui.
+    """
+    empresa = models.ForeignKey(
+        'empresas.Empresa',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+    )
+    ano = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    pago = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    recebido = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    projetado_pagar = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    projetado_receber = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    pendente_pagar = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    pendente_receber = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'ano', 'mes'], name='resumo_mensal_empresa_mes_unico'),
+        ]
+
+    def __str__(self):
+        return f"Resumo {self.empresa_id} {self.ano:04d}-{self.mes:02d}"
+
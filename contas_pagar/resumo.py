@@ -0,0 +1,298 @@
+# contas_pagar/resumo.py
+"""
+Resumo mensal (ResumoMensal) para os contadores do dashboard.
+
+Cada escrita acumula deltas por (empresa, ano, mês) e os aplica com
+UPDATE ... SET coluna = coluna + delta, na mesma transação da escrita:
+
+- contas: ledger.sincronizar_lote / remover_lancamento passam a linha
+  antiga e a nova do livro de lançamentos (contas de contrato ativas
+  contam em pago/recebido);
+- projeções: signals abaixo (save/delete), conciliacao.aplicar (update
+  de `pago` em lote) e substituir_projecoes (Contrato.gerar_projecoes, com
+  os signals por linha desligados) — projetado_* soma todas, pendente_* só
+  as não pagas.
+
+Incremento em vez de recálculo: duas escritas concorrentes no mesmo mês
+somam corretamente sem reler o mês inteiro. A migração 0008 popula o
+resumo no deploy; reconstruir_resumo_mensal recalcula do zero (correção de
+deriva).
+
+Toda escrita que passa por aqui troca também a versão do resumo da empresa
+(versao_resumo), que compõe a chave de cache do dashboard
+(contas_pagar/dashboard.py) — mesmo quando os deltas se anulam, já que o
+dashboard mostra vencimentos e não só totais.
+"""
+import threading
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from contratos.models import Contrato, ProjecaoFaturamento
+from multipla_teste.core.versoes import em_lote, incrementar
+
+from .models import ContaAPagar, ContaAReceber, ResumoMensal
+
+ZERO = Decimal('0.00')
+
+# Tipo do contrato -> (coluna projetado_*, coluna pendente_*). Folha (funcionário)
+# entra no projetado a pagar; pendente_pagar fica só com fornecedor, como o
+# total_faturamento_pagar que ele substitui.
+COLUNAS_PROJECAO = {
+    'fornecedor': ('projetado_pagar', 'pendente_pagar'),
+    'funcionario': ('projetado_pagar', None),
+    'cliente': ('projetado_receber', 'pendente_receber'),
+}
+
+
+class Deltas:
+    """Acumula {(empresa_id, ano, mes): {coluna: delta}} e aplica de uma vez."""
+
+    def __init__(self):
+        self._por_mes = defaultdict(lambda: defaultdict(Decimal))
+        self.empresas = set()
+
+    def somar(self, empresa_id, data, coluna, valor, sinal=1):
+        if empresa_id is not None:
+            self.empresas.add(empresa_id)
+        if empresa_id is None or data is None or not valor:
+            return
+        self._por_mes[(empresa_id, data.year, data.month)][coluna] += sinal * valor
+
+    def conta(self, linha, sinal=1):
+        """`linha`: dict do Lancamento (tipo, origem, empresa_id, data, valor, is_active)."""
+        if linha['origem'] != 'normal' or not linha['is_active']:
+            return
+        coluna = 'pago' if linha['tipo'] == 'pagar' else 'recebido'
+        self.somar(linha['empresa_id'], linha['data'], coluna, linha['valor'], sinal)
+
+    def projecao(self, empresa_id, tipo_contrato, data, valor, pago, sinal=1):
+        if empresa_id is not None:
+            self.empresas.add(empresa_id)
+        if tipo_contrato not in COLUNAS_PROJECAO:
+            return
+        projetado, pendente = COLUNAS_PROJECAO[tipo_contrato]
+        self.somar(empresa_id, data, projetado, valor, sinal)
+        if pendente and not pago:
+            self.somar(empresa_id, data, pendente, valor, sinal)
+
+    def aplicar(self, using=None):
+        alterados = {
+            chave: {coluna: delta for coluna, delta in colunas.items() if delta}
+            for chave, colunas in self._por_mes.items()
+        }
+        alterados = {chave: colunas for chave, colunas in alterados.items() if colunas}
+        manager = ResumoMensal.objects.db_manager(using)
+        if self.empresas:
+            invalidar_versao(self.empresas, manager.db)
+            self.empresas = set()
+        if not alterados:
+            return
+        with transaction.atomic(using=manager.db):
+            manager.bulk_create(
+                [ResumoMensal(empresa_id=empresa_id, ano=ano, mes=mes) for empresa_id, ano, mes in alterados],
+                ignore_conflicts=True,
+            )
+            # Ordem fixa de chaves: escritas concorrentes travam as linhas na mesma ordem
+            for (empresa_id, ano, mes), colunas in sorted(alterados.items()):
+                manager.filter(empresa_id=empresa_id, ano=ano, mes=mes).update(
+                    **{coluna: F(coluna) + delta for coluna, delta in colunas.items()}
+                )
+        self._por_mes.clear()
+
+
+def _chave_versao(empresa_id):
+    return f"resumo_versao:{empresa_id}"
+
+
+def versao_resumo(empresa_id):
+    """Token da versão atual do resumo/vencimentos da empresa; muda a cada escrita."""
+    chave = _chave_versao(empresa_id)
+    versao = cache.get(chave)
+    if versao is None:
+        # Token aleatório, não contador: se a entrada for despejada do cache, nenhuma chave antiga volta a valer
+        cache.add(chave, uuid.uuid4().hex, None)
+        versao = cache.get(chave)
+    return versao
+
+
+def invalidar_versao(empresa_ids, using=None):
+    """Descarta a versão das empresas (também após o commit)."""
+    chaves = [_chave_versao(empresa_id) for empresa_id in empresa_ids]
+    cache.delete_many(chaves)
+    # Uma leitura concorrente pode ter gerado versão nova com os dados de antes do commit
+    transaction.on_commit(lambda: cache.delete_many(chaves), using=using)
+
+
+_lote = threading.local()
+
+
+def projecoes_em_lote():
+    """True enquanto substituir_projecoes grava nesta thread: os signals por linha não fazem nada."""
+    return getattr(_lote, 'profundidade', 0) > 0
+
+
+@contextmanager
+def _signals_por_linha_desligados():
+    _lote.profundidade = getattr(_lote, 'profundidade', 0) + 1
+    try:
+        yield
+    finally:
+        _lote.profundidade -= 1
+
+
+def substituir_projecoes(contrato, projecoes):
+    """
+    Troca as projeções do contrato por `projecoes` (dicts data_vencimento /
+    valor_parcela): um DELETE, um INSERT, um Deltas e um incrementar para o
+    contrato inteiro, em vez de resumo e versão a cada linha.
+    """
+    using = router.db_for_write(ProjecaoFaturamento, instance=contrato)
+    deltas = Deltas()
+    with transaction.atomic(using=using):
+        atuais = ProjecaoFaturamento.objects.using(using).filter(contrato=contrato)
+        for data, valor, pago in atuais.values_list('data_vencimento', 'valor_parcela', 'pago'):
+            deltas.projecao(contrato.empresa_id, contrato.tipo, data, valor, pago, sinal=-1)
+        novas = [ProjecaoFaturamento(contrato=contrato, **projecao) for projecao in projecoes]
+        for projecao in novas:
+            deltas.projecao(contrato.empresa_id, contrato.tipo, projecao.data_vencimento,
+                            projecao.valor_parcela, projecao.pago)
+        with _signals_por_linha_desligados(), em_lote(ProjecaoFaturamento):
+            atuais.delete()
+            ProjecaoFaturamento.objects.using(using).bulk_create(novas)
+        deltas.aplicar(using)
+        incrementar(ProjecaoFaturamento, [contrato.empresa_id], using)
+    return novas
+
+
+def _contrato(instance):
+    """empresa/tipo do contrato da projeção, sem query quando o contrato já está carregado."""
+    if ProjecaoFaturamento.contrato.is_cached(instance):
+        return {'empresa_id': instance.contrato.empresa_id, 'tipo': instance.contrato.tipo}
+    return Contrato.objects.filter(pk=instance.contrato_id).values('empresa_id', 'tipo').first() or {}
+
+
+@receiver(pre_save, sender=ProjecaoFaturamento)
+def _guardar_projecao_anterior(sender, instance, raw=False, **kwargs):
+    instance._resumo_anterior = None
+    if raw or instance.pk is None or projecoes_em_lote():
+        return
+    instance._resumo_anterior = (
+        ProjecaoFaturamento.objects.filter(pk=instance.pk)
+        .values('contrato__empresa_id', 'contrato__tipo', 'data_vencimento', 'valor_parcela', 'pago')
+        .first()
+    )
+
+
+@receiver(post_save, sender=ProjecaoFaturamento)
+def _projecao_salva(sender, instance, raw=False, using=None, **kwargs):
+    if raw or projecoes_em_lote():
+        return
+    deltas = Deltas()
+    anterior = getattr(instance, '_resumo_anterior', None)
+    if anterior:
+        deltas.projecao(
+            anterior['contrato__empresa_id'], anterior['contrato__tipo'],
+            anterior['data_vencimento'], anterior['valor_parcela'], anterior['pago'], sinal=-1,
+        )
+    contrato = _contrato(instance)
+    deltas.projecao(
+        contrato.get('empresa_id'), contrato.get('tipo'),
+        instance.data_vencimento, instance.valor_parcela, instance.pago,
+    )
+    deltas.aplicar(using)
+
+
+@receiver(post_delete, sender=ProjecaoFaturamento)
+def _projecao_removida(sender, instance, using=None, **kwargs):
+    if projecoes_em_lote():
+        return
+    contrato = _contrato(instance)
+    deltas = Deltas()
+    deltas.projecao(
+        contrato.get('empresa_id'), contrato.get('tipo'),
+        instance.data_vencimento, instance.valor_parcela, instance.pago, sinal=-1,
+    )
+    deltas.aplicar(using)
+
+
+def totais(empresa_id, *colunas, ano=None, mes=None):
+    """Soma das `colunas` do resumo da empresa (um mês, um ano ou tudo)."""
+    qs = ResumoMensal.objects.filter(empresa_id=empresa_id)
+    if ano is not None:
+        qs = qs.filter(ano=ano)
+    if mes is not None:
+        qs = qs.filter(mes=mes)
+    somas = qs.aggregate(**{coluna: Sum(coluna) for coluna in colunas})
+    return {coluna: somas[coluna] or ZERO for coluna in colunas}
+
+
+def _decimal(expressao):
+    return Sum(expressao, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def reconstruir(empresa_id, using=None):
+    """
+    Recalcula o resumo da empresa a partir das contas e projeções (no banco
+    `using`, padrão: o do router). Retorna quantos meses gravou.
+    """
+    using = using or router.db_for_write(ResumoMensal)
+    meses = defaultdict(dict)
+
+    for modelo, campo_data, coluna in (
+        (ContaAPagar, 'data_pagamento', 'pago'),
+        (ContaAReceber, 'data_recebimento', 'recebido'),
+    ):
+        linhas = (
+            modelo.objects.using(using).filter(empresa_id=empresa_id, is_active=True)
+            .annotate(ano=ExtractYear(campo_data), mes=ExtractMonth(campo_data))
+            .values('ano', 'mes')
+            .annotate(total=_decimal('valor_total'))
+            .order_by()
+        )
+        for linha in linhas:
+            meses[(linha['ano'], linha['mes'])][coluna] = linha['total']
+
+    linhas = (
+        ProjecaoFaturamento.objects.using(using).filter(contrato__empresa_id=empresa_id)
+        .annotate(ano=ExtractYear('data_vencimento'), mes=ExtractMonth('data_vencimento'))
+        .values('ano', 'mes', 'contrato__tipo')
+        .annotate(
+            projetado=_decimal('valor_parcela'),
+            pendente=_decimal(Case(When(pago=True, then=Value(ZERO)), default=F('valor_parcela'))),
+        )
+        .order_by()
+    )
+    for linha in linhas:
+        if linha['contrato__tipo'] not in COLUNAS_PROJECAO:
+            continue
+        projetado, pendente = COLUNAS_PROJECAO[linha['contrato__tipo']]
+        mes = meses[(linha['ano'], linha['mes'])]
+        mes[projetado] = mes.get(projetado, ZERO) + linha['projetado']
+        if pendente:
+            mes[pendente] = mes.get(pendente, ZERO) + (linha['pendente'] or ZERO)
+
+    with transaction.atomic(using=using):
+        ResumoMensal.objects.using(using).filter(empresa_id=empresa_id).delete()
+        ResumoMensal.objects.using(using).bulk_create(
+            [
+                ResumoMensal(empresa_id=empresa_id, ano=ano, mes=mes, **colunas)
+                for (ano, mes), colunas in sorted(meses.items())
+            ],
+            batch_size=500,
+        )
+    return len(meses)
+
+
+def mes_atual():
+    hoje = date.today()
+    return hoje.year, hoje.month
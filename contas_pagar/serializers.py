@@ -361,6 +361,37 @@ class StatusContaAPagarSerializer(serializers.Serializer):
 class StatusContaAReceberSerializer(serializers.Serializer):
     status = serializers.ChoiceField(choices=ContaAReceber.STATUS_CHOICES)
 
+class ContaLoteItemSerializer(serializers.Serializer):
+    """
+    Um item de POST /contas-pagar/lote/ ou /contas-receber/lote/.
+    Relacionados vêm como ids e são conferidos em lote (contas_pagar/criacao_lote.py),
+    não um a um como no PrimaryKeyRelatedField. context['campo_data'] diz qual data é exigida.
+    """
+    contrato = serializers.IntegerField()
+    forma_pagamento = serializers.IntegerField()
+    data_pagamento = serializers.DateField(required=False)
+    data_recebimento = serializers.DateField(required=False)
+    competencia = serializers.DateField()
+    valor_total = serializers.DecimalField(max_digits=10, decimal_places=2)
+    conta_financeira = serializers.IntegerField(required=False, allow_null=True)
+    centro_custo = serializers.IntegerField(required=False, allow_null=True)
+    status = serializers.CharField(required=False, max_length=20)
+    justificativa_diferenca = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, data):
+        campo_data = self.context['campo_data']
+        if not data.get(campo_data):
+            raise serializers.ValidationError({campo_data: 'Este campo é obrigatório.'})
+        return data
+
+class AtualizacaoStatusItemSerializer(serializers.Serializer):
+    """Um item de POST /contas-consolidadas/atualizar-status-lote/ (status é validado por tabela)."""
+    tipo = serializers.ChoiceField(choices=['pagar', 'receber'])
+    id = serializers.IntegerField(min_value=1)
+    origem = serializers.ChoiceField(choices=['normal', 'avulso'], required=False)
+    status = serializers.CharField(max_length=20)
+    data_confirmacao = serializers.DateField(required=False, allow_null=True)
+
 class ConsolidatedContasSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     contrato = serializers.SerializerMethodField()
@@ -0,0 +1,108 @@
+# contas_pagar/status_lote.py
+"""
+Atualização de status em lote (fechamento do mês), usada por
+ConsolidatedViewSet.atualizar_status_lote.
+
+Número de queries constante, qualquer que seja o tamanho do lote:
+uma leitura por tabela de conta envolvida, um bulk_update por tabela, a
+sincronização do livro de lançamentos e a versão (ETag) por tabela e a
+conciliação dos contratos afetados com as projeções (contas_pagar/conciliacao.py) — tudo
+numa transação.
+"""
+from django.db import router, transaction
+
+from .conciliacao import conciliar
+from .ledger import sincronizar_lote
+from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso
+from multipla_teste.core.versoes import incrementar
+
+MAX_ITENS = 1000
+
+# (tipo, origem) -> (modelo, campo de data)
+MODELOS = {
+    ('pagar', 'normal'): (ContaAPagar, 'data_pagamento'),
+    ('pagar', 'avulso'): (ContaPagarAvulso, 'data_pagamento'),
+    ('receber', 'normal'): (ContaAReceber, 'data_recebimento'),
+    ('receber', 'avulso'): (ContaReceberAvulso, 'data_recebimento'),
+}
+
+
+def marcar_projecoes(contas):
+    """Reconcilia com as projeções os contratos das contas (as avulsas não têm contrato)."""
+    contrato_ids = {getattr(conta, 'contrato_id', None) for conta in contas} - {None}
+    if not contrato_ids:
+        return 0
+    return len(conciliar(contrato_ids=contrato_ids).marcar)
+
+
+def _carregar(itens, empresa_id):
+    """Uma query por tabela: {(tipo, origem): {pk: conta}} com as contas ativas da empresa."""
+    ids = {}
+    for item in itens:
+        origens = [item['origem']] if item.get('origem') else ['normal', 'avulso']
+        for origem in origens:
+            ids.setdefault((item['tipo'], origem), set()).add(item['id'])
+
+    contas = {}
+    for chave, pks in ids.items():
+        modelo, campo_data = MODELOS[chave]
+        qs = modelo.objects.filter(pk__in=pks, empresa_id=empresa_id, is_active=True)
+        if chave[1] == 'normal':
+            qs = qs.only('id', 'status', campo_data, 'contrato_id')
+        else:
+            qs = qs.only('id', 'status', campo_data)
+        contas[chave] = {conta.pk: conta for conta in qs}
+    return contas
+
+
+def atualizar_status_em_lote(itens, empresa_id):
+    """
+    `itens`: dicts validados (tipo, id, origem opcional, status, data_confirmacao opcional).
+    Sem origem vale a mesma regra do detalhe consolidado: conta normal primeiro, depois a avulsa.
+    Retorna um resultado por item, na ordem recebida; itens com erro não impedem os demais.
+    """
+    contas = _carregar(itens, empresa_id)
+
+    resultados, alterados, vistos = [], {}, set()
+    for indice, item in enumerate(itens):
+        resultado = {'indice': indice, 'tipo': item['tipo'], 'id': item['id']}
+        resultados.append(resultado)
+
+        origens = [item['origem']] if item.get('origem') else ['normal', 'avulso']
+        origem = next((o for o in origens if item['id'] in contas[(item['tipo'], o)]), None)
+        if origem is None:
+            resultado['erro'] = 'Conta não encontrada'
+            continue
+        resultado['origem'] = origem
+
+        chave = (item['tipo'], origem)
+        modelo, campo_data = MODELOS[chave]
+        validos = [valor for valor, _ in modelo._meta.get_field('status').choices]
+        if item['status'] not in validos:
+            resultado['erro'] = f'Status inválido. Opções válidas: {validos}'
+            continue
+
+        if (chave, item['id']) in vistos:
+            resultado['erro'] = 'Conta repetida no lote'
+            continue
+        vistos.add((chave, item['id']))
+
+        conta = contas[chave][item['id']]
+        resultado['status_anterior'] = conta.status
+        resultado['status_atual'] = item['status']
+        conta.status = item['status']
+        if item.get('data_confirmacao'):
+            setattr(conta, campo_data, item['data_confirmacao'])
+        alterados.setdefault(chave, []).append(conta)
+
+    if alterados:
+        with transaction.atomic(using=router.db_for_write(ContaAPagar)):
+            for chave, lista in alterados.items():
+                modelo, campo_data = MODELOS[chave]
+                modelo.objects.bulk_update(lista, ['status', campo_data], batch_size=500)
+                # bulk_update não passa pelo save(): o livro de lançamentos é sincronizado aqui
+                sincronizar_lote(modelo, [conta.pk for conta in lista])
+                incrementar(modelo, [empresa_id])
+            marcar_projecoes(alterados.get(('pagar', 'normal'), []) + alterados.get(('receber', 'normal'), []))
+
+    return resultados
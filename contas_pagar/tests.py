@@ -1,8 +1,49 @@
+import csv
+import io
+import json
+from datetime import date
+from importlib import import_module
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
-from contas_pagar.models import ContaAPagar
 from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from rest_framework.utils.encoders import JSONEncoder
+
+from clientes.models import Cliente
+from contas_pagar.conciliacao import ResultadoConciliacao, aplicar, comparar, conciliar_empresa
+from contas_pagar.consolidado import CAMPOS, ConsolidadoPagination, ramos_consolidados, unir
+from contas_pagar.criacao_lote import _mes
+from contas_pagar.dashboard import separar_vencimentos
+from contas_pagar.ledger import backfill, sincronizar_lote, verificar
+from contas_pagar.exportacao import EXPORTACOES, csv_stream, ndjson_stream
+from contas_pagar.models import (
+    ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, ExclusaoLancamento, Lancamento,
+    ResumoMensal,
+)
+from contas_pagar.resumo import Deltas, reconstruir, totais
+from contas_pagar.serializers import ContaAPagarSerializer, ContaReceberAvulsoSerializer
+from contas_pagar.status_lote import atualizar_status_em_lote, marcar_projecoes
+from multipla_teste.core.versoes import calcular_etag, corresponde, incrementar
+from contratos.models import Contrato, ContratoProjeto, ProjecaoFaturamento
+from empresas.models import Empresa
+from fornecedores.models import Fornecedor
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_utils import set_current_tenant
+from pagamentos.models import FormaPagamento
+from projetos.models import Projeto
+from usuarios.models import PerfilUsuario, UsuarioEmpresaRole
 
 class UltimasContasPagasViewTest(APITestCase):
     def setUp(self):
@@ -34,3 +75,728 @@ class UltimasContasPagasViewTest(APITestCase):
         self.assertEqual(response.data[0]['descricao'], ultima_conta.descricao)
         self.assertEqual(response.data[0]['valor'], ultima_conta.valor)
         self.assertEqual(response.data[0]['status'], ultima_conta.status)
+
+
+
+@override_settings(DATABASE_ROUTERS=[])
+class _ContasBase(APITestCase):
+    """
+    Empresa com um contrato de fornecedor e um de cliente e o usuário admin
+    autenticado nela. Sem roteamento por tenant: tudo no banco de teste.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.empresa = Empresa.objects.create(
+            nome="Empresa 1", cnpj="00.000.000/0001-00", endereco_matriz="Rua A", cidade="Cidade",
+            estado="SP", cep="00000-000", telefone="0", email="e1@x.com",
+            status_provisionamento=Empresa.STATUS_PRONTO,
+        )
+        # O middleware registra o alias do tenant em settings.DATABASES; o TestCase não o conhece
+        self.addCleanup(settings.DATABASES.pop, f"tenant_{self.empresa.id}", None)
+        # ...e deixa o tenant da request ativo na thread
+        self.addCleanup(set_current_tenant, None)
+        self.user = User.objects.create_user('ana', password='x')
+        perfil = PerfilUsuario.objects.create(user=self.user, email='ana@x.com', empresa_padrao=self.empresa)
+        perfil.empresas_acessiveis.add(self.empresa)
+        UsuarioEmpresaRole.objects.create(perfil_usuario=perfil, empresa=self.empresa, role='admin')
+
+        dados = dict(endereco="Rua B", cidade="Cidade", estado="SP", telefone="0", empresa=self.empresa)
+        self.fornecedor = Fornecedor.objects.create(nome="Forn", **dados)
+        self.cliente = Cliente.objects.create(nome="Cli", **dados)
+        self.forma = FormaPagamento.objects.create(
+            descricao="pix", tipo=FormaPagamento.TIPO_CHOICES[0][0], empresa=self.empresa,
+        )
+        contrato = dict(descricao="-", data_inicio=date(2024, 1, 1), valor_total=1000, empresa=self.empresa)
+        self.contrato_pagar = Contrato.objects.create(
+            numero="P-1", tipo='fornecedor', fornecedor=self.fornecedor, **contrato,
+        )
+        self.contrato_receber = Contrato.objects.create(
+            numero="R-1", tipo='cliente', cliente=self.cliente, **contrato,
+        )
+
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_COMPANY_ID=str(self.empresa.id))
+
+    def _pagar(self, data, valor=100, **campos):
+        return ContaAPagar.objects.create(
+            contrato=self.contrato_pagar, forma_pagamento=self.forma, data_pagamento=data,
+            competencia=data, valor_total=Decimal(valor), empresa=self.empresa, **campos,
+        )
+
+    def _receber(self, data, valor=100, **campos):
+        return ContaAReceber.objects.create(
+            contrato=self.contrato_receber, forma_pagamento=self.forma, data_recebimento=data,
+            competencia=data, valor_total=Decimal(valor), empresa=self.empresa, **campos,
+        )
+
+    def _pagar_avulsa(self, data, valor=50, **campos):
+        return ContaPagarAvulso.objects.create(
+            descricao="Avulsa", valor=Decimal(valor), data_pagamento=data, competencia=f"{data:%m/%Y}",
+            fornecedor=self.fornecedor, empresa=self.empresa, **campos,
+        )
+
+    def _receber_avulsa(self, data, valor=50, **campos):
+        return ContaReceberAvulso.objects.create(
+            descricao="Avulsa", valor=Decimal(valor), data_recebimento=data, competencia=f"{data:%m/%Y}",
+            cliente=self.cliente, empresa=self.empresa, **campos,
+        )
+
+    def _projecao(self, contrato, data, valor=100, **campos):
+        return ProjecaoFaturamento.objects.create(
+            contrato=contrato, data_vencimento=data, valor_parcela=Decimal(valor), **campos,
+        )
+
+    def _json(self, dados):
+        # Como sairia no corpo da resposta (Decimal e date em texto)
+        return json.loads(json.dumps(dados, cls=JSONEncoder))
+
+    def _corpo(self, resposta):
+        return b''.join(resposta.streaming_content).decode()
+
+
+class ConsolidadoTest(_ContasBase):
+    url = reverse('contas-consolidadas-list')
+
+    def _todas_as_paginas(self, tipo):
+        linhas, url = [], f"{self.url}?tipo={tipo}&page_size=3"
+        while url:
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+            linhas += resposta.data['results']
+            url = resposta.data['next']
+        return linhas
+
+    def test_ramos_com_as_mesmas_colunas_na_mesma_ordem(self):
+        for tipo in ('pagar', 'receber'):
+            normal, avulso = ramos_consolidados(tipo, empresa_id=1, status='pendente')
+            esperado = [f"_{campo}" for campo in CAMPOS]
+            self.assertEqual(list(normal.query.annotation_select), esperado)
+            self.assertEqual(list(avulso.query.annotation_select), esperado)
+
+    def test_cursor_filtra_cada_ramo_antes_do_union(self):
+        paginacao = ConsolidadoPagination()
+        paginacao.ordering = ['-data_vencimento', '-origem', '-id']
+        originais = ramos_consolidados('pagar', 1)
+        filtrados = paginacao.aplicar_cursor(originais, ['2024-05-01', 'normal', 7], False)
+        for original, filtrado in zip(originais, filtrados):
+            self.assertEqual(len(filtrado.query.where.children), len(original.query.where.children) + 1)
+
+    def test_paginas_cobrem_normais_e_avulsas_em_ordem(self):
+        for dia in (1, 2, 2, 3):
+            self._pagar(date(2024, 1, dia))
+            self._pagar_avulsa(date(2024, 1, dia))
+        self._receber(date(2024, 1, 1))
+
+        linhas = self._todas_as_paginas('pagar')
+        chaves = [(linha['data_vencimento'], linha['origem'], linha['id']) for linha in linhas]
+        self.assertEqual(len(set(chaves)), 8)
+        self.assertEqual(chaves, sorted(chaves, reverse=True))
+        self.assertEqual({linha['contrato'] for linha in linhas if linha['origem'] == 'avulso'}, {"Avulso"})
+
+    def test_sem_paginacao_lista_completa_com_detalhes(self):
+        conta = self._pagar(date(2024, 1, 1))
+        avulsa = self._receber_avulsa(date(2024, 1, 2))
+        self._receber(date(2024, 1, 3))
+
+        resposta = self.client.get(self.url, {'tipo': 'pagar'})
+        self.assertEqual(self._json(resposta.data)[0]['detalhes'], self._json(ContaAPagarSerializer(conta).data))
+        resposta = self.client.get(self.url, {'tipo': 'receber'})
+        self.assertEqual([linha['origem'] for linha in resposta.data], ['normal', 'avulso'])
+        self.assertEqual(
+            self._json(resposta.data)[1]['detalhes'],
+            self._json(ContaReceberAvulsoSerializer(avulsa).data),
+        )
+
+    def test_detalhes_em_lote_por_pagina(self):
+        def consultas(quantidade):
+            with CaptureQueriesContext(connection) as contexto:
+                resposta = self.client.get(self.url, {'tipo': 'pagar', 'page_size': quantidade})
+            self.assertEqual(len(resposta.data['results']), quantidade)
+            self.assertTrue(all(linha['detalhes'] for linha in resposta.data['results']))
+            return len(contexto)
+
+        for dia in range(1, 11):
+            self._pagar(date(2024, 1, dia))
+            self._pagar_avulsa(date(2024, 1, dia))
+        consultas(1)  # aquece o contexto de acesso e as versões do ETag
+        self.assertEqual(consultas(4), consultas(20))
+
+    def test_com_ledger_le_um_ramo_sem_union(self):
+        for dia in (1, 2, 3):
+            self._pagar(date(2024, 1, dia))
+            self._pagar_avulsa(date(2024, 1, dia))
+        uniao = self._todas_as_paginas('pagar')
+
+        with override_settings(CONSOLIDATED_USE_LEDGER=True):
+            ramos = ramos_consolidados('pagar', empresa_id=self.empresa.id)
+            self.assertEqual(len(ramos), 1)
+            self.assertEqual(ramos[0].model, Lancamento)
+            self.assertNotIn('UNION', str(unir(ramos, ['-data_vencimento', '-origem', '-id'], 51).query))
+            self.assertEqual(self._todas_as_paginas('pagar'), uniao)
+
+
+class LancamentoTest(_ContasBase):
+    def _lancamento(self, conta, origem='normal'):
+        tipo = 'pagar' if isinstance(conta, (ContaAPagar, ContaPagarAvulso)) else 'receber'
+        return Lancamento.objects.get(tipo=tipo, origem=origem, origem_id=conta.pk)
+
+    def test_save_grava_e_atualiza_um_unico_lancamento(self):
+        conta = self._pagar(date(2024, 1, 5), 100)
+        lancamento = self._lancamento(conta)
+        self.assertEqual(
+            (lancamento.empresa_id, lancamento.contrato_id, lancamento.data, lancamento.valor,
+             lancamento.status, lancamento.descricao, lancamento.is_active),
+            (self.empresa.id, self.contrato_pagar.id, date(2024, 1, 5), Decimal('100.00'),
+             'pendente', "Conta a Pagar - Forn", True),
+        )
+
+        conta.valor_total = Decimal('120')
+        conta.status = 'pago'
+        conta.save()
+        avulsa = self._receber_avulsa(date(2024, 1, 6), 30)
+        self.assertEqual(Lancamento.objects.count(), 2)
+        lancamento = self._lancamento(conta)
+        self.assertEqual((lancamento.valor, lancamento.status), (Decimal('120.00'), 'pago'))
+        self.assertEqual(self._lancamento(avulsa, 'avulso').descricao, "Conta a Receber Avulso - Cli")
+
+    def test_exclusao_remove_o_lancamento(self):
+        conta = self._pagar(date(2024, 1, 5))
+        avulsa = self._pagar_avulsa(date(2024, 1, 5))
+        conta_id = conta.pk
+        conta.delete()
+        self.assertFalse(Lancamento.objects.filter(origem='normal', origem_id=conta_id).exists())
+
+        # delete() da avulsa só inativa; a exclusão de verdade leva o lançamento
+        avulsa.delete()
+        self.assertFalse(self._lancamento(avulsa, 'avulso').is_active)
+        ContaPagarAvulso.objects.filter(pk=avulsa.pk).delete()
+        self.assertFalse(Lancamento.objects.filter(origem='avulso', origem_id=avulsa.pk).exists())
+
+    def test_sincronizar_lote_depois_de_update(self):
+        contas = [self._pagar(date(2024, 1, dia)) for dia in (1, 2)]
+        ContaAPagar.objects.filter(pk__in=[c.pk for c in contas]).update(status='pago')
+        self.assertEqual(sincronizar_lote(ContaAPagar, [c.pk for c in contas] + [99999]), 2)
+        self.assertEqual(set(Lancamento.objects.values_list('status', flat=True)), {'pago'})
+
+    def test_backfill_preenche_o_livro_vazio_em_lotes(self):
+        for dia in range(1, 6):
+            self._pagar(date(2024, 1, dia))
+        Lancamento.objects.all().delete()
+
+        self.assertEqual(list(backfill(ContaAPagar, 'default', lote=2)), [2, 4, 5])
+        self.assertEqual(
+            sorted(Lancamento.objects.values_list('origem_id', flat=True)),
+            sorted(ContaAPagar.objects.values_list('pk', flat=True)),
+        )
+
+    def test_verificar_encontra_e_corrige_divergencias(self):
+        contas = [self._pagar(date(2024, 1, dia)) for dia in range(1, 5)]
+        ContaAPagar.objects.filter(pk__in=[contas[0].pk, contas[1].pk]).update(valor_total=1)
+        Lancamento.objects.filter(origem_id=contas[2].pk).delete()
+        Lancamento.objects.create(
+            tipo='pagar', origem='normal', origem_id=99999, empresa_id=self.empresa.id,
+            data=date(2024, 1, 1), valor=1, status='pendente',
+        )
+
+        encontrado = verificar(ContaAPagar, 'default', lote=3, corrigir=True)
+        self.assertEqual(encontrado, {
+            'faltando': [contas[2].pk], 'divergentes': [contas[0].pk, contas[1].pk], 'orfaos': [99999],
+        })
+        self.assertEqual(verificar(ContaAPagar, 'default', lote=3), {'faltando': [], 'divergentes': [], 'orfaos': []})
+        self.assertEqual(self._lancamento(contas[0]).valor, Decimal('1.00'))
+
+
+class StatusLoteTest(_ContasBase):
+    url = reverse('contas-consolidadas-atualizar-status-lote')
+
+    def test_resultado_por_item_na_ordem_do_lote(self):
+        conta = self._pagar(date(2024, 1, 10))
+        projecao = self._projecao(self.contrato_pagar, date(2024, 2, 10))
+        avulsa = self._pagar_avulsa(date(2024, 1, 10))
+        itens = [
+            {'tipo': 'pagar', 'id': conta.pk, 'status': 'pago', 'data_confirmacao': '2024-02-01'},
+            {'tipo': 'pagar', 'id': 99999, 'status': 'pago'},
+            {'tipo': 'pagar', 'id': avulsa.pk, 'origem': 'avulso', 'status': 'recebido'},
+            {'tipo': 'pagar', 'id': conta.pk, 'origem': 'normal', 'status': 'estornado'},
+            {'tipo': 'xx', 'id': conta.pk, 'status': 'pago'},
+            {'tipo': 'pagar', 'id': avulsa.pk, 'origem': 'avulso', 'status': 'pago'},
+        ]
+        resposta = self.client.post(self.url, {'itens': itens}, format='json')
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertEqual((resposta.data['atualizados'], resposta.data['com_erro']), (2, 4))
+
+        resultados = resposta.data['resultados']
+        self.assertEqual([r['indice'] for r in resultados], list(range(6)))
+        self.assertEqual(
+            (resultados[0]['origem'], resultados[0]['status_anterior'], resultados[0]['status_atual']),
+            ('normal', 'pendente', 'pago'),
+        )
+        self.assertEqual(resultados[1]['erro'], 'Conta não encontrada')
+        self.assertTrue(resultados[2]['erro'].startswith('Status inválido'))
+        self.assertEqual(resultados[3]['erro'], 'Conta repetida no lote')
+        self.assertIn('tipo', resultados[4]['erro'])
+        self.assertEqual(resultados[5]['origem'], 'avulso')
+
+        # A confirmação move a data, o livro acompanha e a projeção do mês é marcada
+        conta.refresh_from_db()
+        self.assertEqual((conta.status, conta.data_pagamento), ('pago', date(2024, 2, 1)))
+        lancamento = Lancamento.objects.get(tipo='pagar', origem='normal', origem_id=conta.pk)
+        self.assertEqual((lancamento.status, lancamento.data), ('pago', date(2024, 2, 1)))
+        projecao.refresh_from_db()
+        self.assertTrue(projecao.pago)
+        avulsa.refresh_from_db()
+        self.assertEqual(avulsa.status, 'pago')
+
+    def test_sem_origem_a_conta_normal_vem_antes_da_avulsa(self):
+        conta = self._receber(date(2024, 1, 10))
+        avulsa = self._receber_avulsa(date(2024, 1, 10), id=conta.pk)
+
+        resultados = atualizar_status_em_lote([
+            {'tipo': 'receber', 'id': conta.pk, 'status': 'recebido'},
+            {'tipo': 'receber', 'id': avulsa.pk, 'origem': 'avulso', 'status': 'estornado'},
+        ], self.empresa.id)
+        self.assertEqual([r['origem'] for r in resultados], ['normal', 'avulso'])
+        conta.refresh_from_db()
+        avulsa.refresh_from_db()
+        self.assertEqual((conta.status, avulsa.status), ('recebido', 'estornado'))
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        contas = [self._pagar(date(2024, 1, 1 + dia % 28)) for dia in range(20)]
+
+        def consultas(quantidade, novo_status):
+            itens = [{'tipo': 'pagar', 'id': c.pk, 'origem': 'normal', 'status': novo_status} for c in contas[:quantidade]]
+            with CaptureQueriesContext(connection) as contexto:
+                self.assertEqual(self.client.post(self.url, {'itens': itens}, format='json').data['atualizados'], quantidade)
+            return len(contexto)
+
+        consultas(1, 'estornado')  # aquece o contexto de acesso
+        self.assertEqual(consultas(5, 'pago'), consultas(20, 'pendente'))
+
+    def test_projecoes_sem_contrato_nao_vao_ao_banco(self):
+        # Avulsas não têm contrato: nada a conciliar
+        contas = [SimpleNamespace(data_pagamento='2024-01-01'), SimpleNamespace(data_pagamento='2024-01-01', contrato_id=None)]
+        with self.assertNumQueries(0):
+            self.assertEqual(marcar_projecoes(contas), 0)
+
+
+class CriacaoLoteTest(_ContasBase):
+    url = reverse('contapagar-criar-lote')
+
+    def setUp(self):
+        super().setUp()
+        for mes in range(1, 6):
+            self._projecao(self.contrato_pagar, date(2025, mes, 10))
+        self._pagar(date(2025, 1, 5))
+
+    def _item(self, mes, valor=100, **campos):
+        return {
+            'contrato': self.contrato_pagar.id, 'forma_pagamento': self.forma.id,
+            'data_pagamento': f"2025-{mes:02d}-10", 'competencia': f"2025-{mes:02d}-01",
+            'valor_total': valor, **campos,
+        }
+
+    def _itens(self):
+        return [
+            self._item(2),
+            self._item(1),                                    # mês já lançado no banco
+            self._item(3),
+            self._item(3),                                    # mês repetido no próprio lote
+            self._item(4, 150),                               # difere da projeção, sem justificativa
+            self._item(5, 150, justificativa_diferenca="Reajuste"),
+            {**self._item(4), 'contrato': self.contrato_receber.id},
+        ]
+
+    def test_intervalo_do_mes_vira_o_ano(self):
+        self.assertEqual(_mes(date(2024, 12, 15)), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(_mes(date(2024, 2, 29)), (date(2024, 2, 1), date(2024, 3, 1)))
+
+    def test_tudo_ou_nada_recusa_o_lote_inteiro(self):
+        resposta = self.client.post(self.url, {'itens': self._itens()}, format='json')
+        self.assertEqual(resposta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual((resposta.data['criados'], resposta.data['com_erro']), (0, 4))
+        self.assertEqual(resposta.data['resultados'][0]['erro'], 'Lote cancelado por erro em outro item')
+        self.assertEqual(ContaAPagar.objects.count(), 1)
+        self.assertEqual(Lancamento.objects.count(), 1)
+
+    def test_melhor_esforco_grava_os_validos(self):
+        resposta = self.client.post(self.url, {'itens': self._itens(), 'modo': 'melhor_esforco'}, format='json')
+        self.assertEqual(resposta.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resposta.data['criados'], 3)
+
+        resultados = resposta.data['resultados']
+        duplicado = ['Já existe um lançamento para este contrato no mesmo mês.']
+        self.assertEqual(resultados[1]['erro'], {'non_field_errors': duplicado})
+        self.assertEqual(resultados[3]['erro'], {'non_field_errors': duplicado})
+        self.assertIn('Justificativa', resultados[4]['erro']['non_field_errors'][0])
+        self.assertIn('contrato', resultados[6]['erro'])
+
+        criados = [resultados[indice]['id'] for indice in (0, 2, 5)]
+        self.assertEqual(ContaAPagar.objects.get(pk=criados[2]).diferenca, Decimal('50.00'))
+        self.assertEqual(ContaAPagar.objects.get(pk=criados[2]).empresa_id, self.empresa.id)
+        # bulk_create não passa pelo save: livro e projeções são acertados pelo lote
+        self.assertEqual(
+            set(Lancamento.objects.filter(origem='normal', origem_id__in=criados).values_list('origem_id', flat=True)),
+            set(criados),
+        )
+        self.assertEqual(
+            sorted(d.month for d in ProjecaoFaturamento.objects.filter(pago=True).values_list('data_vencimento', flat=True)),
+            [1, 2, 3, 5],
+        )
+
+
+class ConciliacaoTest(_ContasBase):
+    def test_casa_contas_e_projecoes_por_contrato_e_mes(self):
+        # (contrato, data, id, pago) e (contrato, data, id), já ordenados como vêm do banco
+        projecoes = [
+            (1, date(2025, 1, 10), 11, False),
+            (1, date(2025, 2, 10), 12, True),
+            (2, date(2025, 1, 10), 21, False),
+            (2, date(2025, 1, 20), 22, False),
+        ]
+        contas = [
+            (1, date(2025, 1, 5), 101),
+            (1, date(2025, 3, 5), 102),
+            (2, date(2025, 1, 5), 201),
+        ]
+        resultado = comparar(iter(projecoes), iter(contas))
+        self.assertEqual(resultado.contratos, 2)
+        self.assertEqual(resultado.marcar, [(1, '2025-01', 11), (2, '2025-01', 21)])
+        self.assertEqual(resultado.desmarcar, [(1, '2025-02', 12)])
+        self.assertEqual(resultado.contas_sem_projecao, [(1, '2025-03', 102)])
+
+    def test_marca_projecoes_com_conta_no_mes(self):
+        janeiro = self._projecao(self.contrato_pagar, date(2025, 1, 10))
+        fevereiro = self._projecao(self.contrato_pagar, date(2025, 2, 10), pago=True)
+        self._projecao(self.contrato_receber, date(2025, 1, 10))
+        # bulk_create não passa pelo save: a projeção fica para a conciliação
+        ContaAPagar.objects.bulk_create([ContaAPagar(
+            contrato=self.contrato_pagar, forma_pagamento=self.forma, data_pagamento=date(2025, 1, 5),
+            competencia=date(2025, 1, 1), valor_total=100, empresa=self.empresa,
+        )])
+
+        resultado = conciliar_empresa(self.empresa.id, desmarcar=True)
+        self.assertEqual((len(resultado.marcar), len(resultado.desmarcar)), (1, 1))
+        janeiro.refresh_from_db()
+        fevereiro.refresh_from_db()
+        self.assertTrue(janeiro.pago)
+        self.assertFalse(fevereiro.pago)
+        self.assertFalse(ProjecaoFaturamento.objects.get(contrato=self.contrato_receber).pago)
+
+    @override_settings(DATABASE_ROUTERS=['multipla_teste.tenant_router.TenantRouter'])
+    def test_aplicar_abre_a_transacao_no_banco_do_tenant(self):
+        projecao = self._projecao(self.contrato_pagar, date(2025, 1, 10))
+        resultado = ResultadoConciliacao()
+        resultado.marcar = [(self.contrato_pagar.id, '2025-01', projecao.id)]
+        # Alias do tenant sobre a conexão de teste: o router manda as projeções para ele
+        alias = f"tenant_{self.empresa.id}"
+        settings.DATABASES[alias] = connections['default'].settings_dict
+        connections[alias] = connections['default']
+        self.addCleanup(connections.__delitem__, alias)
+        set_current_tenant(TenantDescriptor(self.empresa.id, self.empresa.nome, alias))
+
+        with mock.patch('contas_pagar.conciliacao.transaction.atomic', wraps=transaction.atomic) as atomic:
+            self.assertEqual(aplicar(resultado), 1)
+        # Transação no default deixaria o select_for_update do tenant em autocommit
+        self.assertEqual({chamada.kwargs.get('using') for chamada in atomic.call_args_list}, {alias})
+        projecao.refresh_from_db()
+        self.assertTrue(projecao.pago)
+
+    def test_incremental_revisita_contrato_de_conta_excluida(self):
+        projecao = self._projecao(self.contrato_pagar, date(2025, 1, 10))
+        conta = self._pagar(date(2025, 1, 5))
+        conciliar_empresa(self.empresa.id, desmarcar=True)
+        projecao.refresh_from_db()
+        self.assertTrue(projecao.pago)
+
+        # A exclusão leva o lançamento junto; o contrato fica registrado para o incremental
+        conta.delete()
+        self.assertEqual(
+            list(ExclusaoLancamento.objects.values_list('empresa_id', 'contrato_id')),
+            [(self.empresa.id, self.contrato_pagar.id)],
+        )
+        resultado = conciliar_empresa(self.empresa.id, incremental=True, desmarcar=True)
+        self.assertEqual(resultado.desmarcar, [(self.contrato_pagar.id, '2025-01', projecao.id)])
+        projecao.refresh_from_db()
+        self.assertFalse(projecao.pago)
+
+
+class ResumoMensalTest(_ContasBase):
+    def _resumo(self):
+        # Meses zerados pelo incremental continuam na tabela; a reconstrução não os grava
+        linhas = (
+            ResumoMensal.objects.filter(empresa_id=self.empresa.id).order_by('ano', 'mes')
+            .values_list('ano', 'mes', 'pago', 'recebido', 'projetado_pagar', 'projetado_receber',
+                         'pendente_pagar', 'pendente_receber')
+        )
+        return [linha for linha in linhas if any(linha[2:])]
+
+    def test_deltas_que_se_anulam_nao_vao_ao_banco(self):
+        deltas = Deltas()
+        linha = {'tipo': 'pagar', 'origem': 'normal', 'empresa_id': 1,
+                 'data': date(2025, 1, 10), 'valor': Decimal('50.00'), 'is_active': True}
+        # Save sem mudança de valor/data: sai a linha antiga, entra a mesma
+        deltas.conta(linha, sinal=-1)
+        deltas.conta(linha)
+        # Avulsas e contas inativas não entram no resumo
+        deltas.conta({**linha, 'origem': 'avulso'})
+        deltas.conta({**linha, 'is_active': False})
+        # Projeção marcada como paga: só pendente_* muda, e aqui volta atrás
+        deltas.projecao(1, 'cliente', date(2025, 1, 10), Decimal('100.00'), False, sinal=-1)
+        deltas.projecao(1, 'cliente', date(2025, 1, 10), Decimal('100.00'), True)
+        deltas.projecao(1, 'cliente', date(2025, 1, 10), Decimal('100.00'), True, sinal=-1)
+        deltas.projecao(1, 'cliente', date(2025, 1, 10), Decimal('100.00'), False)
+        # Nada a somar no resumo, mas a versão do dashboard muda
+        with mock.patch('contas_pagar.resumo.invalidar_versao') as invalidar, self.assertNumQueries(0):
+            deltas.aplicar()
+        invalidar.assert_called_once_with({1}, 'default')
+
+    def test_incremental_igual_a_reconstrucao(self):
+        conta = self._pagar(date(2025, 1, 5), 50)
+        movida = self._pagar(date(2025, 1, 6), 70)
+        self._pagar(date(2025, 2, 6), 30).delete()
+        inativa = self._receber(date(2025, 1, 7), 80)
+        projecao = self._projecao(self.contrato_receber, date(2025, 1, 10))
+        self._projecao(self.contrato_pagar, date(2025, 3, 10), 7).delete()
+
+        conta.valor_total = Decimal('60')
+        conta.save()
+        movida.data_pagamento = date(2024, 12, 1)
+        movida.save()
+        inativa.is_active = False
+        inativa.save()
+        projecao.valor_parcela = Decimal('130')
+        projecao.pago = True
+        projecao.save()
+
+        incremental = self._resumo()
+        reconstruir(self.empresa.id)
+        self.assertEqual(incremental, self._resumo())
+        self.assertEqual(
+            [(ano, mes, pago) for ano, mes, pago, *_ in incremental],
+            [(2024, 12, Decimal('70.00')), (2025, 1, Decimal('60.00'))],
+        )
+
+    def test_folha_entra_no_projetado_a_pagar_e_fora_dos_pendentes(self):
+        folha = Contrato.objects.create(
+            numero="F-1", tipo='funcionario', descricao="-", data_inicio=date(2024, 1, 1),
+            valor_total=1000, empresa=self.empresa,
+        )
+        self._projecao(folha, date(2025, 1, 10), 300)
+        self._projecao(self.contrato_pagar, date(2025, 1, 10), 100)
+        self._projecao(self.contrato_receber, date(2025, 1, 10), 50)
+
+        colunas = ('projetado_pagar', 'projetado_receber', 'pendente_pagar', 'pendente_receber')
+        esperado = dict(zip(colunas, map(Decimal, ('400', '50', '100', '50'))))
+        self.assertEqual(totais(self.empresa.id, *colunas), esperado)
+        reconstruir(self.empresa.id)
+        self.assertEqual(totais(self.empresa.id, *colunas), esperado)
+
+    def test_migracao_popula_o_resumo_existente(self):
+        self._pagar(date(2025, 1, 5), 50)
+        self._receber(date(2025, 2, 5), 80)
+        self._projecao(self.contrato_pagar, date(2025, 1, 10), pago=True)
+        self._projecao(self.contrato_receber, date(2025, 2, 10))
+        esperado = self._resumo()
+        # Dados anteriores ao resumo: a tabela nasce vazia no deploy
+        ResumoMensal.objects.all().delete()
+
+        migracao = import_module('contas_pagar.migrations.0008_popular_resumomensal')
+        migracao.popular_resumo(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self._resumo(), esperado)
+
+    def test_backfill_depois_do_migrate_nao_soma_de_novo(self):
+        self._pagar(date(2025, 1, 5), 50)
+        self._receber(date(2025, 2, 5), 80)
+        self._pagar_avulsa(date(2025, 1, 6))
+        self._projecao(self.contrato_pagar, date(2025, 1, 10))
+        # Contas anteriores ao livro e ao resumo: o deploy roda o migrate e depois o backfill
+        Lancamento.objects.all().delete()
+        ResumoMensal.objects.all().delete()
+        migracao = import_module('contas_pagar.migrations.0008_popular_resumomensal')
+        migracao.popular_resumo(apps, SimpleNamespace(connection=connection))
+        depois_do_migrate = self._resumo()
+
+        # O backfill em si não aplica deltas: a conta sem lançamento já está no resumo
+        list(backfill(ContaAPagar, 'default'))
+        self.assertEqual(self._resumo(), depois_do_migrate)
+        call_command('backfill_lancamentos', empresa=[self.empresa.id], stdout=io.StringIO())
+        self.assertEqual(Lancamento.objects.count(), 3)
+        self.assertEqual(self._resumo(), depois_do_migrate)
+        call_command('verificar_lancamentos', empresa=[self.empresa.id], corrigir=True, stdout=io.StringIO())
+        self.assertEqual(self._resumo(), depois_do_migrate)
+
+    def test_benchmark_com_manter_acerta_livro_resumo_e_versao(self):
+        etag = calcular_etag(self.empresa.id, [ContaAPagar], '/x/')
+        call_command('benchmark_listagem_contas', empresa=self.empresa.id, linhas=4, contratos=2, projetos=1,
+                     page_size=3, manter=True, stdout=io.StringIO())
+        self.assertEqual(ContaAPagar.objects.count(), 4)
+        self.assertEqual(Lancamento.objects.filter(origem='normal').count(), 8)
+        self.assertNotEqual(calcular_etag(self.empresa.id, [ContaAPagar], '/x/'), etag)
+        incremental = self._resumo()
+        self.assertTrue(incremental)
+        reconstruir(self.empresa.id)
+        self.assertEqual(incremental, self._resumo())
+
+    def test_gerar_projecoes_atualiza_resumo_e_versao_uma_vez(self):
+        contrato = self.contrato_pagar
+        contrato.valor_parcela = Decimal('100')
+        contrato.periodicidade_vencimento = 'mensal'
+        contrato.data_primeiro_vencimento = date(2025, 1, 10)
+        self._projecao(contrato, date(2024, 6, 10), 40, pago=True)
+
+        with CaptureQueriesContext(connection) as consultas, \
+                mock.patch('contas_pagar.resumo.incrementar', wraps=incrementar) as versao:
+            contrato.gerar_projecoes(horizonte_projecao=24)
+        # Um INSERT para as 24 projeções e uma versão nova para o contrato inteiro
+        sqls = [consulta['sql'] for consulta in consultas]
+        self.assertEqual(sum(sql.startswith('INSERT INTO "contratos_projecaofaturamento"') for sql in sqls), 1)
+        versao.assert_called_once_with(ProjecaoFaturamento, [self.empresa.id], 'default')
+        self.assertEqual(ProjecaoFaturamento.objects.filter(contrato=contrato).count(), 24)
+
+        incremental = self._resumo()
+        reconstruir(self.empresa.id)
+        self.assertEqual(incremental, self._resumo())
+        self.assertEqual(len(incremental), 24)
+
+
+class DashboardTest(_ContasBase):
+    def test_vencimentos_do_mes_separados_numa_passada(self):
+        def projecao(dia, tipo):
+            return SimpleNamespace(data_vencimento=date(2025, 3, dia), contrato=SimpleNamespace(tipo=tipo))
+
+        projecoes = [projecao(3, 'cliente'), projecao(5, 'funcionario'), projecao(10, 'fornecedor'),
+                     projecao(12, 'fornecedor'), projecao(20, 'cliente')]
+        proxima, vencimentos, proximos = separar_vencimentos(projecoes, hoje=date(2025, 3, 10))
+        self.assertIs(proxima, projecoes[2])          # a partir de hoje, só fornecedor
+        self.assertEqual(vencimentos, [projecoes[3]])  # de amanhã em diante
+        self.assertEqual(proximos, {'pagar': projecoes[1], 'receber': projecoes[0]})
+
+    def test_cache_ate_uma_conta_mudar(self):
+        url = reverse('dashboard-list')
+        conta = self._pagar(timezone.localdate())
+        primeira = self.client.get(url)
+        self.assertEqual(primeira.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).data['gerado_em'], primeira.data['gerado_em'])
+
+        conta.status = 'pago'
+        conta.save()
+        self.assertNotEqual(self.client.get(url).data['gerado_em'], primeira.data['gerado_em'])
+
+
+class ListagemRapidaTest(_ContasBase):
+    def test_mesmo_json_do_serializer(self):
+        for dia in range(1, 6):
+            self._pagar(date(2024, 1, dia), valor=100 + dia)
+        resposta = self.client.get(reverse('contapagar-list'), {'page_size': 3})
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+
+        contas = ContaAPagar.objects.order_by('-data_pagamento', '-id')[:3]
+        esperado = ContaAPagarSerializer(contas, many=True).data
+        self.assertEqual(self._json(resposta.data)['results'], self._json(esperado))
+        self.assertEqual(list(resposta.data['results'][0]), list(ContaAPagarSerializer.Meta.fields))
+
+    def test_sem_parametros_de_paginacao_devolve_a_lista(self):
+        # Sem conta a pagar avulsa: o ContaPagarAvulsoSerializer não tem get_projetos_info
+        self._pagar(date(2024, 1, 1))
+        self._receber(date(2024, 1, 1))
+        self._receber_avulsa(date(2024, 1, 1))
+        for nome, quantidade in (('contapagar-list', 1), ('contareceber-list', 1),
+                                 ('contapagaravulso-list', 0), ('contareceberavulso-list', 1)):
+            with self.subTest(nome=nome):
+                resposta = self.client.get(reverse(nome))
+                self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+                self.assertIsInstance(resposta.data, list)
+                self.assertEqual(len(resposta.data), quantidade)
+                paginada = self.client.get(reverse(nome), {'page_size': 1})
+                self.assertEqual(set(paginada.data), {'next', 'previous', 'results'})
+
+
+class VersaoTabelaTest(_ContasBase):
+    def test_if_none_match_com_comparacao_fraca(self):
+        self.assertTrue(corresponde('"abc"', '"x", W/"abc"'))
+        self.assertFalse(corresponde('"abc"', '"abcd"'))
+        self.assertFalse(corresponde('"abc"', None))
+
+    def test_tabela_sem_versao_nao_gera_etag(self):
+        # Sem ETag em vez de um ETag que não muda
+        self.assertIsNone(calcular_etag(1, [ContaAPagar, ResumoMensal], '/api/x/'))
+        self.assertIsNone(calcular_etag(1, [], '/api/x/'))
+
+    def test_304_ate_a_tabela_mudar(self):
+        conta = self._pagar(date(2024, 1, 1))
+        url = reverse('contapagar-list')
+        etag = self.client.get(url)['ETag']
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        conta.valor_total = Decimal('99')
+        conta.save()
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_consolidado_muda_quando_o_projeto_do_contrato_muda(self):
+        self._pagar(date(2024, 1, 1))
+        projeto = Projeto.objects.create(
+            nome="Obra", descricao="-", data_inicio=date(2024, 1, 1), empresa=self.empresa,
+        )
+        ContratoProjeto.objects.create(contrato=self.contrato_pagar, projeto=projeto, valor_projeto=100)
+        url = f"{reverse('contas-consolidadas-list')}?tipo=pagar"
+        etag = self.client.get(url)['ETag']
+
+        projeto.nome = "Sede"
+        projeto.save()
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertIn("Sede", json.dumps(self._json(resposta.data)))
+
+    def test_soft_delete_so_na_empresa_atual_e_muda_o_etag(self):
+        outra = Empresa.objects.create(
+            nome="Empresa 2", cnpj="00.000.000/0002-00", endereco_matriz="Rua A", cidade="Cidade",
+            estado="SP", cep="00000-000", telefone="0", email="e2@x.com",
+        )
+        alheio = Cliente.objects.create(
+            nome="Outro", endereco="Rua B", cidade="Cidade", estado="SP", telefone="0", empresa=outra,
+        )
+        url = reverse('cliente-list')
+        etag = self.client.get(url)['ETag']
+
+        resposta = self.client.post(
+            reverse('cliente-soft-delete'), {'ids': [self.cliente.id, alheio.id]}, format='json',
+        )
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertFalse(Cliente.objects.get(pk=self.cliente.pk).is_active)
+        self.assertTrue(Cliente.objects.get(pk=alheio.pk).is_active)
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+
+class ExportacaoTest(_ContasBase):
+    def test_csv_e_ndjson_linha_a_linha(self):
+        exportacao = EXPORTACOES[ContaAPagar]
+        tupla = (1, 'pendente', date(2025, 1, 10), date(2025, 1, 1), Decimal('150.00'), Decimal('0.00'),
+                 3, 'C-1', 'Forn, Ltda', None, 'pix', None, None)
+        csv_linhas = list(csv_stream(exportacao, iter([tupla])))
+        self.assertEqual(csv_linhas[0].split(',')[:3], ['id', 'status', 'data_pagamento'])
+        self.assertEqual(csv_linhas[1], '1,pendente,2025-01-10,2025-01-01,150.00,0.00,3,C-1,"Forn, Ltda",,pix,,\r\n')
+
+        linha, = ndjson_stream(exportacao, iter([tupla]))
+        self.assertTrue(linha.endswith('\n'))
+        self.assertIn('"valor_total": "150.00"', linha)
+        self.assertIn('"data_pagamento": "2025-01-10"', linha)
+
+    def test_exporta_as_contas_da_empresa_com_filtros(self):
+        for dia in (1, 2, 3):
+            self._pagar(date(2024, 1, dia))
+        self._pagar(date(2024, 1, 4), status='pago')
+        url = reverse('contapagar-exportar')
+
+        linhas = list(csv.reader(io.StringIO(self._corpo(self.client.get(url)))))
+        self.assertEqual(len(linhas), 5)
+        self.assertEqual(linhas[0][0], 'id')
+
+        corpo = self._corpo(self.client.get(url, {'formato': 'ndjson', 'status': 'pendente', 'data_inicio': '2024-01-02'}))
+        self.assertEqual([json.loads(linha)['data_pagamento'] for linha in corpo.splitlines()], ['2024-01-02', '2024-01-03'])
+        self.assertEqual(self.client.get(url, {'formato': 'xml'}).status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,10 +1,10 @@
 # contas_pagar/views.py
 from rest_framework import viewsets, status, permissions
-from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso
+from .models import ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, ProjetoConta, ProjetoContaPagar
 from .serializers import (
     ContaAPagarSerializer, ContaAReceberSerializer, StatusContaAPagarSerializer, 
     StatusContaAReceberSerializer, ContaPagarAvulsoSerializer, ContaReceberAvulsoSerializer, 
-    ConsolidatedContasSerializer
+    ConsolidatedContasSerializer, AtualizacaoStatusItemSerializer
 )
 from contratos.serializers import ProjecaoFaturamentoSerializer
 from rest_framework.views import APIView
@@ -15,19 +15,46 @@ from rest_framework.decorators import action
 import pandas as pd
 from dateutil.relativedelta import relativedelta
 from datetime import date, timedelta, datetime
-from contratos.models import Contrato, ProjecaoFaturamento
+from contratos.models import Contrato, ContratoProjeto, ProjecaoFaturamento
+from clientes.models import Cliente
+from fornecedores.models import Fornecedor
+from projetos.models import Projeto
 from itertools import chain
 from django.http import Http404
 from django.utils import timezone
 from django.utils.dateparse import parse_date
-from multipla_teste.core.mixins import CompanyScopedMixin
+from multipla_teste.core.mixins import CompanyScopedMixin, CrossTenantListMixin, ReplicaReadMixin
+from multipla_teste.pagination import KeysetPagination
+from .consolidado import (
+    CHUNK, ORDENACAO, ConsolidadoPagination, com_detalhes, linha_para_saida, origem_no_ledger,
+    ramos_consolidados, saidas_em_blocos, unir, usa_ledger,
+)
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
 from django.db.models import Q
+from .status_lote import MAX_ITENS, atualizar_status_em_lote, marcar_projecoes
+from .criacao_lote import CriacaoEmLoteMixin
+from .listagem import ListagemRapidaMixin
+from .exportacao import ExportacaoMixin
+from .conciliacao import conciliar
+from .resumo import mes_atual, totais
+from .dashboard import dashboard
+import logging
+
+logger = logging.getLogger(__name__)
 
 
-class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
+class ContaAPagarViewSet(CriacaoEmLoteMixin, ExportacaoMixin, CrossTenantListMixin, ListagemRapidaMixin, ReplicaReadMixin, CompanyScopedMixin, viewsets.ModelViewSet):
     queryset = ContaAPagar.objects.filter(is_active=True)
     serializer_class = ContaAPagarSerializer
     permission_classes = [permissions.IsAuthenticated]
+    lote_tipo = 'pagar'
+    listagem_tipo = 'pagar'
+    etag_modelos = (ContaAPagar, Contrato, Fornecedor, Cliente, ContratoProjeto, Projeto)
+    cross_tenant_ordering = '-data_pagamento'
+    cross_tenant_ordering_fields = ('data_pagamento', 'valor_total', 'id')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-data_pagamento', '-id')
 
     def get_queryset(self):
         qs = super().get_queryset()   # já filtrado por empresa
@@ -35,7 +62,7 @@ class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
             qs
             .select_related(
                 'contrato', 'forma_pagamento',
-                'conta_financeira', 'centro_custo', 'contrato__fornecedor'
+                'conta_financeira', 'centro_custo', 'contrato__fornecedor', 'contrato__cliente'
             )
             .prefetch_related(
                 'contrato__contrato_projetos',
@@ -61,7 +88,8 @@ class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def valor_total(self, request):
-        total = self.get_queryset().aggregate(total=Sum('valor_total'))['total']
+        # Contadores do dashboard leem do resumo mensal (contas_pagar/resumo.py)
+        total = totais(self.get_current_company_id(), 'pago')['pago']
         return Response({'valor_total': total})
 
     @action(detail=False, methods=['get'])
@@ -77,16 +105,7 @@ class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
     
     def _marcar_projecao_mes_pago(self, conta):
-        pag_date = conta.data_pagamento
-        projecao = ProjecaoFaturamento.objects.filter(
-            contrato=conta.contrato,
-            pago=False,
-            data_vencimento__year=pag_date.year,
-            data_vencimento__month=pag_date.month
-        ).first()
-        if projecao:
-            projecao.pago = True
-            projecao.save()
+        conciliar(conta.empresa_id, [conta.contrato_id])
 
     def perform_create(self, serializer):
         # chama o CompanyScopedMixin.perform_create → injeta empresa_id
@@ -99,46 +118,26 @@ class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         super().perform_update(serializer)
         self._marcar_projecao_mes_pago(serializer.instance)
 
+    @action(detail=False, methods=['get'], url_path='total-pagas-ano')
+    def total_pagas_ano(self, request):
+        ano_atual, _ = mes_atual()
+        total = totais(self.get_current_company_id(), 'pago', ano=ano_atual)['pago']
+        return Response({'total_pagas_ano': total})
+
     @action(detail=False, methods=['get'], url_path='total-pagas-mes-vencimento')
     def total_pagas_mes_vencimento(self, request):
-        hoje = date.today()
-        mes_atual = hoje.month
-        ano_atual = hoje.year
-
-        total = ContaAPagar.objects.filter(
-            # Filtra pela data de vencimento da projeção (não pela data de pagamento)
-            contrato__projecoes_faturamento__data_vencimento__year=ano_atual,
-            contrato__projecoes_faturamento__data_vencimento__month=mes_atual,
-            
-            # Garante que a projeção foi marcada como paga
-            contrato__projecoes_faturamento__pago=True,
-            
-            # Considera apenas contas ativas
-            is_active=True
-        ).aggregate(
-            total=Coalesce(Sum('valor_total'), Value(0), output_field=DecimalField())
-        )
-
-        return Response({'total_pagas_mes_vencimento': total['total']})
+        # Contas a pagar do mês corrente (a conciliação casa cada uma com a projeção do mesmo mês)
+        ano_atual, mes = mes_atual()
+        total = totais(self.get_current_company_id(), 'pago', ano=ano_atual, mes=mes)['pago']
+        return Response({'total_pagas_mes_vencimento': total})
 
     @action(detail=False, methods=['get'], url_path='total-faturamento-pagar')
     def total_faturamento_pagar(self, request):
-        hoje = date.today()
-        mes_atual = hoje.month
-        ano_atual = hoje.year
-
-        # Filtra projeções NÃO PAGAS com vencimento no mês/ano atual
-        parcelas_nao_pagas = ProjecaoFaturamento.objects.filter(
-            data_vencimento__year=ano_atual,
-            data_vencimento__month=mes_atual,
-            contrato__tipo='fornecedor',
-            pago=False  # <-- Filtro crucial para pegar apenas as pendentes
-        )
-
-        total_pendente = parcelas_nao_pagas.aggregate(
-            total=Coalesce(Sum('valor_parcela'), Value(0), output_field=DecimalField())
-        )['total']
-
+        # Projeções a pagar do mês corrente ainda não pagas
+        ano_atual, mes = mes_atual()
+        total_pendente = totais(
+            self.get_current_company_id(), 'pendente_pagar', ano=ano_atual, mes=mes
+        )['pendente_pagar']
         return Response({'total_faturamento_pagar': total_pendente})
     
     @action(detail=False, methods=['get'], url_path='proximo-vencimento-nao-pago')
@@ -178,9 +177,16 @@ class ContaAPagarViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         instance.save()
 
 
-class ContaAReceberViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
+class ContaAReceberViewSet(CriacaoEmLoteMixin, ExportacaoMixin, CrossTenantListMixin, ListagemRapidaMixin, ReplicaReadMixin, CompanyScopedMixin, viewsets.ModelViewSet):
     serializer_class = ContaAReceberSerializer
     permission_classes = [permissions.IsAuthenticated]
+    lote_tipo = 'receber'
+    listagem_tipo = 'receber'
+    etag_modelos = (ContaAReceber, Contrato, Fornecedor, Cliente, ContratoProjeto, Projeto)
+    cross_tenant_ordering = '-data_recebimento'
+    cross_tenant_ordering_fields = ('data_recebimento', 'valor_total', 'id')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-data_recebimento', '-id')
     queryset = ContaAReceber.objects.all()
     
     def get_queryset(self):
@@ -217,7 +223,7 @@ class ContaAReceberViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def valor_total(self, request):
-        total = ContaAReceber.objects.aggregate(total=Sum('valor_total'))['total']
+        total = totais(self.get_current_company_id(), 'recebido')['recebido']
         return Response({'valor_total': total})
 
     @action(detail=False, methods=['get'])
@@ -233,16 +239,7 @@ class ContaAReceberViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def _marcar_projecao_mes_recebido(self, conta):
-        rec_date = conta.data_recebimento
-        projecao = ProjecaoFaturamento.objects.filter(
-            contrato=conta.contrato,
-            pago=False,
-            data_vencimento__year=rec_date.year,
-            data_vencimento__month=rec_date.month
-        ).first()
-        if projecao:
-            projecao.pago = True
-            projecao.save()
+        conciliar(conta.empresa_id, [conta.contrato_id])
 
     def perform_create(self, serializer):
         super().perform_create(serializer)
@@ -255,49 +252,24 @@ class ContaAReceberViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='total-recebidas-ano')
     def total_recebidas_ano(self, request):
-        ano_atual = date.today().year
-        total_recebidas = ContaAReceber.objects.filter(data_recebimento__year=ano_atual).aggregate(total=Sum('valor_total'))['total']
+        ano_atual, _ = mes_atual()
+        total_recebidas = totais(self.get_current_company_id(), 'recebido', ano=ano_atual)['recebido']
         return Response({'total_recebidas_ano': total_recebidas})        
     
     @action(detail=False, methods=['get'], url_path='total-recebidas-mes-vencimento')
     def total_recebidas_mes_vencimento(self, request):
-        hoje = date.today()
-        mes_atual = hoje.month
-        ano_atual = hoje.year
-
-        total = ContaAReceber.objects.filter(
-            # Filtra pela data de vencimento da projeção (não pela data de recebimento)
-            contrato__projecoes_faturamento__data_vencimento__year=ano_atual,
-            contrato__projecoes_faturamento__data_vencimento__month=mes_atual,
-            
-            # Marca a projeção como quitada (usando o campo 'pago')
-            contrato__projecoes_faturamento__pago=True,
-            
-            # Considera apenas contas ativas
-            is_active=True
-        ).aggregate(
-            total=Coalesce(Sum('valor_total'), Value(0), output_field=DecimalField())
-        )
-
-        return Response({'total_recebidas_mes_vencimento': total['total']})
+        # Contas a receber do mês corrente (a conciliação casa cada uma com a projeção do mesmo mês)
+        ano_atual, mes = mes_atual()
+        total = totais(self.get_current_company_id(), 'recebido', ano=ano_atual, mes=mes)['recebido']
+        return Response({'total_recebidas_mes_vencimento': total})
 
     @action(detail=False, methods=['get'])
     def total_faturamento_receber(self, request):
-        hoje = date.today()
-        mes_atual = hoje.month
-        ano_atual = hoje.year
-
-        parcelas_nao_pagas = ProjecaoFaturamento.objects.filter(
-            data_vencimento__year=ano_atual,
-            data_vencimento__month=mes_atual,
-            contrato__tipo='cliente',
-            pago=False  # <-- Filtro crucial para pegar apenas as pendentes
-        )
-
-        total_pendente = parcelas_nao_pagas.aggregate(
-            total=Coalesce(Sum('valor_parcela'), Value(0), output_field=DecimalField())
-        )['total']
-
+        # Projeções a receber do mês corrente ainda não pagas
+        ano_atual, mes = mes_atual()
+        total_pendente = totais(
+            self.get_current_company_id(), 'pendente_receber', ano=ano_atual, mes=mes
+        )['pendente_receber']
         return Response({'total_faturamento_receber': total_pendente})
 
     def perform_destroy(self, instance):
@@ -325,10 +297,27 @@ class ContaAReceberViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ContaPagarAvulsoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
+class DashboardViewSet(CompanyScopedMixin, viewsets.ViewSet):
+    """
+    GET /api/dashboard/: totais e vencimentos da tela inicial numa chamada
+    (contas_pagar/dashboard.py), em cache por empresa até a próxima escrita.
+    Sem réplica: uma leitura atrasada ficaria em cache sob a versão nova.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        return Response(dashboard(self.get_current_company_id()))
+
+
+class ContaPagarAvulsoViewSet(ExportacaoMixin, CrossTenantListMixin, ReplicaReadMixin, CompanyScopedMixin, viewsets.ModelViewSet):
     queryset = ContaPagarAvulso.objects.filter(is_active=True)
     serializer_class = ContaPagarAvulsoSerializer
+    etag_modelos = (ContaPagarAvulso, ProjetoContaPagar, Projeto)
     permission_classes = [permissions.IsAuthenticated]
+    cross_tenant_ordering = '-data_pagamento'
+    cross_tenant_ordering_fields = ('data_pagamento', 'valor', 'id')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-data_pagamento', '-id')
     
     def get_queryset(self):
         return super().get_queryset().order_by('-data_pagamento')
@@ -349,10 +338,15 @@ class ContaPagarAvulsoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         return Response({"status": "Conta desativada"}, status=status.HTTP_200_OK)
 
 
-class ContaReceberAvulsoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
+class ContaReceberAvulsoViewSet(ExportacaoMixin, CrossTenantListMixin, ReplicaReadMixin, CompanyScopedMixin, viewsets.ModelViewSet):
     queryset = ContaReceberAvulso.objects.filter(is_active=True)
     serializer_class = ContaReceberAvulsoSerializer
+    etag_modelos = (ContaReceberAvulso, ProjetoConta, Projeto)
     permission_classes = [permissions.IsAuthenticated]
+    cross_tenant_ordering = '-data_recebimento'
+    cross_tenant_ordering_fields = ('data_recebimento', 'valor', 'id')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-data_recebimento', '-id')
     
     def get_queryset(self):
         return super().get_queryset().order_by('-data_recebimento')
@@ -376,7 +370,7 @@ class ContaReceberAvulsoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
         )
 
 
-class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
+class ConsolidatedViewSet(ReplicaReadMixin, CompanyScopedMixin, viewsets.GenericViewSet):
     """
     Retorna todas as contas (a pagar / a receber, normais e avulsas)
     já filtradas pelo tenant e pela empresa do usuário.
@@ -384,7 +378,14 @@ class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
     """
     queryset = ContaAPagar.objects.all()
     serializer_class = ConsolidatedContasSerializer
+    # `detalhes` traz os projetos e rateios de cada linha (contrato ou conta avulsa)
+    etag_modelos = (
+        ContaAPagar, ContaAReceber, ContaPagarAvulso, ContaReceberAvulso, Contrato, Fornecedor, Cliente,
+        ContratoProjeto, Projeto, ProjetoContaPagar, ProjetoConta,
+    )
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ConsolidadoPagination
+    keyset_ordering = ORDENACAO
     
     def _get_model_classes_by_type(self, tipo):
         """Retorna as classes de modelo baseado no tipo"""
@@ -393,68 +394,46 @@ class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
         else:  # receber
             return ContaAReceber, ContaReceberAvulso
     
-    def _get_filtered_queryset(self, model_cls, data_field):
-        """Aplica filtros comuns a um modelo específico"""
-        # Filtro base por empresa e ativo
-        queryset = model_cls.objects.filter(
-            empresa_id=self.get_current_company_id(),
-            is_active=True
+    def get_queryset(self):
+        """
+        Ramos (normal e avulso) da listagem consolidada, já filtrados e
+        projetados nas mesmas colunas; o UNION ALL é montado na paginação
+        ou no streaming (ver contas_pagar/consolidado.py).
+        """
+        return ramos_consolidados(
+            self._tipo_listagem(),
+            self.get_current_company_id(),
+            status=self.request.query_params.get('status'),
+            data_inicio=self.request.query_params.get('data_inicio'),
+            data_fim=self.request.query_params.get('data_fim'),
         )
-        
-        # Filtros por parâmetros da requisição
-        status_val = self.request.query_params.get('status')
-        if status_val:
-            queryset = queryset.filter(status=status_val)
-            
-        dt_inicio = self.request.query_params.get('data_inicio')
-        dt_fim = self.request.query_params.get('data_fim')
-        
-        if dt_inicio:
-            queryset = queryset.filter(**{f"{data_field}__gte": dt_inicio})
-        if dt_fim:
-            queryset = queryset.filter(**{f"{data_field}__lte": dt_fim})
-            
-        return queryset
 
-    def get_queryset(self):
-        """Retorna queryset combinado baseado no tipo"""
-        tipo = self.request.query_params.get('tipo', 'receber').lower()
-        
-        if tipo == 'pagar':
-            # Contas a pagar normais e avulsas
-            qs_pagar = self._get_filtered_queryset(ContaAPagar, 'data_pagamento')
-            qs_pagar_avulso = self._get_filtered_queryset(ContaPagarAvulso, 'data_pagamento')
-            
-            # Combina e ordena
-            combined = list(qs_pagar) + list(qs_pagar_avulso)
-            combined.sort(key=lambda o: o.data_pagamento, reverse=True)
-            
-        else:  # receber
-            # Contas a receber normais e avulsas
-            qs_receber = self._get_filtered_queryset(ContaAReceber, 'data_recebimento')
-            qs_receber_avulso = self._get_filtered_queryset(ContaReceberAvulso, 'data_recebimento')
-            
-            # Combina e ordena
-            combined = list(qs_receber) + list(qs_receber_avulso)
-            combined.sort(key=lambda o: o.data_recebimento, reverse=True)
-            
-        return combined
+    def _tipo_listagem(self):
+        return 'pagar' if self.request.query_params.get('tipo', 'receber').lower() == 'pagar' else 'receber'
 
     def _find_object_by_pk_and_type(self, pk, tipo):
         """Busca objeto específico por PK e tipo"""
         pk = int(pk)
         model_main, model_avulso = self._get_model_classes_by_type(tipo)
-        
-        # Busca na tabela principal
-        try:
-            obj = model_main.objects.get(
-                pk=pk,
-                empresa_id=self.get_current_company_id(),
-                is_active=True
-            )
-            return obj
-        except model_main.DoesNotExist:
-            pass
+        # ids se repetem entre as tabelas: ?origem=avulso (campo da listagem) vai direto à avulsa;
+        # sem o parâmetro, o livro de lançamentos diz em qual tabela está
+        origem = self.request.query_params.get('origem')
+        if origem is None and usa_ledger():
+            origem = origem_no_ledger(tipo, self.get_current_company_id(), pk)
+            if origem is None:
+                return None
+        if origem != 'avulso':
+            # Busca na tabela principal
+            try:
+                obj = model_main.objects.get(
+                    pk=pk,
+                    empresa_id=self.get_current_company_id(),
+                    is_active=True
+                )
+                return obj
+            except model_main.DoesNotExist:
+                if origem == 'normal':
+                    return None
         
         # Busca na tabela avulsa
         try:
@@ -481,10 +460,30 @@ class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
         return obj
 
     def list(self, request):
-        """Lista todas as contas consolidadas"""
-        queryset = self.get_queryset()
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data)
+        """
+        Lista as contas consolidadas (cada uma com 'detalhes'). Sem parâmetros
+        de paginação a resposta continua sendo a lista completa; com ?cursor= ou
+        ?page_size= vem paginada por cursor ({next, previous, results}); com
+        ?formato=ndjson, todas em NDJSON.
+        """
+        ramos = self.get_queryset()
+        tipo = self._tipo_listagem()
+        if request.query_params.get('formato') == 'ndjson':
+            return self._stream_ndjson(tipo, ramos)
+        if not self.pagination_class.solicitada(request):
+            return Response(list(saidas_em_blocos(tipo, self._cursor(ramos))))
+        pagina = self.paginate_queryset(ramos)
+        return self.get_paginated_response(com_detalhes(tipo, [linha_para_saida(linha) for linha in pagina]))
+
+    def _cursor(self, ramos):
+        # Cursor no servidor, lido em blocos: a lista completa não passa por modelos
+        return unir(ramos, self.keyset_ordering).iterator(chunk_size=CHUNK)
+
+    def _stream_ndjson(self, tipo, ramos):
+        """Uma conta por linha, lida do banco em blocos, sem montar a lista em memória."""
+        encoder = JSONEncoder(ensure_ascii=False)
+        corpo = (encoder.encode(saida) + "\n" for saida in saidas_em_blocos(tipo, self._cursor(ramos)))
+        return StreamingHttpResponse(corpo, content_type='application/x-ndjson')
 
     def retrieve(self, request, pk=None):
         """Recupera uma conta específica"""
@@ -496,36 +495,21 @@ class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
     def atualizar_status(self, request, pk=None):
         """Atualiza o status de uma conta específica"""
         try:
-            # Debug: log dos dados recebidos
-            print(f"DEBUG - Dados recebidos: {request.data}")
-            print(f"DEBUG - Content-Type: {request.content_type}")
-            print(f"DEBUG - Method: {request.method}")
-            
             conta = self.get_object()
             novo_status = request.data.get('status')
             data_conf = request.data.get('data_confirmacao')
-            
-            # Debug: log da conta encontrada
-            print(f"DEBUG - Conta encontrada: {type(conta).__name__} ID: {conta.pk}")
+            logger.debug("Atualizando status de %s %s para %s", type(conta).__name__, conta.pk, novo_status)
             
             if not novo_status:
-                return Response({
-                    'error': 'Status é obrigatório',
-                    'debug_info': {
-                        'received_data': dict(request.data),
-                        'content_type': request.content_type,
-                        'body_raw': request.body.decode('utf-8') if request.body else 'Empty body'
-                    }
-                }, status=400)
+                return Response({'error': 'Status é obrigatório'}, status=400)
             
             # Valida se o status é válido para o modelo
-            if hasattr(conta, 'STATUS_CHOICES'):
-                valid_statuses = [choice[0] for choice in conta.STATUS_CHOICES]
-                if novo_status not in valid_statuses:
-                    return Response(
-                        {'error': f'Status inválido. Opções válidas: {valid_statuses}'}, 
-                        status=400
-                    )
+            valid_statuses = [choice[0] for choice in conta._meta.get_field('status').choices]
+            if novo_status not in valid_statuses:
+                return Response(
+                    {'error': f'Status inválido. Opções válidas: {valid_statuses}'}, 
+                    status=400
+                )
             
             # Atualiza o status
             old_status = conta.status
@@ -551,33 +535,53 @@ class ConsolidatedViewSet(CompanyScopedMixin, viewsets.GenericViewSet):
                 'tipo_conta': type(conta).__name__
             })
             
+        except Http404:
+            raise
         except Exception as e:
-            import traceback
-            return Response({
-                'error': f'Erro ao atualizar status: {str(e)}',
-                'traceback': traceback.format_exc()
-            }, status=500)
+            logger.exception("Erro ao atualizar status da conta %s", pk)
+            return Response({'error': f'Erro ao atualizar status: {str(e)}'}, status=500)
+
+    @action(detail=False, methods=['post'], url_path='atualizar-status-lote')
+    def atualizar_status_lote(self, request):
+        """
+        Atualiza o status de várias contas de uma vez.
+        Corpo: {"itens": [{"tipo", "id", "origem"?, "status", "data_confirmacao"?}, ...]}
+        Resposta: um resultado por item, na ordem recebida; itens com erro não impedem os demais.
+        """
+        itens = request.data.get('itens') if isinstance(request.data, dict) else request.data
+        if not isinstance(itens, list) or not itens:
+            return Response({'error': 'Envie "itens" com uma lista de contas'}, status=400)
+        if len(itens) > MAX_ITENS:
+            return Response({'error': f'No máximo {MAX_ITENS} itens por chamada'}, status=400)
+
+        resultados = [None] * len(itens)
+        validos = []
+        for indice, dados in enumerate(itens):
+            serializer = AtualizacaoStatusItemSerializer(data=dados)
+            if serializer.is_valid():
+                validos.append((indice, serializer.validated_data))
+            else:
+                resultados[indice] = {'indice': indice, 'erro': serializer.errors}
+
+        aplicados = atualizar_status_em_lote([dados for _, dados in validos], self.get_current_company_id())
+        for (indice, _), resultado in zip(validos, aplicados):
+            resultado['indice'] = indice
+            resultados[indice] = resultado
+
+        com_erro = sum(1 for resultado in resultados if 'erro' in resultado)
+        return Response({
+            'atualizados': len(resultados) - com_erro,
+            'com_erro': com_erro,
+            'resultados': resultados,
+        })
     
     def _atualizar_projecao(self, conta):
         """Atualiza projeção de faturamento se aplicável"""
         try:
-            if hasattr(conta, 'contrato') and conta.contrato:
-                from contratos.models import ProjecaoFaturamento
-                
-                data_vencimento = getattr(conta, 'data_pagamento', None) or getattr(conta, 'data_recebimento', None)
-                
-                if data_vencimento:
-                    proj = ProjecaoFaturamento.objects.filter(
-                        contrato=conta.contrato,
-                        data_vencimento=data_vencimento
-                    ).first()
-                    
-                    if proj:
-                        proj.pago = True
-                        proj.save()
-        except Exception as e:
+            marcar_projecoes([conta])
+        except Exception:
             # Log do erro mas não falha a operação principal
-            print(f"Erro ao atualizar projeção: {str(e)}")
+            logger.exception("Erro ao atualizar projeção da conta %s", conta.pk)
 class RelatorioProjecoesViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def gerar_relatorio(self, request):
@@ -837,7 +841,7 @@ class ContasListView(APIView):
             "contas_receber": receber_serializer.data
         })
 
-class RelatorioOperacionalViewSet(CompanyScopedMixin, viewsets.ViewSet):
+class RelatorioOperacionalViewSet(ReplicaReadMixin, CompanyScopedMixin, viewsets.ViewSet):
     """
     Endpoint único que retorna um relatório operacional financeiro com cinco listas:
       - receber_atrasadas: Projeções de contas a receber vencidas e não pagas
@@ -848,6 +852,7 @@ class RelatorioOperacionalViewSet(CompanyScopedMixin, viewsets.ViewSet):
     Suporta filtros via query params: data_inicio, data_fim, contrato, cliente, fornecedor, projeto
     """
     permission_classes = [permissions.IsAuthenticated]
+    replica_actions = ('gerar_relatorio',)
 
     @action(detail=False, methods=['get'])
     def gerar_relatorio(self, request):
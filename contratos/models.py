@@ -118,12 +118,10 @@ class Contrato(models.Model):
                 data_vencimento += relativedelta(months=intervalo)
 
         if save:
-            self.projecoes_faturamento.all().delete()
-            for projecao in projecoes:
-                ProjecaoFaturamento.objects.create(
-                    contrato=self,
-                    **projecao
-                )
+            # Apaga e recria em lote, com resumo mensal e versão da tabela atualizados uma vez
+            from contas_pagar.resumo import substituir_projecoes
+
+            substituir_projecoes(self, projecoes)
 
         return projecoes
 
@@ -5,9 +5,11 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db import transaction
 from dateutil.relativedelta import relativedelta
-from .models import Contrato, ProjecaoFaturamento
+from .models import Contrato, ContratoProjeto, ProjecaoFaturamento
+from projetos.models import Projeto
 from .serializers import ContratoCreateSerializer, ContratoSerializer, ContratoListSerializer, ProjecaoFaturamentoSerializer
 from multipla_teste.core.mixins import CompanyScopedMixin
+from contas_pagar.exportacao import ExportacaoMixin
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +19,7 @@ class ContratoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
     # necessário para o router, mas não será usado em runtime
     queryset = Contrato.objects.none()  
     serializer_class = ContratoSerializer
+    etag_modelos = (Contrato, ContratoProjeto, Projeto, ProjecaoFaturamento)
     permission_classes = [permissions.IsAuthenticated]
 
     def get_serializer_class(self):
@@ -140,15 +143,17 @@ class ContratoSelectViewSet(CompanyScopedMixin, viewsets.ReadOnlyModelViewSet):
         return super().get_queryset().filter(is_deleted=False).order_by('numero')
 
 
-class ProjecaoFaturamentoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
+class ProjecaoFaturamentoViewSet(ExportacaoMixin, CompanyScopedMixin, viewsets.ModelViewSet):
     serializer_class = ProjecaoFaturamentoSerializer
+    etag_modelos = (ProjecaoFaturamento, Contrato)
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # Primeiro pega o queryset filtrado pelo tenant (CompanyScopedMixin),
-        # depois remove projeções deletadas (se houver is_deleted em Contrato) ou filtra por contrato ativo:
-        return super().get_queryset().select_related('contrato').filter(
-            contrato__is_deleted=False
+        # Projeção não tem empresa_id: o tenant vem do contrato (o filtro do
+        # CompanyScopedMixin não se aplica), e só contam contratos ativos
+        return ProjecaoFaturamento.objects.select_related('contrato').filter(
+            contrato__empresa_id=self.get_current_company_id(),
+            contrato__is_deleted=False,
         )
 
     @action(detail=True, methods=['patch'])
@@ -13,6 +13,15 @@ class EmpresasConfig(AppConfig):
         # Importa o model
         from .models import Empresa
 
+        # Conecta a invalidação do tenant_registry aos sinais de Empresa
+        import multipla_teste.tenant_registry  # noqa: F401
+
+        # Instala o search_path por tenant na conexão default (TENANT_MODE = 'schema')
+        import multipla_teste.tenant_schema  # noqa: F401
+
+        # Provisionamento do banco de novas empresas
+        from . import signals  # noqa: F401
+
         # Configuração padrão de conexão
         default_cfg = settings.DATABASES.get('default', {})
         if not default_cfg:
@@ -0,0 +1,35 @@
+# empresas/management/commands/atualizar_template_tenants.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from empresas.provisioning import atualizar_template, template_db_name
+from multipla_teste.tenant_schema import schema_mode
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria/migra o banco template usado para provisionar novos tenants '
+        '(CREATE DATABASE ... TEMPLATE). Rode a cada deploy, depois do migrate_tenants.'
+    )
+
+    def handle(self, *args, **options):
+        if schema_mode():
+            self.stdout.write(self.style.WARNING(
+                "TENANT_MODE = 'schema': novos tenants são schemas migrados na hora, não há template"
+            ))
+            return
+
+        inicio = time.monotonic()
+        self.stdout.write(self.style.MIGRATE_HEADING(f"=== Atualizando template {template_db_name()} ==="))
+        try:
+            pendentes = atualizar_template(verbosity=options['verbosity'], stdout=self.stdout)
+        except Exception as e:
+            raise CommandError(f"Erro atualizando o template: {e}")
+
+        if pendentes:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {pendentes} migration(s) aplicada(s) em {time.monotonic() - inicio:.2f}s"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("✓ Template já está na última migration"))
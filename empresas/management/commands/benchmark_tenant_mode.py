@@ -0,0 +1,176 @@
+# empresas/management/commands/benchmark_tenant_mode.py
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from multipla_teste.tenant_connections import TenantConnectionManager
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_router import reset_current_tenant, set_current_tenant
+from multipla_teste.tenant_schema import search_path_wrapper, schema_name
+
+APPLICATION_NAME = 'multipla_tenant_bench'
+# IDs altos para não colidir com schemas de empresas reais
+PRIMEIRO_ID = 990000
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara o modo banco-por-tenant com o modo schema-por-tenant: pico de '
+        'conexões no PostgreSQL e latência por request. Cria schemas temporários '
+        'tenant_99xxxx no banco default e os remove ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=100, help='Quantidade de tenants simulados')
+        parser.add_argument('--threads', type=int, default=8, help='Threads simulando workers')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests por thread')
+        parser.add_argument('--linhas', type=int, default=200, help='Linhas por tenant na tabela de teste')
+        parser.add_argument('--modo', choices=['ambos', 'database', 'schema'], default='ambos')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        tenants = [
+            TenantDescriptor(id=PRIMEIRO_ID + n, nome=f"bench {n}", alias=f"tenant_bench_{n}")
+            for n in range(options['tenants'])
+        ]
+        self._criar_schemas(tenants, options['linhas'])
+        try:
+            modos = ['database', 'schema'] if options['modo'] == 'ambos' else [options['modo']]
+            resultados = {modo: self._executar(modo, tenants, options) for modo in modos}
+        finally:
+            self._remover_schemas(tenants)
+        self._relatorio(options, resultados)
+
+    # --- preparação ---
+
+    def _criar_schemas(self, tenants, linhas):
+        with connections['default'].cursor() as cur:
+            for tenant in tenants:
+                schema = schema_name(tenant.id)
+                cur.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+                cur.execute(f'CREATE TABLE IF NOT EXISTS "{schema}".bench_item (id serial PRIMARY KEY, valor numeric)')
+                cur.execute(f'TRUNCATE "{schema}".bench_item')
+                cur.execute(
+                    f'INSERT INTO "{schema}".bench_item (valor) SELECT random() * 1000 FROM generate_series(1, %s)',
+                    [linhas]
+                )
+
+    def _remover_schemas(self, tenants):
+        with connections['default'].cursor() as cur:
+            for tenant in tenants:
+                cur.execute(f'DROP SCHEMA IF EXISTS "{schema_name(tenant.id)}" CASCADE')
+        connections['default'].close()
+
+    def _config(self, search_path=None):
+        cfg = settings.DATABASES['default'].copy()
+        cfg['CONN_MAX_AGE'] = cfg.get('CONN_MAX_AGE', 60) or 60
+        options = dict(cfg.get('OPTIONS', {}), application_name=APPLICATION_NAME)
+        if search_path:
+            options['options'] = f"-c search_path={search_path}"
+        cfg['OPTIONS'] = options
+        return cfg
+
+    # --- execução ---
+
+    def _executar(self, modo, tenants, options):
+        random.seed(options['seed'])
+        if modo == 'database':
+            # Um alias (e portanto uma conexão por thread) por tenant, como no modo atual
+            for tenant in tenants:
+                settings.DATABASES[tenant.alias] = self._config(search_path=schema_name(tenant.id))
+            manager = TenantConnectionManager()
+        else:
+            # Uma única conexão por thread; o search_path segue o tenant atual
+            settings.DATABASES['tenant_bench_shared'] = self._config()
+            manager = None
+
+        latencias = []
+        pico = {'conexoes': 0}
+        parar = threading.Event()
+        lock = threading.Lock()
+        amostrador = threading.Thread(target=self._amostrar_conexoes, args=(parar, pico), daemon=True)
+        amostrador.start()
+
+        def worker():
+            locais = []
+            if modo == 'schema':
+                conn = connections['tenant_bench_shared']
+                conn.execute_wrappers.append(search_path_wrapper)
+            try:
+                for _ in range(options['requests']):
+                    idx = min(int(random.paretovariate(1.2)) - 1, len(tenants) - 1)
+                    tenant = tenants[idx]
+                    inicio = time.perf_counter()
+                    token = set_current_tenant(tenant)
+                    try:
+                        if manager:
+                            manager.close_pending()
+                            manager.acquire(tenant.alias)
+                            conn = connections[tenant.alias]
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT count(*), sum(valor) FROM bench_item")
+                            cur.fetchone()
+                        if manager:
+                            manager.release_thread()
+                    finally:
+                        reset_current_tenant(token)
+                    locais.append(time.perf_counter() - inicio)
+            finally:
+                if manager:
+                    manager.forget_thread()
+                connections.close_all()
+                with lock:
+                    latencias.extend(locais)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        inicio_total = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio_total
+
+        parar.set()
+        amostrador.join()
+        for alias in [t.alias for t in tenants] + ['tenant_bench_shared']:
+            settings.DATABASES.pop(alias, None)
+
+        latencias.sort()
+        return {
+            'pico': pico['conexoes'],
+            'p50': statistics.median(latencias) if latencias else 0,
+            'p95': latencias[int(len(latencias) * 0.95) - 1] if latencias else 0,
+            'throughput': len(latencias) / duracao if duracao else 0,
+        }
+
+    def _amostrar_conexoes(self, parar, pico):
+        try:
+            while not parar.is_set():
+                with connections['default'].cursor() as cur:
+                    cur.execute(
+                        "SELECT count(*) FROM pg_stat_activity WHERE application_name = %s",
+                        [APPLICATION_NAME]
+                    )
+                    pico['conexoes'] = max(pico['conexoes'], cur.fetchone()[0])
+                parar.wait(0.05)
+        finally:
+            connections.close_all()
+
+    def _relatorio(self, options, resultados):
+        self.stdout.write(self.style.MIGRATE_HEADING("=== Benchmark: banco-por-tenant x schema-por-tenant ==="))
+        self.stdout.write(
+            f"Tenants: {options['tenants']}  Threads: {options['threads']}  "
+            f"Requests/thread: {options['requests']}"
+        )
+        for modo, r in resultados.items():
+            self.stdout.write(
+                f"{modo:<9} pico de conexões: {r['pico']:<5} "
+                f"p50: {r['p50'] * 1000:.2f} ms  p95: {r['p95'] * 1000:.2f} ms  "
+                f"throughput: {r['throughput']:.0f} req/s"
+            )
+        self.stdout.write(self.style.SUCCESS("Benchmark concluído"))
@@ -2,6 +2,7 @@
 import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import logging
+import time
 
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
@@ -9,6 +10,10 @@ from django.conf import settings
 from django.db import connections
 
 from empresas.models import Empresa
+from empresas.provisioning import criar_schema_tenant
+from multipla_teste.tenant_schema import schema_mode
+from multipla_teste.tenant_utils import ensure_tenant_db
+from multipla_teste.tenant_migrations import ERRO, escrever_relatorio, migrar_tenants
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +36,17 @@ class Command(BaseCommand):
             action='store_true',
             help='Apenas criar os bancos, sem migrar'
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Quantidade de processos migrando tenants em paralelo'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Roda o migrate mesmo nos tenants sem migrations pendentes'
+        )
 
     def handle(self, *args, **options):
         try:
@@ -75,12 +91,32 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Nenhuma empresa encontrada"))
             return
 
+        inicio = time.monotonic()
+        aliases = []
         for empresa in empresas:
-            self._process_single_tenant(empresa, default_cfg, options)
+            alias = self._process_single_tenant(empresa, default_cfg)
+            if alias:
+                aliases.append(alias)
+
+        # 3) Executar migrações (se não estivermos em modo apenas criação)
+        if options['create_only'] or not aliases:
+            return
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n=== Migrando {len(aliases)} tenant(s) com {options['jobs']} processo(s) ==="
+        ))
+        resultados = migrar_tenants(
+            aliases,
+            jobs=options['jobs'],
+            force=options['force'],
+            on_result=self._reportar_tenant,
+        )
+        escrever_relatorio(self, resultados, time.monotonic() - inicio)
 
-    def _process_single_tenant(self, empresa, default_cfg, options):
+    def _process_single_tenant(self, empresa, default_cfg):
         """
-        Cria e/ou migra o banco de um único tenant (empresa).
+        Cria (se preciso) e registra o banco de um único tenant (empresa).
+        Retorna o alias registrado ou None em caso de erro.
         """
         alias = f"tenant_{empresa.id}"
         dbname = f"multipla_financeiro_tenant_{empresa.id}"
@@ -88,18 +124,29 @@ class Command(BaseCommand):
         self.stdout.write(f"\n--- Processando {empresa.nome} (ID: {empresa.id}) ---")
 
         try:
+            if schema_mode():
+                # Modo schema: schema do tenant no banco default
+                criar_schema_tenant(empresa.id)
+                ensure_tenant_db(empresa)
+                self.stdout.write(f"✓ Schema {alias} pronto")
+                return alias
+
             # 1) Criar o banco se não existir
             self._create_tenant_database(dbname, default_cfg)
 
             # 2) Registrar o alias em settings.DATABASES
             self._register_tenant_database(alias, dbname, default_cfg)
-
-            # 3) Executar migrações (se não estivermos em modo apenas criação)
-            if not options['create_only']:
-                self._migrate_tenant_database(alias)
+            return alias
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"✗ Erro processando tenant {alias}: {e}"))
             logger.exception(f"Erro processando tenant {empresa.nome}")
+            return None
+
+    def _reportar_tenant(self, resultado):
+        if resultado['status'] == ERRO:
+            self.stdout.write(self.style.ERROR(f"✗ Erro migrando {resultado['alias']}: {resultado['erro']}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ {resultado['alias']} {resultado['status']}"))
 
     def _create_tenant_database(self, dbname, default_cfg):
         """
@@ -162,16 +209,3 @@ class Command(BaseCommand):
         # Fecha todas as conexões ativas (incluindo as do tenant, se já existirem),
         # para garantir que novas conexões sejam criadas com as configurações atualizadas.
         connections.close_all()
-
-    def _migrate_tenant_database(self, alias):
-        """
-        Executa as migrations no banco do tenant (alias).
-        Como o TenantRouter já permite migrações em `db.startswith('tenant_')`,
-        basta chamar call_command('migrate', database=alias).
-        """
-        try:
-            self.stdout.write(f"Migrando {alias}...")
-            call_command('migrate', database=alias, interactive=False, verbosity=1)
-            self.stdout.write(self.style.SUCCESS(f"✓ {alias} migrado com sucesso"))
-        except Exception as e:
-            raise Exception(f"Erro migrando {alias}: {e}")
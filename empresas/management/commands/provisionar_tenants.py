@@ -0,0 +1,50 @@
+# empresas/management/commands/provisionar_tenants.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from empresas.models import Empresa
+from empresas.provisioning import provisionar_empresa
+
+
+class Command(BaseCommand):
+    help = (
+        'Provisiona os bancos das empresas pendentes ou com erro '
+        '(ex.: provisionamento interrompido por restart do servidor).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa-id', type=int, help='Provisiona apenas esta empresa')
+        parser.add_argument(
+            '--incluir-em-andamento',
+            action='store_true',
+            help="Também reprocessa empresas paradas em 'provisionando'"
+        )
+
+    def handle(self, *args, **options):
+        status = [Empresa.STATUS_PENDENTE, Empresa.STATUS_ERRO]
+        if options['incluir_em_andamento']:
+            status.append(Empresa.STATUS_PROVISIONANDO)
+
+        empresas = Empresa.objects.order_by('id')
+        if options['empresa_id']:
+            empresas = empresas.filter(id=options['empresa_id'])
+        else:
+            empresas = empresas.filter(status_provisionamento__in=status)
+
+        empresas = list(empresas.values_list('id', 'nome'))
+        if not empresas:
+            self.stdout.write("Nenhuma empresa para provisionar")
+            return
+
+        for empresa_id, nome in empresas:
+            inicio = time.monotonic()
+            provisionar_empresa(empresa_id)
+            empresa = Empresa.objects.get(id=empresa_id)
+            duracao = time.monotonic() - inicio
+            if empresa.status_provisionamento == Empresa.STATUS_PRONTO:
+                self.stdout.write(self.style.SUCCESS(f"✓ {nome} (ID: {empresa_id}) provisionada em {duracao:.2f}s"))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"✗ {nome} (ID: {empresa_id}): {empresa.erro_provisionamento}"
+                ))
@@ -0,0 +1,141 @@
+# empresas/management/commands/simular_pool_tenants.py
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from multipla_teste.tenant_connections import TenantConnectionManager
+
+APPLICATION_NAME = 'multipla_pool_harness'
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula muitos tenants contra o PostgreSQL local para medir o pool de conexões '
+        '(pico de conexões, hits/misses e evictions).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=200, help='Quantidade de tenants simulados')
+        parser.add_argument('--threads', type=int, default=8, help='Threads simulando workers')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests por thread')
+        parser.add_argument('--max-connections', type=int, default=None,
+                            help='Limite do pool (padrão: TENANT_MAX_CONNECTIONS)')
+        parser.add_argument('--sem-limite', action='store_true',
+                            help='Executa sem o pool, para comparar com o comportamento antigo')
+        parser.add_argument('--database', type=str, default=None,
+                            help='Banco usado por todos os aliases simulados (padrão: NAME do default)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        aliases = self._registrar_aliases(options['tenants'], options['database'])
+        manager = None
+        if not options['sem_limite']:
+            manager = TenantConnectionManager(max_connections=options['max_connections'])
+
+        latencias = []
+        pico = {'conexoes': 0}
+        parar = threading.Event()
+        lock = threading.Lock()
+
+        amostrador = threading.Thread(target=self._amostrar_conexoes, args=(parar, pico), daemon=True)
+        amostrador.start()
+
+        def worker():
+            locais = []
+            try:
+                for _ in range(options['requests']):
+                    # Distribuição com cauda longa: poucos tenants concentram o tráfego
+                    idx = min(int(random.paretovariate(1.2)) - 1, len(aliases) - 1)
+                    alias = aliases[idx]
+                    inicio = time.perf_counter()
+                    if manager:
+                        manager.close_pending()
+                        manager.acquire(alias)
+                    with connections[alias].cursor() as cur:
+                        cur.execute('SELECT 1')
+                    if manager:
+                        manager.release_thread()
+                    locais.append(time.perf_counter() - inicio)
+            finally:
+                if manager:
+                    manager.forget_thread()
+                connections.close_all()
+                with lock:
+                    latencias.extend(locais)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        inicio_total = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio_total
+
+        parar.set()
+        amostrador.join()
+        self._remover_aliases(aliases)
+        self._relatorio(options, manager, latencias, pico['conexoes'], duracao)
+
+    def _registrar_aliases(self, quantidade, database):
+        base = settings.DATABASES['default'].copy()
+        base['NAME'] = database or base['NAME']
+        base['CONN_MAX_AGE'] = base.get('CONN_MAX_AGE', 60) or 60
+        base['OPTIONS'] = dict(base.get('OPTIONS', {}), application_name=APPLICATION_NAME)
+
+        aliases = []
+        for n in range(quantidade):
+            alias = f"tenant_sim_{n}"
+            settings.DATABASES[alias] = base.copy()
+            aliases.append(alias)
+        return aliases
+
+    def _remover_aliases(self, aliases):
+        for alias in aliases:
+            settings.DATABASES.pop(alias, None)
+
+    def _amostrar_conexoes(self, parar, pico):
+        """Lê pg_stat_activity periodicamente para registrar o pico de conexões da simulação."""
+        try:
+            while not parar.is_set():
+                with connections['default'].cursor() as cur:
+                    cur.execute(
+                        "SELECT count(*) FROM pg_stat_activity WHERE application_name = %s",
+                        [APPLICATION_NAME]
+                    )
+                    pico['conexoes'] = max(pico['conexoes'], cur.fetchone()[0])
+                parar.wait(0.05)
+        finally:
+            connections.close_all()
+
+    def _relatorio(self, options, manager, latencias, pico, duracao):
+        self.stdout.write(self.style.MIGRATE_HEADING("=== Simulação do pool de tenants ==="))
+        self.stdout.write(
+            f"Tenants: {options['tenants']}  Threads: {options['threads']}  "
+            f"Requests/thread: {options['requests']}"
+        )
+        if manager:
+            stats = manager.stats()
+            total = stats['hits'] + stats['misses']
+            taxa = (stats['hits'] / total * 100) if total else 0
+            self.stdout.write(f"Limite do pool: {stats['max_connections']}")
+            self.stdout.write(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit ratio: {taxa:.1f}%")
+            self.stdout.write(f"Evictions: {stats['evictions']}")
+        else:
+            self.stdout.write(self.style.WARNING("Pool desativado (--sem-limite)"))
+
+        self.stdout.write(f"Pico de conexões no PostgreSQL: {pico}")
+        if latencias:
+            latencias.sort()
+            p95 = latencias[int(len(latencias) * 0.95) - 1]
+            self.stdout.write(
+                f"Latência p50: {statistics.median(latencias) * 1000:.2f} ms  "
+                f"p95: {p95 * 1000:.2f} ms  "
+                f"Throughput: {len(latencias) / duracao:.0f} req/s"
+            )
+        self.stdout.write(self.style.SUCCESS("Simulação concluída"))
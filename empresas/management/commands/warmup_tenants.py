@@ -0,0 +1,63 @@
+# empresas/management/commands/warmup_tenants.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from empresas.models import Empresa
+from multipla_teste.tenant_fanout import OK, TenantFanout
+from multipla_teste.tenant_registry import tenant_registry
+
+
+class Command(BaseCommand):
+    help = (
+        'Carrega o registry de tenants e abre uma conexão por tenant (com uma query '
+        'leve) para aquecer o PostgreSQL antes do tráfego. Também serve de checagem '
+        'de que todos os bancos de tenant estão acessíveis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=None,
+                            help='Tenants aquecidos em paralelo (padrão: TENANT_FANOUT_MAX_WORKERS)')
+        parser.add_argument('--timeout', type=float, default=None,
+                            help='Prazo por tenant em segundos (padrão: TENANT_FANOUT_TIMEOUT)')
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        descriptors = tenant_registry.load_all()
+        prontos = [d for d in descriptors if d.status == Empresa.STATUS_PRONTO]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"=== Aquecendo {len(prontos)} de {len(descriptors)} tenant(s) ==="
+        ))
+
+        def aquecer(tenant):
+            # Abre a conexão e lê o catálogo: valida o acesso e aquece o cache do PostgreSQL
+            with connections[tenant.alias].cursor() as cursor:
+                cursor.execute("SELECT count(*) FROM pg_class WHERE relkind = 'r'")
+            return True
+
+        fanout = TenantFanout(aquecer, empresas=prontos, max_workers=options['jobs'], timeout=options['timeout'])
+        lentos = []
+        for resultado in fanout:
+            if resultado.status == OK:
+                lentos.append((resultado.duracao, resultado.empresa.alias))
+            else:
+                self.stdout.write(self.style.ERROR(
+                    f"✗ {resultado.empresa.alias}: {resultado.error}"
+                ))
+
+        for duracao, alias in sorted(lentos, reverse=True)[:10]:
+            self.stdout.write(f"{alias:<20} {duracao * 1000:.1f} ms")
+
+        resumo = fanout.resumo
+        self.stdout.write(
+            f"\nOK: {resumo.ok}  Erros: {resumo.erros}  Timeouts: {resumo.timeouts}  "
+            f"Não executados: {len(resumo.nao_executados) + len(resumo.interrompidos)}  "
+            f"Tempo total: {time.monotonic() - inicio:.2f}s"
+        )
+        if not getattr(settings, 'TENANT_WARMUP_CONNECTIONS', 0):
+            self.stdout.write(
+                "Dica: TENANT_WARMUP_CONNECTIONS > 0 faz cada worker abrir conexões no boot."
+            )
+        connection.close()
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:37
+
+from django.db import migrations, models
+
+
+def marcar_existentes_como_prontas(apps, schema_editor):
+    # Empresas criadas antes do provisionamento assíncrono já têm banco migrado
+    Empresa = apps.get_model('empresas', 'Empresa')
+    Empresa.objects.using(schema_editor.connection.alias).update(status_provisionamento='pronto')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empresas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresa',
+            name='erro_provisionamento',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='empresa',
+            name='provisionado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='empresa',
+            name='status_provisionamento',
+            field=models.CharField(choices=[('pendente', 'Pendente'), ('provisionando', 'Provisionando'), ('pronto', 'Pronto'), ('erro', 'Erro')], default='pendente', max_length=20),
+        ),
+        migrations.RunPython(marcar_existentes_como_prontas, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,18 @@
 from django.db import models
 
 class Empresa(models.Model):
+    # Provisionamento do banco do tenant (empresas/provisioning.py)
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROVISIONANDO = 'provisionando'
+    STATUS_PRONTO = 'pronto'
+    STATUS_ERRO = 'erro'
+    STATUS_PROVISIONAMENTO_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROVISIONANDO, 'Provisionando'),
+        (STATUS_PRONTO, 'Pronto'),
+        (STATUS_ERRO, 'Erro'),
+    ]
+
     nome = models.CharField("Nome/Razão Social", max_length=255)
     cnpj = models.CharField("CNPJ", max_length=18, unique=True)
     endereco_matriz = models.CharField("Endereço da Matriz", max_length=255)
@@ -10,6 +22,11 @@ class Empresa(models.Model):
     cep = models.CharField(max_length=9)
     telefone = models.CharField(max_length=15)
     email = models.EmailField()
+    status_provisionamento = models.CharField(
+        max_length=20, choices=STATUS_PROVISIONAMENTO_CHOICES, default=STATUS_PENDENTE
+    )
+    erro_provisionamento = models.TextField(blank=True, default='')
+    provisionado_em = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.nome
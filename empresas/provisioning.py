@@ -0,0 +1,191 @@
+# empresas/provisioning.py
+import logging
+import threading
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Empresa
+
+logger = logging.getLogger(__name__)
+
+# Alias usado apenas para manter o banco template migrado
+TEMPLATE_ALIAS = 'tenant_template'
+
+
+def template_db_name():
+    return getattr(settings, 'TENANT_TEMPLATE_DB', 'multipla_tenant_template')
+
+
+def tenant_db_name(empresa_id):
+    return f"multipla_financeiro_tenant_{empresa_id}"
+
+
+def _admin_connection():
+    """Conexão autocommit no banco administrativo (CREATE DATABASE não roda em transação)."""
+    default_cfg = settings.DATABASES['default']
+    conn = psycopg2.connect(
+        dbname=default_cfg.get('ADMIN_DB', 'postgres'),
+        user=default_cfg['USER'],
+        password=default_cfg['PASSWORD'],
+        host=default_cfg['HOST'],
+        port=default_cfg['PORT'],
+    )
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+
+def _banco_existe(cur, dbname):
+    cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (dbname,))
+    return cur.fetchone() is not None
+
+
+def _criar_banco(cur, dbname, template):
+    default_cfg = settings.DATABASES['default']
+    if template == 'template0':
+        cur.execute(
+            f'CREATE DATABASE "{dbname}"'
+            " WITH OWNER %s"
+            " ENCODING 'UTF8'"
+            " LC_COLLATE='pt_BR.utf8'"
+            " LC_CTYPE='pt_BR.utf8'"
+            " TEMPLATE template0;",
+            (default_cfg['USER'],)
+        )
+    else:
+        # Clonar o template copia schema, encoding e collation: não há migrate a rodar
+        cur.execute(
+            f'CREATE DATABASE "{dbname}" WITH OWNER %s TEMPLATE "{template}";',
+            (default_cfg['USER'],)
+        )
+
+
+def _registrar_alias(alias, dbname):
+    cfg = settings.DATABASES['default'].copy()
+    cfg['NAME'] = dbname
+    settings.DATABASES[alias] = cfg
+    return alias
+
+
+def atualizar_template(verbosity=0, stdout=None):
+    """
+    Cria (se preciso) e migra o banco template até a última migration.
+    Ao final nenhuma conexão fica aberta nele, já que o PostgreSQL não
+    clona um template com sessões ativas.
+    Retorna a quantidade de migrations que estavam pendentes.
+    """
+    from multipla_teste.tenant_migrations import PlanoMigracoes
+
+    dbname = template_db_name()
+    conn = _admin_connection()
+    try:
+        with conn.cursor() as cur:
+            if not _banco_existe(cur, dbname):
+                logger.info(f"Criando banco template {dbname}")
+                _criar_banco(cur, dbname, 'template0')
+    finally:
+        conn.close()
+
+    _registrar_alias(TEMPLATE_ALIAS, dbname)
+    try:
+        pendentes = PlanoMigracoes().pendentes(TEMPLATE_ALIAS)
+        if pendentes:
+            call_command('migrate', database=TEMPLATE_ALIAS, interactive=False,
+                         verbosity=verbosity, **({'stdout': stdout} if stdout else {}))
+    finally:
+        connections[TEMPLATE_ALIAS].close()
+    return len(pendentes)
+
+
+def _criar_banco_tenant(empresa_id, dbname):
+    """Modo database: clona o template (ou template0, se ele ainda não existir)."""
+    conn = _admin_connection()
+    try:
+        with conn.cursor() as cur:
+            if _banco_existe(cur, dbname):
+                return
+            template = template_db_name()
+            if not _banco_existe(cur, template):
+                logger.warning(
+                    f"Banco template {template} não existe; criando {dbname} a partir do template0. "
+                    "Rode 'python manage.py atualizar_template_tenants'."
+                )
+                template = 'template0'
+            _criar_banco(cur, dbname, template)
+    finally:
+        conn.close()
+
+
+def criar_schema_tenant(empresa_id):
+    """Modo schema: cria o schema do tenant (e a sua django_migrations) no banco default."""
+    from multipla_teste.tenant_schema import criar_schema
+
+    with connections['default'].cursor() as cursor:
+        criar_schema(cursor, empresa_id)
+
+
+def provisionar_empresa(empresa_id):
+    """
+    Cria o banco do tenant clonando o template e aplica só as migrations que
+    o template ainda não tinha. Sem template, cai no fluxo antigo
+    (template0 + migrate completo). No modo schema cria o schema e migra.
+    Atualiza o status da empresa no caminho.
+    """
+    from multipla_teste.tenant_migrations import PlanoMigracoes
+    from multipla_teste.tenant_registry import tenant_registry
+    from multipla_teste.tenant_schema import schema_mode
+    from multipla_teste.tenant_utils import ensure_tenant_db
+
+    alias = f"tenant_{empresa_id}"
+    dbname = tenant_db_name(empresa_id)
+    Empresa.objects.filter(pk=empresa_id).update(
+        status_provisionamento=Empresa.STATUS_PROVISIONANDO, erro_provisionamento=''
+    )
+    tenant_registry.invalidate(empresa_id)
+
+    try:
+        if schema_mode():
+            criar_schema_tenant(empresa_id)
+        else:
+            _criar_banco_tenant(empresa_id, dbname)
+
+        ensure_tenant_db(Empresa(pk=empresa_id))
+        if PlanoMigracoes().pendentes(alias):
+            call_command('migrate', database=alias, interactive=False, verbosity=0)
+
+        Empresa.objects.filter(pk=empresa_id).update(
+            status_provisionamento=Empresa.STATUS_PRONTO, provisionado_em=timezone.now()
+        )
+        logger.info(f"Tenant {alias} provisionado")
+    except Exception as e:
+        logger.exception(f"Erro provisionando tenant {alias}")
+        Empresa.objects.filter(pk=empresa_id).update(
+            status_provisionamento=Empresa.STATUS_ERRO, erro_provisionamento=str(e)
+        )
+    finally:
+        tenant_registry.invalidate(empresa_id)
+        if alias in connections.databases:
+            connections[alias].close()
+
+
+def agendar_provisionamento(empresa_id):
+    """
+    Dispara o provisionamento numa thread em background depois do commit,
+    para a request que criou a empresa responder na hora. Empresas que
+    ficarem pendentes (ex.: processo reiniciado) são retomadas pelo
+    comando provisionar_tenants.
+    """
+    def executar():
+        try:
+            provisionar_empresa(empresa_id)
+        finally:
+            connections.close_all()
+
+    def iniciar():
+        threading.Thread(target=executar, name=f"provisionar-tenant-{empresa_id}", daemon=True).start()
+
+    transaction.on_commit(iniciar)
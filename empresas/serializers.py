@@ -13,6 +13,7 @@ class EmpresaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Empresa
         fields = '__all__'
+        read_only_fields = ['status_provisionamento', 'erro_provisionamento', 'provisionado_em']
 
 
 class EmpresaListSerializer(serializers.ModelSerializer):
@@ -1,5 +1,7 @@
 #empresas/views.py
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Empresa, Filial
 from .serializers import EmpresaSerializer, FilialSerializer, EmpresaListSerializer, FilialListSerializer
 
@@ -44,6 +46,17 @@ class EmpresaViewSet(viewsets.ModelViewSet):
     serializer_class = EmpresaSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    @action(detail=True, methods=['get'], url_path='provisionamento')
+    def provisionamento(self, request, pk=None):
+        """Status do banco do tenant, para o frontend acompanhar o onboarding."""
+        empresa = self.get_object()
+        return Response({
+            'id': empresa.id,
+            'status': empresa.status_provisionamento,
+            'erro': empresa.erro_provisionamento or None,
+            'provisionado_em': empresa.provisionado_em,
+        })
+
 class FilialViewSet(viewsets.ModelViewSet):
     # Se quiser manter “Filial” para casos internos, só não o exponha mais nos apps cliente/contrato.
     queryset = Filial.objects.all()
@@ -0,0 +1,153 @@
+# exportacoes/fontes.py
+"""
+Fontes de linhas das exportações em segundo plano.
+
+Cada fonte recebe o job e o tenant (chamada dentro do tenant_context dele) e
+devolve uma Fonte: cabeçalhos, total de linhas (para o progresso) e um
+iterável de dicts que também deve ser consumido dentro do tenant_context.
+
+- consolidado: o UNION ALL da listagem consolidada (contas_pagar/consolidado.py)
+  lido em blocos do cursor, com os projetos de cada bloco em uma query por
+  origem (normal: projetos do contrato; avulsa: projetos da conta);
+- relatórios: a própria view do relatório, executada em processo com o
+  usuário do job — mesmos filtros, mesmas regras de acesso. A view já monta a
+  resposta inteira em memória; aqui ela só é achatada em linhas.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from contas_pagar.consolidado import CAMPOS, ORDENACAO, linha_para_saida, ramos_consolidados, unir
+from contas_pagar.models import ProjetoConta, ProjetoContaPagar
+from contas_pagar.views import RelatorioFinanceiroViewSet, RelatorioOperacionalViewSet, RelatorioProjecoesViewSet
+from contratos.models import ContratoProjeto
+from relatorios.views import RelatorioResultadoPorContratoViewSet, RelatorioResultadoPorProjetoViewSet
+
+# Linhas lidas do cursor por vez; também o intervalo de gravação do progresso
+CHUNK = 2000
+
+
+class ErroFonte(Exception):
+    """A fonte não pôde gerar as linhas (ex.: o relatório respondeu 400)."""
+
+
+@dataclass
+class Fonte:
+    cabecalhos: tuple
+    total: int
+    linhas: Iterable[dict]
+
+
+# --- consolidado ---
+
+def _projetos_do_bloco(tipo, saidas):
+    """{(origem, id do contrato ou da conta avulsa): [nomes]} para um bloco de linhas."""
+    contratos = {s['contrato'] for s in saidas if s['origem'] == 'normal'}
+    avulsas = {s['id'] for s in saidas if s['origem'] == 'avulso'}
+    projetos = defaultdict(list)
+    if contratos:
+        for contrato_id, nome in (
+            ContratoProjeto.objects.filter(contrato_id__in=contratos)
+            .values_list('contrato_id', 'projeto__nome').order_by('contrato_id', 'projeto__nome')
+        ):
+            projetos[('normal', contrato_id)].append(nome)
+    if avulsas:
+        modelo = ProjetoContaPagar if tipo == 'pagar' else ProjetoConta
+        for conta_id, nome in (
+            modelo.objects.filter(conta_id__in=avulsas)
+            .values_list('conta_id', 'projeto__nome').order_by('conta_id', 'projeto__nome')
+        ):
+            projetos[('avulso', conta_id)].append(nome)
+    return projetos
+
+
+def _linhas_consolidadas(tipo, ramos):
+    cursor = unir(ramos, ORDENACAO).iterator(chunk_size=CHUNK)
+    while bloco := list(islice(cursor, CHUNK)):
+        saidas = [linha_para_saida(linha) for linha in bloco]
+        projetos = _projetos_do_bloco(tipo, saidas)
+        for saida in saidas:
+            chave = saida['id'] if saida['origem'] == 'avulso' else saida['contrato']
+            saida['projetos'] = '; '.join(projetos.get((saida['origem'], chave), []))
+            yield saida
+
+
+def consolidado(job, tenant):
+    """Mesmos parâmetros de GET /api/contas-consolidadas/ (tipo, status, data_inicio, data_fim)."""
+    parametros = job.parametros
+    tipo = 'pagar' if str(parametros.get('tipo', 'receber')).lower() == 'pagar' else 'receber'
+    ramos = ramos_consolidados(
+        tipo, tenant.id,
+        status=parametros.get('status'),
+        data_inicio=parametros.get('data_inicio'),
+        data_fim=parametros.get('data_fim'),
+    )
+    return Fonte(CAMPOS + ('projetos',), sum(ramo.count() for ramo in ramos), _linhas_consolidadas(tipo, ramos))
+
+
+# --- relatórios ---
+
+def _plano(item, prefixo=''):
+    """Dict aninhado -> colunas 'a.b'; listas de valores viram texto separado por '; '."""
+    if not isinstance(item, dict):
+        return {prefixo.rstrip('.') or 'valor': item}
+    plano = {}
+    for chave, valor in item.items():
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            plano.update(_plano(valor, f"{nome}."))
+        elif isinstance(valor, list):
+            plano[nome] = '; '.join(str(v) for v in valor)
+        else:
+            plano[nome] = valor
+    return plano
+
+
+def achatar(dados):
+    """
+    Resposta de relatório -> linhas planas. Lista: uma linha por item. Dict
+    (ex.: as cinco listas do operacional, ou relatorio + totais): uma linha
+    por item de cada chave, com a chave na coluna 'secao'.
+    """
+    if isinstance(dados, dict):
+        for secao, valor in dados.items():
+            for item in (valor if isinstance(valor, list) else [valor]):
+                yield {'secao': secao, **_plano(item)}
+    else:
+        for item in dados:
+            yield _plano(item)
+
+
+def cabecalhos_de(linhas):
+    """União das chaves na ordem em que aparecem."""
+    return tuple(dict.fromkeys(chave for linha in linhas for chave in linha))
+
+
+def _executar_view(job, tenant, view_class, acao):
+    request = APIRequestFactory().get('/', job.parametros, HTTP_X_COMPANY_ID=str(tenant.id))
+    force_authenticate(request, user=job.usuario)
+    resposta = view_class.as_view({'get': acao})(request)
+    if resposta.status_code != 200:
+        raise ErroFonte(f"Empresa {tenant.id}: relatório respondeu {resposta.status_code}: {resposta.data}")
+    return resposta.data
+
+
+def relatorio(view_class, acao):
+    """Fonte que roda `acao` de `view_class` com a query string do job."""
+    def fonte(job, tenant):
+        linhas = list(achatar(_executar_view(job, tenant, view_class, acao)))
+        return Fonte(cabecalhos_de(linhas), len(linhas), linhas)
+    return fonte
+
+
+FONTES = {
+    'consolidado': consolidado,
+    'relatorio_operacional': relatorio(RelatorioOperacionalViewSet, 'gerar_relatorio'),
+    'relatorio_projecoes': relatorio(RelatorioProjecoesViewSet, 'gerar_relatorio'),
+    'relatorio_financeiro': relatorio(RelatorioFinanceiroViewSet, 'gerar_relatorio'),
+    'resultado_contrato': relatorio(RelatorioResultadoPorContratoViewSet, 'list'),
+    'resultado_projeto': relatorio(RelatorioResultadoPorProjetoViewSet, 'list'),
+}
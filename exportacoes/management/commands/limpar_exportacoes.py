@@ -0,0 +1,17 @@
+# exportacoes/management/commands/limpar_exportacoes.py
+from django.core.management.base import BaseCommand
+
+from exportacoes.processamento import limpar_expiradas
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove os arquivos de exportação vencidos (EXPORTACOES_RETENCAO_HORAS) e '
+        'os parciais de workers interrompidos (pode rodar de hora em hora via cron)'
+    )
+
+    def handle(self, *args, **options):
+        expirados, removidos = limpar_expiradas()
+        self.stdout.write(self.style.SUCCESS(
+            f"{expirados} exportação(ões) expirada(s), {removidos} arquivo(s) removido(s)"
+        ))
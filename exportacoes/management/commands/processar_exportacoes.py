@@ -0,0 +1,50 @@
+# exportacoes/management/commands/processar_exportacoes.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from exportacoes.models import ExportacaoJob
+from exportacoes.processamento import processar, reenfileirar_travados, reivindicar
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker das exportações em segundo plano: processa a fila de ExportacaoJob '
+        '(um job por vez) e grava os arquivos em MEDIA_ROOT/exportacoes. Rode um ou '
+        'mais processos; cada job é pego por um só.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e sai (cron)')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre consultas com a fila vazia')
+        parser.add_argument(
+            '--reprocessar-apos', type=int, default=30,
+            help="Minutos sem progresso para um job em 'processando' voltar à fila (worker interrompido)"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            reenfileirados = reenfileirar_travados(options['reprocessar_apos'])
+            if reenfileirados:
+                self.stdout.write(self.style.WARNING(f"{reenfileirados} job(s) travado(s) de volta à fila"))
+
+            job = reivindicar()
+            if job is None:
+                if options['uma_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.monotonic()
+            job = processar(job)
+            duracao = time.monotonic() - inicio
+            if job.status == ExportacaoJob.STATUS_CONCLUIDO:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ Exportação {job.id} ({job.tipo}): {job.linhas_processadas} linhas em {duracao:.2f}s"
+                ))
+            elif job.status == ExportacaoJob.STATUS_ERRO:
+                self.stdout.write(self.style.ERROR(f"✗ Exportação {job.id} ({job.tipo}): {job.erro}"))
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"Exportação {job.id} ({job.tipo}) voltou à fila durante o processamento; resultado descartado"
+                ))
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('consolidado', 'Contas consolidadas'), ('relatorio_operacional', 'Relatório operacional'), ('relatorio_projecoes', 'Relatório de projeções'), ('relatorio_financeiro', 'Relatório financeiro'), ('resultado_contrato', 'Resultado por contrato'), ('resultado_projeto', 'Resultado por projeto')], max_length=30)),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], default='csv', max_length=10)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('empresas', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro'), ('expirado', 'Expirado')], default='pendente', max_length=20)),
+                ('linhas_processadas', models.PositiveBigIntegerField(default=0)),
+                ('total_linhas', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('arquivo', models.CharField(blank=True, default='', max_length=255)),
+                ('tamanho_bytes', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('expira_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exportacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-criado_em', '-id'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='exportacao_fila_idx'), models.Index(fields=['status', 'expira_em'], name='exportacao_expira_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exportacoes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportacaojob',
+            name='token',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# exportacoes/models.py
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class ExportacaoJob(models.Model):
+    """
+    Exportação processada em segundo plano (manage.py processar_exportacoes).
+    Fica no banco default: uma fila só para todos os tenants, e um job pode
+    cobrir várias empresas.
+    """
+    STATUS_PENDENTE = 'pendente'
+    STATUS_PROCESSANDO = 'processando'
+    STATUS_CONCLUIDO = 'concluido'
+    STATUS_ERRO = 'erro'
+    STATUS_EXPIRADO = 'expirado'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROCESSANDO, 'Processando'),
+        (STATUS_CONCLUIDO, 'Concluído'),
+        (STATUS_ERRO, 'Erro'),
+        (STATUS_EXPIRADO, 'Expirado'),
+    ]
+
+    TIPO_CHOICES = [
+        ('consolidado', 'Contas consolidadas'),
+        ('relatorio_operacional', 'Relatório operacional'),
+        ('relatorio_projecoes', 'Relatório de projeções'),
+        ('relatorio_financeiro', 'Relatório financeiro'),
+        ('resultado_contrato', 'Resultado por contrato'),
+        ('resultado_projeto', 'Resultado por projeto'),
+    ]
+    FORMATO_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exportacoes')
+    tipo = models.CharField(max_length=30, choices=TIPO_CHOICES)
+    formato = models.CharField(max_length=10, choices=FORMATO_CHOICES, default='csv')
+    # Query string do endpoint de origem (filtros do relatório / da listagem)
+    parametros = models.JSONField(default=dict, blank=True)
+    empresas = models.JSONField(default=list)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    linhas_processadas = models.PositiveBigIntegerField(default=0)
+    total_linhas = models.PositiveBigIntegerField(null=True, blank=True)
+    # Caminho relativo ao MEDIA_ROOT
+    arquivo = models.CharField(max_length=255, blank=True, default='')
+    tamanho_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+    erro = models.TextField(blank=True, default='')
+    # Reivindicação do worker atual: progresso e resultado só são gravados com
+    # este token, então um worker cujo job voltou à fila para de escrever
+    token = models.CharField(max_length=32, blank=True, default='')
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    # Também serve de heartbeat: o worker grava o progresso a cada bloco
+    atualizado_em = models.DateTimeField(auto_now=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+    expira_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em', '-id']
+        indexes = [
+            models.Index(fields=['status', 'criado_em'], name='exportacao_fila_idx'),
+            models.Index(fields=['status', 'expira_em'], name='exportacao_expira_idx'),
+        ]
+
+    @property
+    def percentual(self):
+        if self.status == self.STATUS_CONCLUIDO:
+            return 100
+        if not self.total_linhas:
+            return 0
+        return min(99, int(self.linhas_processadas * 100 / self.total_linhas))
+
+    def __str__(self):
+        return f"Exportação {self.pk} ({self.tipo}, {self.status})"
@@ -0,0 +1,226 @@
+# exportacoes/processamento.py
+"""
+Execução dos jobs de exportação (ExportacaoJob).
+
+- reivindicar(): pega o job pendente mais antigo com UPDATE condicional no
+  status e grava um token novo; progresso e resultado só são gravados com
+  esse token, então dois workers nunca processam o mesmo job — nem quando
+  um job travado volta à fila e o worker antigo ainda está vivo;
+- processar(job): monta as fontes de cada empresa (exportacoes/fontes.py) e
+  escreve o arquivo em MEDIA_ROOT/exportacoes/AAAA/MM/ bloco a bloco,
+  gravando o progresso a cada CHUNK linhas. O arquivo é escrito em
+  '<nome>.parcial' e só é renomeado ao concluir: download nunca vê arquivo
+  pela metade;
+- reenfileirar_travados(): jobs em 'processando' sem progresso há muito tempo
+  (worker morto ou lento) voltam para a fila, sem token;
+- limpar_expiradas(): remove os arquivos vencidos e marca os jobs como expirados.
+"""
+import csv
+import logging
+import os
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from empresas.models import Empresa
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import tenant_context
+
+from .fontes import CHUNK, FONTES, ErroFonte
+from .models import ExportacaoJob
+
+logger = logging.getLogger(__name__)
+
+PASTA = 'exportacoes'
+SUFIXO_PARCIAL = '.parcial'
+
+
+def retencao():
+    return timedelta(hours=getattr(settings, 'EXPORTACOES_RETENCAO_HORAS', 24))
+
+
+def caminho_absoluto(relativo):
+    return os.path.join(settings.MEDIA_ROOT, relativo)
+
+
+def reivindicar():
+    """Próximo job pendente, já marcado como 'processando'; None se a fila está vazia."""
+    candidatos = (
+        ExportacaoJob.objects.filter(status=ExportacaoJob.STATUS_PENDENTE)
+        .order_by('criado_em', 'id').values_list('id', flat=True)[:10]
+    )
+    for job_id in candidatos:
+        agora = timezone.now()
+        marcados = ExportacaoJob.objects.filter(id=job_id, status=ExportacaoJob.STATUS_PENDENTE).update(
+            status=ExportacaoJob.STATUS_PROCESSANDO, token=uuid.uuid4().hex, iniciado_em=agora,
+            atualizado_em=agora, linhas_processadas=0, total_linhas=None, erro='',
+        )
+        if marcados:
+            return ExportacaoJob.objects.select_related('usuario').get(id=job_id)
+    return None
+
+
+def reenfileirar_travados(minutos):
+    """Devolve à fila os jobs em 'processando' sem progresso há `minutos`. Retorna quantos."""
+    limite = timezone.now() - timedelta(minutes=minutos)
+    return ExportacaoJob.objects.filter(
+        status=ExportacaoJob.STATUS_PROCESSANDO, atualizado_em__lt=limite,
+    ).update(status=ExportacaoJob.STATUS_PENDENTE, token='', atualizado_em=timezone.now())
+
+
+def _tenants(job):
+    tenant_registry.refresh_if_changed()
+    tenants = []
+    for empresa_id in job.empresas:
+        tenant = tenant_registry.get(empresa_id)
+        if tenant is None or tenant.status != Empresa.STATUS_PRONTO:
+            raise ErroFonte(f"Empresa {empresa_id} não encontrada ou com banco indisponível")
+        tenants.append(tenant)
+    return tenants
+
+
+class ReivindicacaoPerdida(Exception):
+    """O job voltou à fila (e talvez já esteja com outro worker): este para sem gravar nada."""
+
+
+def _do_worker(job):
+    """O job, enquanto ainda estiver 'processando' com o token deste worker."""
+    return ExportacaoJob.objects.filter(id=job.id, token=job.token, status=ExportacaoJob.STATUS_PROCESSANDO)
+
+
+def _progresso(job, **campos):
+    """Grava `campos` e o heartbeat (atualizado_em); ReivindicacaoPerdida se o job não é mais deste worker."""
+    if not _do_worker(job).update(atualizado_em=timezone.now(), **campos):
+        raise ReivindicacaoPerdida(f"Exportação {job.id} foi reivindicada por outro worker")
+
+
+class _Escritor:
+    """Uma linha (dict) por vez no arquivo aberto, em CSV ou NDJSON."""
+
+    def __init__(self, arquivo, formato, cabecalhos):
+        self.cabecalhos = cabecalhos
+        self.arquivo = arquivo
+        if formato == 'csv':
+            self._csv = csv.writer(arquivo)
+            self._csv.writerow(cabecalhos)
+        else:
+            self._csv = None
+            self._json = JSONEncoder(ensure_ascii=False)
+
+    def escrever(self, linha):
+        if self._csv is not None:
+            self._csv.writerow([linha.get(cabecalho) for cabecalho in self.cabecalhos])
+        else:
+            # Decimal como texto, igual à API
+            saida = {c: str(v) if isinstance(v, Decimal) else v for c, v in linha.items()}
+            self.arquivo.write(self._json.encode(saida) + "\n")
+
+
+def _gerar_arquivo(job, tenants, relativo):
+    """Escreve o arquivo do job; retorna o número de linhas."""
+    # Relatórios já vêm em memória da view; o consolidado só conta aqui e lê no laço abaixo
+    fontes = []
+    for tenant in tenants:
+        with tenant_context(tenant):
+            fontes.append((tenant, FONTES[job.tipo](job, tenant)))
+        # Um relatório grande pode levar minutos: heartbeat a cada empresa, antes do primeiro bloco
+        _progresso(job)
+    varias = len(tenants) > 1
+    cabecalhos = tuple(dict.fromkeys(c for _, fonte in fontes for c in fonte.cabecalhos))
+    if varias:
+        cabecalhos = ('empresa_id',) + cabecalhos
+    _progresso(job, total_linhas=sum(fonte.total for _, fonte in fontes))
+
+    parcial = caminho_absoluto(relativo) + SUFIXO_PARCIAL
+    os.makedirs(os.path.dirname(parcial), exist_ok=True)
+    linhas = 0
+    try:
+        with open(parcial, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = _Escritor(arquivo, job.formato, cabecalhos)
+            for tenant, fonte in fontes:
+                with tenant_context(tenant):
+                    for linha in fonte.linhas:
+                        escritor.escrever({'empresa_id': tenant.id, **linha} if varias else linha)
+                        linhas += 1
+                        if linhas % CHUNK == 0:
+                            arquivo.flush()
+                            _progresso(job, linhas_processadas=linhas)
+        os.replace(parcial, caminho_absoluto(relativo))
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    return linhas
+
+
+def processar(job):
+    """Gera o arquivo de um job já reivindicado e grava o resultado (concluído ou erro)."""
+    agora = timezone.now()
+    relativo = os.path.join(PASTA, f"{agora:%Y}", f"{agora:%m}", f"{uuid.uuid4().hex}.{job.formato}")
+    try:
+        linhas = _gerar_arquivo(job, _tenants(job), relativo)
+    except ReivindicacaoPerdida as exc:
+        # O outro worker grava o resultado; o .parcial deste já foi removido
+        logger.warning("%s; resultado descartado", exc)
+    except Exception as exc:
+        if isinstance(exc, ErroFonte):
+            # Parâmetro inválido, empresa indisponível: vai para job.erro, sem traceback
+            logger.warning("Exportação %s falhou: %s", job.id, exc)
+        else:
+            logger.exception("Exportação %s falhou", job.id)
+        _do_worker(job).update(
+            status=ExportacaoJob.STATUS_ERRO, erro=str(exc)[:2000],
+            concluido_em=timezone.now(), atualizado_em=timezone.now(),
+        )
+    else:
+        concluido = timezone.now()
+        gravado = _do_worker(job).update(
+            status=ExportacaoJob.STATUS_CONCLUIDO, arquivo=relativo,
+            linhas_processadas=linhas, total_linhas=linhas,
+            tamanho_bytes=os.path.getsize(caminho_absoluto(relativo)),
+            concluido_em=concluido, expira_em=concluido + retencao(), atualizado_em=concluido,
+        )
+        if not gravado:
+            # Perdeu o job no último bloco: o arquivo não fica referenciado por ninguém
+            logger.warning("Exportação %s foi reivindicada por outro worker; resultado descartado", job.id)
+            _remover(relativo)
+    job.refresh_from_db()
+    return job
+
+
+def _remover(relativo):
+    try:
+        os.remove(caminho_absoluto(relativo))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def limpar_expiradas(agora=None):
+    """
+    Remove os arquivos vencidos e marca os jobs como 'expirado'; apaga também
+    os '.parcial' antigos deixados por worker interrompido.
+    Retorna (jobs expirados, arquivos removidos).
+    """
+    agora = agora or timezone.now()
+    vencidos = list(
+        ExportacaoJob.objects.filter(status=ExportacaoJob.STATUS_CONCLUIDO, expira_em__lte=agora)
+        .values_list('id', 'arquivo')
+    )
+    removidos = sum(_remover(relativo) for _, relativo in vencidos if relativo)
+    ExportacaoJob.objects.filter(id__in=[job_id for job_id, _ in vencidos]).update(
+        status=ExportacaoJob.STATUS_EXPIRADO, arquivo='', atualizado_em=agora,
+    )
+
+    limite = (agora - retencao()).timestamp()
+    for raiz, _, arquivos in os.walk(caminho_absoluto(PASTA)):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            if nome.endswith(SUFIXO_PARCIAL) and os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+                removidos += 1
+    return len(vencidos), removidos
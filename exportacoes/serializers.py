@@ -0,0 +1,48 @@
+# exportacoes/serializers.py
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from .models import ExportacaoJob
+
+
+class ExportacaoJobSerializer(serializers.ModelSerializer):
+    empresas = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False,
+        help_text="Padrão: a empresa do X-Company-Id",
+    )
+    percentual = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportacaoJob
+        fields = [
+            'id', 'tipo', 'formato', 'parametros', 'empresas', 'status', 'linhas_processadas',
+            'total_linhas', 'percentual', 'tamanho_bytes', 'erro', 'criado_em', 'iniciado_em',
+            'concluido_em', 'expira_em', 'download_url',
+        ]
+        read_only_fields = [
+            'status', 'linhas_processadas', 'total_linhas', 'tamanho_bytes', 'erro', 'criado_em',
+            'iniciado_em', 'concluido_em', 'expira_em',
+        ]
+
+    def validate_parametros(self, parametros):
+        # Vira a query string do endpoint de origem: só valores simples
+        if not isinstance(parametros, dict):
+            raise serializers.ValidationError("Informe um objeto com os filtros do endpoint.")
+        for chave, valor in parametros.items():
+            if isinstance(valor, (dict, list)):
+                raise serializers.ValidationError(f"'{chave}': use um valor simples.")
+        return {chave: str(valor) for chave, valor in parametros.items() if valor is not None}
+
+    def get_download_url(self, obj):
+        if obj.status != ExportacaoJob.STATUS_CONCLUIDO:
+            return None
+        return reverse('exportacao-download', args=[obj.pk], request=self.context.get('request'))
+
+
+class ExportacaoProgressoSerializer(serializers.ModelSerializer):
+    percentual = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = ExportacaoJob
+        fields = ['id', 'status', 'linhas_processadas', 'total_linhas', 'percentual', 'erro']
@@ -0,0 +1,223 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from contas_pagar.models import ContaAPagar
+from contratos.models import Contrato
+from empresas.models import Empresa
+from exportacoes.fontes import achatar, cabecalhos_de
+from exportacoes.models import ExportacaoJob
+from exportacoes.processamento import (
+    SUFIXO_PARCIAL, caminho_absoluto, limpar_expiradas, processar, reenfileirar_travados, reivindicar,
+)
+from fornecedores.models import Fornecedor
+from multipla_teste.tenant_registry import tenant_registry
+from multipla_teste.tenant_utils import set_current_tenant
+from pagamentos.models import FormaPagamento
+from usuarios.models import PerfilUsuario, UsuarioEmpresaRole
+
+
+class AchatarRelatorioTest(SimpleTestCase):
+    def test_dict_de_listas_vira_linhas_com_secao(self):
+        dados = {
+            'pagar': [{'id': 1, 'contrato': {'id': 2, 'numero': 'C-1'}, 'projetos': ['Obra', 'Sede'],
+                       'data_vencimento': date(2025, 1, 10), 'valor': Decimal('10.00')}],
+            'totais': {'total_pago': Decimal('0')},
+        }
+        linhas = list(achatar(dados))
+        self.assertEqual(linhas[0], {
+            'secao': 'pagar', 'id': 1, 'contrato.id': 2, 'contrato.numero': 'C-1', 'projetos': 'Obra; Sede',
+            'data_vencimento': date(2025, 1, 10), 'valor': Decimal('10.00'),
+        })
+        self.assertEqual(linhas[1], {'secao': 'totais', 'total_pago': Decimal('0')})
+        self.assertEqual(cabecalhos_de(linhas)[-1], 'total_pago')
+
+    def test_lista_sai_como_esta(self):
+        self.assertEqual(list(achatar([{'Contrato': 'Total', 'Receita': 5}])), [{'Contrato': 'Total', 'Receita': 5}])
+
+
+class ExportacaoJobTest(SimpleTestCase):
+    def test_percentual(self):
+        job = ExportacaoJob(status=ExportacaoJob.STATUS_PROCESSANDO, linhas_processadas=500, total_linhas=2000)
+        self.assertEqual(job.percentual, 25)
+        job.total_linhas = None
+        self.assertEqual(job.percentual, 0)
+        job.status = ExportacaoJob.STATUS_CONCLUIDO
+        self.assertEqual(job.percentual, 100)
+
+
+def _empresa(n, **campos):
+    return Empresa.objects.create(
+        nome=f"Empresa {n}", cnpj=f"00.000.000/000{n}-00", endereco_matriz="Rua A", cidade="Cidade",
+        estado="SP", cep="00000-000", telefone="0", email=f"e{n}@x.com", **campos,
+    )
+
+
+@override_settings(DATABASE_ROUTERS=[])
+class _ExportacaoBase(APITestCase):
+    """
+    Usuário admin de uma empresa pronta, MEDIA_ROOT temporário e, sem
+    roteamento por tenant, tudo no banco de teste.
+    """
+
+    def setUp(self):
+        cache.clear()
+        tenant_registry.clear()
+        self.addCleanup(tenant_registry.clear)
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        media_root = self.settings(MEDIA_ROOT=media)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        # O registry registra os aliases dos tenants em settings.DATABASES; o TestCase não os conhece
+        self.addCleanup(self._remover_aliases, set(settings.DATABASES))
+        # O middleware deixa o tenant da request ativo na thread
+        self.addCleanup(set_current_tenant, None)
+        self.empresa = _empresa(1, status_provisionamento=Empresa.STATUS_PRONTO)
+        self.user = User.objects.create_user('ana', password='x')
+        perfil = PerfilUsuario.objects.create(user=self.user, email='ana@x.com', empresa_padrao=self.empresa)
+        perfil.empresas_acessiveis.add(self.empresa)
+        UsuarioEmpresaRole.objects.create(perfil_usuario=perfil, empresa=self.empresa, role='admin')
+
+        self.client.force_authenticate(self.user)
+        self.client.credentials(HTTP_X_COMPANY_ID=str(self.empresa.id))
+
+    def _remover_aliases(self, originais):
+        for alias in set(settings.DATABASES) - originais:
+            settings.DATABASES.pop(alias)
+
+    def _job(self, **campos):
+        dados = dict(usuario=self.user, tipo='consolidado', empresas=[self.empresa.id], parametros={'tipo': 'pagar'})
+        return ExportacaoJob.objects.create(**{**dados, **campos})
+
+    def _contas(self, *valores):
+        fornecedor = Fornecedor.objects.create(
+            nome="Forn", endereco="Rua B", cidade="Cidade", estado="SP", telefone="0", empresa=self.empresa,
+        )
+        contrato = Contrato.objects.create(
+            numero="P-1", tipo='fornecedor', fornecedor=fornecedor, descricao="-", data_inicio=date(2024, 1, 1),
+            valor_total=1000, empresa=self.empresa,
+        )
+        forma = FormaPagamento.objects.create(
+            descricao="pix", tipo=FormaPagamento.TIPO_CHOICES[0][0], empresa=self.empresa,
+        )
+        for dia, valor in enumerate(valores, start=1):
+            ContaAPagar.objects.create(
+                contrato=contrato, forma_pagamento=forma, data_pagamento=date(2025, 1, dia),
+                competencia=date(2025, 1, 1), valor_total=Decimal(valor), empresa=self.empresa,
+            )
+
+    def _concluido(self, nome='teste.csv', conteudo='id\n1\n', **campos):
+        relativo = os.path.join('exportacoes', nome)
+        os.makedirs(os.path.dirname(caminho_absoluto(relativo)), exist_ok=True)
+        with open(caminho_absoluto(relativo), 'w') as arquivo:
+            arquivo.write(conteudo)
+        dados = dict(status=ExportacaoJob.STATUS_CONCLUIDO, arquivo=relativo,
+                     expira_em=timezone.now() + timedelta(hours=1))
+        return self._job(**{**dados, **campos})
+
+
+class ProcessamentoTest(_ExportacaoBase):
+    def test_cada_job_e_reivindicado_uma_vez(self):
+        primeiro, segundo = self._job(), self._job()
+        reivindicados = [reivindicar(), reivindicar(), reivindicar()]
+        self.assertEqual([job and job.id for job in reivindicados], [primeiro.id, segundo.id, None])
+        self.assertEqual(reivindicados[0].status, ExportacaoJob.STATUS_PROCESSANDO)
+        self.assertNotEqual(reivindicados[0].token, reivindicados[1].token)
+
+    def test_processar_grava_o_arquivo_e_conclui(self):
+        self._contas(150, 70)
+        self._job()
+        job = processar(reivindicar())
+
+        self.assertEqual(job.status, ExportacaoJob.STATUS_CONCLUIDO)
+        self.assertEqual((job.linhas_processadas, job.total_linhas), (2, 2))
+        self.assertIsNotNone(job.expira_em)
+        with open(caminho_absoluto(job.arquivo), encoding='utf-8') as arquivo:
+            linhas = arquivo.read().splitlines()
+        self.assertEqual(len(linhas), 3)
+        self.assertTrue(linhas[0].endswith(',projetos'))
+        self.assertEqual(job.tamanho_bytes, os.path.getsize(caminho_absoluto(job.arquivo)))
+
+    def test_erro_da_fonte_vai_para_o_job(self):
+        self._job(empresas=[9999])
+        job = processar(reivindicar())
+        self.assertEqual(job.status, ExportacaoJob.STATUS_ERRO)
+        self.assertIn('Empresa 9999', job.erro)
+        self.assertEqual(job.arquivo, '')
+
+    def test_worker_que_perdeu_o_job_nao_grava(self):
+        self._job()
+        antigo = reivindicar()
+        # Worker lento: o job volta à fila e outro worker o pega
+        ExportacaoJob.objects.filter(id=antigo.id).update(atualizado_em=timezone.now() - timedelta(hours=1))
+        self.assertEqual(reenfileirar_travados(30), 1)
+        novo = reivindicar()
+
+        job = processar(antigo)
+        self.assertEqual(job.status, ExportacaoJob.STATUS_PROCESSANDO)
+        self.assertEqual(job.token, novo.token)
+        self.assertEqual(job.arquivo, '')
+        # Nem o .parcial nem o arquivo do worker antigo ficam para trás
+        self.assertEqual(list(os.walk(caminho_absoluto('exportacoes'))), [])
+
+    def test_limpar_expiradas(self):
+        vencido = self._concluido('vencido.csv', expira_em=timezone.now() - timedelta(minutes=1))
+        valido = self._concluido('valido.csv')
+        # .parcial de worker interrompido, mais velho que a retenção
+        parcial = caminho_absoluto(os.path.join('exportacoes', 'velho.csv' + SUFIXO_PARCIAL))
+        open(parcial, 'w').close()
+        velho = time.time() - 2 * 86400
+        os.utime(parcial, (velho, velho))
+
+        self.assertEqual(limpar_expiradas(), (1, 2))
+        vencido.refresh_from_db()
+        self.assertEqual((vencido.status, vencido.arquivo), (ExportacaoJob.STATUS_EXPIRADO, ''))
+        self.assertFalse(os.path.exists(caminho_absoluto(os.path.join('exportacoes', 'vencido.csv'))))
+        self.assertFalse(os.path.exists(parcial))
+        self.assertTrue(os.path.exists(caminho_absoluto(valido.arquivo)))
+
+
+class ExportacaoApiTest(_ExportacaoBase):
+    def _download(self, job):
+        return self.client.get(reverse('exportacao-download', args=[job.pk]))
+
+    def test_cria_job_so_para_empresas_acessiveis(self):
+        outra = _empresa(2)
+        resposta = self.client.post(
+            reverse('exportacao-list'), {'tipo': 'consolidado', 'empresas': [outra.id]}, format='json',
+        )
+        self.assertEqual(resposta.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(ExportacaoJob.objects.exists())
+
+        resposta = self.client.post(reverse('exportacao-list'), {'tipo': 'consolidado'}, format='json')
+        self.assertEqual(resposta.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(ExportacaoJob.objects.get().empresas, [self.empresa.id])
+
+    def test_download_conforme_o_status(self):
+        self.assertEqual(self._download(self._job()).status_code, status.HTTP_409_CONFLICT)
+
+        vencido = self._concluido(expira_em=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self._download(vencido).status_code, status.HTTP_410_GONE)
+
+        job = self._concluido(conteudo='id\n7\n')
+        resposta = self._download(job)
+        self.assertEqual(resposta.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(resposta.streaming_content), b'id\n7\n')
+        self.assertIn(f'consolidado_{job.pk}.csv', resposta['Content-Disposition'])
+
+        os.remove(caminho_absoluto(job.arquivo))
+        self.assertEqual(self._download(job).status_code, status.HTTP_410_GONE)
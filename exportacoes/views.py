@@ -0,0 +1,75 @@
+# exportacoes/views.py
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from multipla_teste.core.access import get_access_context
+
+from .models import ExportacaoJob
+from .processamento import caminho_absoluto
+from .serializers import ExportacaoJobSerializer, ExportacaoProgressoSerializer
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportacaoJobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
+                           mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Exportações em segundo plano, para o que passa do timeout do proxy
+    (processadas por manage.py processar_exportacoes):
+      POST /api/exportacoes/                 {tipo, formato, parametros, empresas?} -> 202
+      GET  /api/exportacoes/{id}/            status completo
+      GET  /api/exportacoes/{id}/progresso/  status e linhas processadas
+      GET  /api/exportacoes/{id}/download/   arquivo (até expira_em)
+    Cada usuário só vê os próprios jobs.
+    """
+    serializer_class = ExportacaoJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportacaoJob.objects.filter(usuario=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        resposta = super().create(request, *args, **kwargs)
+        resposta.status_code = status.HTTP_202_ACCEPTED
+        return resposta
+
+    def perform_create(self, serializer):
+        contexto = get_access_context(self.request)
+        empresas = serializer.validated_data.get('empresas') or [contexto.company_id()]
+        sem_acesso = set(empresas) - set(contexto.accessible_ids)
+        if sem_acesso:
+            raise PermissionDenied(f"Você não tem acesso às empresas {sorted(sem_acesso)}")
+        serializer.save(usuario=self.request.user, empresas=sorted(set(empresas)))
+
+    @action(detail=True, methods=['get'])
+    def progresso(self, request, pk=None):
+        return Response(ExportacaoProgressoSerializer(self.get_object()).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        expirado = job.status == ExportacaoJob.STATUS_EXPIRADO or (
+            job.expira_em is not None and job.expira_em <= timezone.now()
+        )
+        if expirado:
+            return Response({'detail': 'O arquivo desta exportação expirou; gere outra.'}, status=status.HTTP_410_GONE)
+        if job.status != ExportacaoJob.STATUS_CONCLUIDO:
+            return Response(
+                {'detail': 'Exportação ainda não concluída.', 'status': job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        try:
+            arquivo = open(caminho_absoluto(job.arquivo), 'rb')
+        except FileNotFoundError:
+            return Response({'detail': 'Arquivo da exportação não encontrado.'}, status=status.HTTP_410_GONE)
+        return FileResponse(
+            arquivo, as_attachment=True, filename=f"{job.tipo}_{job.pk}.{job.formato}",
+            content_type=CONTENT_TYPES[job.formato],
+        )
@@ -80,7 +80,7 @@ class CentroCusto(models.Model):
         # Gera sequência por tenant
         tenant = get_current_tenant()
         if not self.mascara_centro_custo:
-            qs = CentroCusto.objects.filter(empresa=tenant) if tenant else CentroCusto.objects.all()
+            qs = CentroCusto.objects.filter(empresa_id=tenant.id) if tenant else CentroCusto.objects.all()
             ultimo = qs.order_by('id').last()
             if ultimo:
                 codigo = int(ultimo.mascara_centro_custo)
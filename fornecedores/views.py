@@ -39,9 +39,7 @@ class FornecedorViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request):
-        empresa_id = self.get_company_id()
-        ids = request.data.get('ids', [])
-        Fornecedor.objects.filter(empresa_id=empresa_id, id__in=ids).update(is_active=False)
+        self.desativar(request.data.get('ids', []))
         return Response(
             {"message": "Fornecedores marcados como inativos com sucesso."},
             status=status.HTTP_200_OK
@@ -13,8 +13,7 @@ class FuncionarioViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request):
-        ids = request.data.get('ids', [])
-        Funcionario.objects.filter(id__in=ids).update(is_active=False)
+        self.desativar(request.data.get('ids', []))
         return Response({"message": "Funcionários desativados com sucesso"}, status=status.HTTP_200_OK)
 
 class FuncionarioSelectViewSet(CompanyScopedMixin, viewsets.ReadOnlyModelViewSet):
@@ -0,0 +1,184 @@
+# multipla_teste/core/access.py
+"""
+Contexto de acesso por request: usuário, perfil, empresa atual, empresas
+acessíveis e papel na empresa atual, calculados uma única vez.
+
+O TenantMiddleware cria o contexto com o header X-Company-Id já interpretado;
+os dados do usuário são resolvidos na primeira consulta depois da
+autenticação do DRF (o JWT só é validado dentro da view): pelas claims do
+token quando a versão das permissões confere (usuarios/claims.py), senão em
+3 queries fixas (perfil, empresas acessíveis e papéis). CompanyScopedMixin e
+as permissões de usuarios/permissions.py usam o mesmo objeto via
+get_access_context(request).
+"""
+from rest_framework.exceptions import PermissionDenied
+
+ATRIBUTO_REQUEST = '_access_context'
+
+
+class AccessContext:
+    def __init__(self, header_raw=''):
+        self.header_raw = (header_raw or '').strip()
+        self.all_companies = self.header_raw.lower() == 'all'
+        self._user = None
+        self._token = None
+        self._carregado = False
+        self._perfil_carregado = False
+
+    # --- header ---
+
+    @property
+    def header_company_id(self):
+        """ID do header como int, None se ausente/'all'; ValueError se inválido."""
+        if not self.header_raw or self.all_companies:
+            return None
+        return int(self.header_raw)
+
+    # --- usuário ---
+
+    def bind_user(self, user, token=None):
+        """Associa o usuário autenticado; troca de usuário descarta o que foi carregado."""
+        if user is not self._user:
+            self._user = user
+            self._token = token
+            self._carregado = False
+            self._perfil_carregado = False
+
+    @property
+    def user(self):
+        return self._user
+
+    def _carregar(self):
+        if self._carregado:
+            return
+        tem_perfil, padrao_id, empresas, roles = False, None, frozenset(), {}
+
+        user = self._user
+        if user is not None and user.is_authenticated:
+            from usuarios.claims import ler_claims
+
+            claims = ler_claims(self._token)
+            if claims is not None:
+                tem_perfil = True
+                padrao_id, empresas, roles = claims
+            else:
+                perfil = self.perfil
+                if perfil is not None:
+                    tem_perfil, padrao_id = True, perfil.empresa_padrao_id
+                    empresas, roles = self._carregar_do_banco(perfil)
+
+        # Atribui tudo antes de marcar como carregado (threads do fan-out leem o mesmo objeto)
+        self._tem_perfil, self._empresa_padrao_id = tem_perfil, padrao_id
+        self._empresas_acessiveis, self._roles = empresas, roles
+        self._carregado = True
+
+    def _carregar_do_banco(self, perfil):
+        from usuarios.models import UsuarioEmpresaRole
+
+        empresas = frozenset(perfil.empresas_acessiveis.values_list('id', flat=True))
+        roles = dict(
+            UsuarioEmpresaRole.objects
+            .filter(perfil_usuario_id=perfil.pk)
+            .values_list('empresa_id', 'role')
+        )
+        return empresas, roles
+
+    @property
+    def perfil(self):
+        """O objeto PerfilUsuario (sempre do banco; as checagens usam tem_perfil)."""
+        if not self._perfil_carregado:
+            perfil = None
+            if self._user is not None and self._user.is_authenticated:
+                from usuarios.models import PerfilUsuario
+
+                perfil = PerfilUsuario.objects.filter(user_id=self._user.pk).first()
+            self._perfil, self._perfil_carregado = perfil, True
+        return self._perfil
+
+    @property
+    def tem_perfil(self):
+        self._carregar()
+        return self._tem_perfil
+
+    @property
+    def empresa_padrao_id(self):
+        self._carregar()
+        return self._empresa_padrao_id
+
+    @property
+    def empresas_acessiveis(self):
+        """IDs em perfil.empresas_acessiveis (sem a empresa padrão)."""
+        self._carregar()
+        return self._empresas_acessiveis
+
+    @property
+    def accessible_ids(self):
+        """Empresas que o usuário pode acessar: as acessíveis mais a padrão."""
+        if not self.tem_perfil:
+            return frozenset()
+        return self.empresas_acessiveis | {self.empresa_padrao_id}
+
+    @property
+    def roles(self):
+        """empresa_id -> papel (UsuarioEmpresaRole)."""
+        self._carregar()
+        return self._roles
+
+    # --- empresa atual ---
+
+    def company_id(self):
+        """
+        Empresa atual: a do header (validada contra accessible_ids) ou a padrão.
+        Levanta PermissionDenied como o CompanyScopedMixin sempre fez.
+        """
+        try:
+            header_id = self.header_company_id
+        except ValueError:
+            raise PermissionDenied("X-Company-ID deve ser um número inteiro")
+
+        if header_id is not None:
+            if header_id not in self.accessible_ids:
+                raise PermissionDenied(f"Você não tem acesso à empresa ID {header_id}")
+            return header_id
+
+        if not self.tem_perfil:
+            raise PermissionDenied("Usuário sem perfil configurado")
+        return self.empresa_padrao_id
+
+    @property
+    def role(self):
+        """
+        Papel na empresa atual, ou None. Com header, a empresa precisa estar em
+        empresas_acessiveis; sem header (ou 'all') vale a empresa padrão.
+        """
+        if not self.tem_perfil:
+            return None
+        try:
+            header_id = self.header_company_id
+        except ValueError:
+            return None
+        if header_id is None:
+            return self.roles.get(self.empresa_padrao_id)
+        if header_id not in self.empresas_acessiveis:
+            return None
+        return self.roles.get(header_id)
+
+
+def attach_access_context(request):
+    """Chamado pelo TenantMiddleware: cria o contexto da request a partir do header."""
+    contexto = AccessContext(request.headers.get('X-Company-Id', ''))
+    setattr(request, ATRIBUTO_REQUEST, contexto)
+    return contexto
+
+
+def get_access_context(request):
+    """
+    Contexto de acesso da request (HttpRequest ou Request do DRF), criado sob
+    demanda quando o middleware não rodou (testes, chamadas internas).
+    """
+    http_request = getattr(request, '_request', request)
+    contexto = getattr(http_request, ATRIBUTO_REQUEST, None)
+    if contexto is None:
+        contexto = attach_access_context(http_request)
+    contexto.bind_user(getattr(request, 'user', None), getattr(request, 'auth', None))
+    return contexto
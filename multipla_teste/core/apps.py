@@ -0,0 +1,13 @@
+# multipla_teste/core/apps.py
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'multipla_teste.core'
+    label = 'core'
+
+    def ready(self):
+        # Versões por tabela usadas no ETag das listagens
+        from .versoes import conectar
+        conectar()
@@ -0,0 +1,97 @@
+# multipla_teste/core/cross_tenant.py
+"""
+Listagem "todas as empresas" (X-Company-Id: all) de verdade: a mesma query
+filtrada e ordenada roda em cada banco de tenant em paralelo (TenantFanout),
+cada tenant devolve só a sua primeira página e as listas são mescladas
+(k-way merge) pela chave de ordenação.
+
+A chave total é (campo, empresa_id do tenant, pk), sempre na mesma direção,
+então o cursor é estável mesmo com valores repetidos entre empresas.
+"""
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from ..tenant_fanout import OK, TenantFanout
+from .cursors import decode_cursor, encode_cursor
+
+
+def keyset_q(campo, descendente, posicao, tenant_id):
+    """
+    Condição "depois do cursor" para o tenant `tenant_id`.
+    Como o empresa_id é o segundo critério, cada tenant recebe uma condição
+    diferente: os que vêm depois da empresa do cursor incluem o valor igual,
+    os que vêm antes não, e o próprio tenant do cursor desempata pela pk.
+    """
+    op = 'lt' if descendente else 'gt'
+    valor, empresa, pk = posicao['v'], posicao['e'], posicao['pk']
+
+    if tenant_id == empresa:
+        return Q(**{f"{campo}__{op}": valor}) | Q(**{campo: valor, f"pk__{op}": pk})
+    tenant_depois = tenant_id < empresa if descendente else tenant_id > empresa
+    if tenant_depois:
+        return Q(**{f"{campo}__{op}e": valor})
+    return Q(**{f"{campo}__{op}": valor})
+
+
+def mesclar_paginas(listas, page_size, descendente):
+    """
+    K-way merge das páginas já ordenadas de cada tenant.
+    Cada item é (chave, dado). Retorna (dados, chave_do_ultimo ou None se acabou).
+    """
+    mescladas = heapq.merge(*listas, key=lambda item: item[0], reverse=descendente)
+    pagina = list(islice(mescladas, page_size + 1))
+    tem_mais = len(pagina) > page_size
+    pagina = pagina[:page_size]
+    ultima = pagina[-1][0] if tem_mais and pagina else None
+    return [dado for _, dado in pagina], ultima
+
+
+def listar_todas_empresas(montar_queryset, serializar, ordering, page_size, cursor=None, **fanout_kwargs):
+    """
+    Executa a listagem em todos os tenants e devolve uma página mesclada.
+
+    - montar_queryset(): queryset já filtrado (roda dentro do tenant_context de cada tenant)
+    - serializar(objs): lista de dicts; também roda no tenant, para que relações
+      sejam buscadas no banco certo
+    - ordering: campo não nulo, com '-' para ordem decrescente
+
+    Retorna dict com results, next_cursor, parcial e tenants_com_erro.
+    """
+    descendente = ordering.startswith('-')
+    campo = ordering.lstrip('-')
+    posicao = decode_cursor(cursor) if cursor else None
+    if posicao is not None and not {'v', 'e', 'pk'} <= set(posicao):
+        raise ValidationError({'cursor': 'Cursor inválido'})
+
+    ordem = [f"-{campo}", "-pk"] if descendente else [campo, "pk"]
+
+    def por_tenant(tenant):
+        qs = montar_queryset()
+        if posicao is not None:
+            qs = qs.filter(keyset_q(campo, descendente, posicao, tenant.id))
+        objs = list(qs.order_by(*ordem)[:page_size + 1])
+        dados = serializar(objs)
+        return [((getattr(obj, campo), tenant.id, obj.pk), dado) for obj, dado in zip(objs, dados)]
+
+    listas = []
+    com_erro = []
+    fanout = TenantFanout(por_tenant, **fanout_kwargs)
+    for resultado in fanout:
+        if resultado.status == OK:
+            listas.append(resultado.result)
+        else:
+            com_erro.append({'empresa': resultado.empresa.id, 'erro': resultado.error})
+    # Prazo total esgotado: tenants que nem chegaram a rodar ou não terminaram também ficam de fora
+    com_erro.extend({'empresa': e.id, 'erro': 'nao_executado'} for e in fanout.resumo.nao_executados)
+    com_erro.extend({'empresa': e.id, 'erro': 'interrompido'} for e in fanout.resumo.interrompidos)
+
+    dados, ultima = mesclar_paginas(listas, page_size, descendente)
+    return {
+        'results': dados,
+        'next_cursor': encode_cursor({'v': ultima[0], 'e': ultima[1], 'pk': ultima[2]}) if ultima else None,
+        'parcial': not fanout.resumo.completo,
+        'tenants_com_erro': com_erro,
+    }
@@ -0,0 +1,28 @@
+# multipla_teste/core/cursors.py
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.exceptions import ValidationError
+
+
+def encode_cursor(posicao):
+    """
+    Codifica a posição de paginação (dict com os valores da chave de ordenação)
+    num token opaco para a URL. Datas e decimais viram string; o ORM converte
+    de volta ao filtrar pelo campo.
+    """
+    raw = json.dumps(posicao, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decodifica um cursor gerado por encode_cursor(); cursor inválido vira 400."""
+    try:
+        padding = '=' * (-len(token) % 4)
+        posicao = json.loads(base64.urlsafe_b64decode(token + padding).decode())
+    except (ValueError, TypeError):
+        raise ValidationError({'cursor': 'Cursor inválido'})
+    if not isinstance(posicao, dict):
+        raise ValidationError({'cursor': 'Cursor inválido'})
+    return posicao
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.14 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        # A tabela já existe: foi criada quando VersaoTabela morava em contas_pagar
+        ('contas_pagar', '0006_versaotabela'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='VersaoTabela',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('empresa_id', models.PositiveIntegerField()),
+                        ('tabela', models.CharField(max_length=100)),
+                        ('versao', models.PositiveBigIntegerField(default=0)),
+                    ],
+                    options={
+                        'db_table': 'contas_pagar_versaotabela',
+                    },
+                ),
+                migrations.AddConstraint(
+                    model_name='versaotabela',
+                    constraint=models.UniqueConstraint(fields=('empresa_id', 'tabela'), name='versao_tabela_empresa_unica'),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -1,73 +1,113 @@
 # multipla_teste/core/mixins.py
 
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from django.db import models
+from django.utils.cache import patch_vary_headers
 from ..tenant_router import get_current_tenant
+from ..tenant_replicas import replica_reads
+from .access import get_access_context
+from .cross_tenant import listar_todas_empresas
+from .versoes import calcular_etag, corresponde, incrementar
+
+class NaoModificado(Exception):
+    """If-None-Match bateu com o ETag atual: a view responde 304 sem ler os dados."""
+
 
 class CompanyScopedMixin:
     """
     Mixin para ViewSets que precisam filtrar dados por empresa.
     Suporta acesso cross-tenant baseado em permissões do usuário.
+
+    GET de list/retrieve sai com ETag calculado das versões das tabelas da
+    view (versoes.py); If-None-Match igual responde 304.
     """
+    # Modelos cujos dados aparecem em list/retrieve; padrão: o do queryset.
+    # Views cujo serializer lê relações listam também as tabelas delas.
+    etag_modelos = None
+
+    def get_etag_modelos(self):
+        if self.etag_modelos is not None:
+            return self.etag_modelos
+        queryset = getattr(self, 'queryset', None)
+        return (queryset.model,) if queryset is not None else ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = None
+        if (
+            request.method in ('GET', 'HEAD')
+            and getattr(self, 'action', None) in ('list', 'retrieve')
+            and not self.get_access_context().all_companies
+        ):
+            # Antes de qualquer leitura de dados: o ETag nunca rotula dados mais antigos que ele
+            self._etag = calcular_etag(
+                self.get_current_company_id(), self.get_etag_modelos(), request.get_full_path()
+            )
+            if self._etag and corresponde(self._etag, request.headers.get('If-None-Match')):
+                raise NaoModificado()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NaoModificado):
+            return Response(status=304)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, '_etag', None)
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Authorization', 'X-Company-ID'))
+        return response
+
+    def get_access_context(self):
+        """Contexto de acesso da request (perfil, empresas, papel), calculado uma vez."""
+        return get_access_context(self.request)
 
     def get_user_accessible_companies(self):
-        if not self.request.user.is_authenticated:
-            return set()
-
-        try:
-            perfil = self.request.user.perfilusuario
-            # empresas_acessiveis contém as empresas com papel atribuído
-            ids = set(
-                perfil.empresas_acessiveis.values_list('id', flat=True)
-            )
-            ids.add(perfil.empresa_padrao.id)
-            return ids
-        except AttributeError:
-            return set()
+        return set(self.get_access_context().accessible_ids)
 
     def get_header_company_id(self):
-        raw = (
-            self.request.headers.get('X-Company-Id', '') or 
-            self.request.headers.get('X-Company-ID', '')
-        ).strip()
-        
         #Sempre usamos X-Company-Id (minúsculo no CORS_ALLOW_HEADERS é o mesmo header)
-        raw = self.request.headers.get('X-Company-Id', '').strip()
-
-        if not raw or raw.lower() == 'all':
-            return None
-
+        contexto = self.get_access_context()
         try:
-            company_id = int(raw)
+            company_id = contexto.header_company_id
         except ValueError:
             raise PermissionDenied("X-Company-ID deve ser um número inteiro")
 
-        accessible_companies = self.get_user_accessible_companies()
-        if company_id not in accessible_companies:
+        if company_id is None:
+            return None
+
+        if company_id not in contexto.accessible_ids:
             raise PermissionDenied(f"Você não tem acesso à empresa ID {company_id}")
 
         return company_id
 
     def get_current_company_id(self):
-        header_company = self.get_header_company_id()
-        if header_company is not None:
-            return header_company
-
-        try:
-            return self.request.user.perfilusuario.empresa_padrao.id
-        except AttributeError:
-            raise PermissionDenied("Usuário sem perfil configurado")
+        return self.get_access_context().company_id()
 
     def get_queryset(self):
         qs = super().get_queryset()
         # Se o header X-Company-Id for 'all' e o usuário for staff, retorna todos os registros
-        raw = self.request.headers.get('X-Company-Id', '').strip().lower()
-        if raw == 'all' and self.request.user.is_staff:
+        if self.get_access_context().all_companies and self.request.user.is_staff:
             return qs
         # Caso contrário, filtra pelo tenant atual
         company_id = self.get_current_company_id()
         return qs.filter(empresa_id=company_id)
 
+    def desativar(self, ids):
+        """
+        Soft delete (is_active=False) dos `ids` da empresa atual. update() não
+        dispara signals: a versão da tabela para o ETag é incrementada aqui.
+        Retorna quantos registros foram desativados.
+        """
+        modelo = self.queryset.model
+        company_id = self.get_current_company_id()
+        desativados = modelo.objects.filter(empresa_id=company_id, id__in=ids).update(is_active=False)
+        incrementar(modelo, [company_id])
+        return desativados
+
     def perform_create(self, serializer):
         """No create, injetar empresa_id automaticamente."""
         company_id = self.get_current_company_id()
@@ -89,9 +129,8 @@ class CompanyScopedMixin:
         Caso o tenant middleware não forneça registro, aplicar 
         filtro por empresa ou, se for staff com header 'all', sem filtro.
         """
-        raw = self.request.headers.get('X-Company-ID', "").strip().lower()
         # Se quiser visualizar “all” e for staff, liberar todos
-        if raw == 'all' and self.request.user.is_staff:
+        if self.get_access_context().all_companies and self.request.user.is_staff:
             return qs
 
         company_id = self.get_current_company_id()
@@ -100,5 +139,73 @@ class CompanyScopedMixin:
         # Se o modelo não tiver empresa, retorna sem filtro adicional
         return qs
 
+class ReplicaReadMixin:
+    """
+    Mixin para ViewSets de relatório/listagem: as actions em `replica_actions`
+    (GET) leem da réplica do tenant quando ela existe e está em dia.
+    Escritas e leituras em transação continuam no primário (ver tenant_replicas.py).
+    """
+    replica_actions = ('list',)
+
+    def initial(self, request, *args, **kwargs):
+        # Entra antes do super(): a versão do ETag (CompanyScopedMixin.initial)
+        # precisa ser lida do mesmo banco que os dados
+        if request.method in SAFE_METHODS and getattr(self, 'action', None) in self.replica_actions:
+            self._replica_reads = replica_reads()
+            self._replica_reads.__enter__()
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        leituras = getattr(self, '_replica_reads', None)
+        if leituras is not None:
+            leituras.__exit__(None, None, None)
+            self._replica_reads = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+class CrossTenantListMixin:
+    """
+    Mixin para ViewSets de listagem: com `X-Company-Id: all` e usuário staff,
+    o `list` consulta todos os bancos de tenant em paralelo e mescla as páginas
+    (ver core/cross_tenant.py). Paginação só por cursor:
+        ?cursor=<next_cursor>&page_size=50&ordering=-data_pagamento
+    `ordering` precisa estar em cross_tenant_ordering_fields (campos não nulos).
+    Sem o header 'all' o `list` continua o de sempre.
+    """
+    cross_tenant_ordering = None          # ex.: '-data_pagamento'
+    cross_tenant_ordering_fields = ()
+    cross_tenant_page_size = 50
+    cross_tenant_max_page_size = 500
+
+    def is_all_companies_request(self):
+        return get_access_context(self.request).all_companies and self.request.user.is_staff
+
+    def list(self, request, *args, **kwargs):
+        if self.cross_tenant_ordering and self.is_all_companies_request():
+            return self.list_all_companies(request)
+        return super().list(request, *args, **kwargs)
+
+    def list_all_companies(self, request):
+        ordering = request.query_params.get('ordering') or self.cross_tenant_ordering
+        if ordering.lstrip('-') not in self.cross_tenant_ordering_fields:
+            return Response(
+                {"detail": f"ordering deve ser um de: {', '.join(self.cross_tenant_ordering_fields)}"},
+                status=400
+            )
+        try:
+            page_size = int(request.query_params.get('page_size', self.cross_tenant_page_size))
+        except ValueError:
+            page_size = self.cross_tenant_page_size
+        page_size = max(1, min(page_size, self.cross_tenant_max_page_size))
+
+        pagina = listar_todas_empresas(
+            montar_queryset=lambda: self.filter_queryset(self.get_queryset()),
+            serializar=lambda objs: self.get_serializer(objs, many=True).data,
+            ordering=ordering,
+            page_size=page_size,
+            cursor=request.query_params.get('cursor'),
+        )
+        return Response(pagina)
+
+
 # Mantém compatibilidade: views que costumavam chamar FilialScopedMixin
 FilialScopedMixin = CompanyScopedMixin
@@ -0,0 +1,24 @@
+# multipla_teste/core/models.py
+from django.db import models
+
+
+class VersaoTabela(models.Model):
+    """
+    Contador de alterações por empresa e tabela, incrementado na mesma
+    transação de cada escrita; as listagens o transformam em ETag
+    (multipla_teste/core/versoes.py). Inteiro em vez de FK: empresa_id 0 é a
+    linha "todas as empresas", usada quando a escrita não tem empresa conhecida.
+    """
+    empresa_id = models.PositiveIntegerField()
+    tabela = models.CharField(max_length=100)  # label do modelo, p.ex. 'contas_pagar.contaapagar'
+    versao = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        # Tabela criada quando o modelo morava em contas_pagar
+        db_table = 'contas_pagar_versaotabela'
+        constraints = [
+            models.UniqueConstraint(fields=['empresa_id', 'tabela'], name='versao_tabela_empresa_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.tabela} empresa {self.empresa_id}: v{self.versao}"
@@ -0,0 +1,135 @@
+# multipla_teste/core/versoes.py
+"""
+Versão por empresa e tabela (VersaoTabela) para GET condicional.
+
+- save/delete dos modelos em TABELAS: signals abaixo, na transação da escrita;
+- update()/bulk_create/bulk_update: quem alterar em lote chama
+  incrementar(modelo, empresa_ids) — dentro de em_lote(modelo) quando as
+  linhas ainda disparam signals, para não incrementar uma vez por linha;
+- leitura: CompanyScopedMixin (mixins.py) lê as versões
+  das tabelas da view antes dos dados, monta um ETag forte e responde 304
+  quando o If-None-Match bate — sem tocar nas tabelas de dados.
+
+A versão é lida antes dos dados, então um ETag nunca rotula dados mais
+antigos que ele: se uma escrita cair entre as duas leituras, o cliente
+recebe os dados novos com a versão antiga e só baixa de novo na próxima
+consulta. O UPDATE da versão trava a linha (empresa, tabela) até o commit:
+escritas concorrentes na mesma tabela da mesma empresa passam a se enfileirar.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import router
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from ..tenant_router import get_current_tenant
+from .models import VersaoTabela
+
+# empresa_id da linha que vale para todas as empresas
+TODAS = 0
+
+# Tabelas cujos dados aparecem em list/retrieve dos viewsets com CompanyScopedMixin
+TABELAS = (
+    'clientes.cliente',
+    'fornecedores.fornecedor',
+    'funcionarios.funcionario',
+    'projetos.projeto',
+    'pagamentos.formapagamento',
+    'financeiro.contafinanceira',
+    'financeiro.centrocusto',
+    'contratos.contrato',
+    'contratos.contratoprojeto',
+    'contratos.projecaofaturamento',
+    'contas_pagar.contaapagar',
+    'contas_pagar.contaareceber',
+    'contas_pagar.contapagaravulso',
+    'contas_pagar.contareceberavulso',
+    'contas_pagar.projetocontapagar',
+    'contas_pagar.projetoconta',
+)
+
+
+def _empresa_atual():
+    tenant = get_current_tenant()
+    return tenant.id if tenant is not None else TODAS
+
+
+def incrementar(modelo, empresa_ids=None, using=None):
+    """Nova versão de `modelo` para as empresas (padrão: a do tenant atual, ou todas)."""
+    tabela = modelo._meta.label_lower
+    empresa_ids = sorted({
+        TODAS if empresa_id is None else empresa_id
+        for empresa_id in (empresa_ids or [_empresa_atual()])
+    })
+    manager = VersaoTabela.objects.db_manager(using or router.db_for_write(modelo))
+    linhas = manager.filter(tabela=tabela, empresa_id__in=empresa_ids)
+    if linhas.update(versao=F('versao') + 1) < len(empresa_ids):
+        # Primeira escrita da tabela na empresa: cria a linha e incrementa de novo
+        # (as que já existiam sobem duas vezes, o que não faz diferença)
+        manager.bulk_create(
+            [VersaoTabela(empresa_id=empresa_id, tabela=tabela) for empresa_id in empresa_ids],
+            ignore_conflicts=True,
+        )
+        linhas.update(versao=F('versao') + 1)
+
+
+_lote = threading.local()
+
+
+@contextmanager
+def em_lote(modelo):
+    """Desliga nesta thread o incremento por linha de `modelo`; quem grava incrementa uma vez no fim."""
+    tabela = modelo._meta.label_lower
+    contagem = getattr(_lote, 'tabelas', None)
+    if contagem is None:
+        contagem = _lote.tabelas = {}
+    contagem[tabela] = contagem.get(tabela, 0) + 1
+    try:
+        yield
+    finally:
+        contagem[tabela] -= 1
+        if not contagem[tabela]:
+            del contagem[tabela]
+
+
+def _gravado(sender, instance, using, raw=False, **kwargs):
+    if raw or sender._meta.label_lower in getattr(_lote, 'tabelas', {}):
+        return
+    empresa_id = getattr(instance, 'empresa_id', None)
+    incrementar(sender, [empresa_id if empresa_id is not None else _empresa_atual()], using)
+
+
+def conectar():
+    """Liga os signals de save/delete das TABELAS (chamado no ready do app)."""
+    for tabela in TABELAS:
+        modelo = apps.get_model(tabela)
+        post_save.connect(_gravado, sender=modelo, dispatch_uid=f"versao_tabela:{tabela}")
+        post_delete.connect(_gravado, sender=modelo, dispatch_uid=f"versao_tabela:{tabela}")
+
+
+def calcular_etag(empresa_id, modelos, chave):
+    """
+    ETag forte da resposta identificada por `chave` (caminho com query string),
+    a partir das versões de `modelos`; None se algum deles não for versionado.
+    """
+    tabelas = sorted({modelo._meta.label_lower for modelo in modelos})
+    if not tabelas or any(tabela not in TABELAS for tabela in tabelas):
+        return None
+    versoes = sorted(
+        VersaoTabela.objects.filter(tabela__in=tabelas, empresa_id__in=[empresa_id, TODAS])
+        .values_list('tabela', 'empresa_id', 'versao')
+    )
+    # ETAG_VERSAO_API muda o ETag de tudo quando um deploy altera o formato das respostas
+    base = repr((getattr(settings, 'ETAG_VERSAO_API', 1), empresa_id, chave, versoes))
+    return f'"{hashlib.sha1(base.encode()).hexdigest()}"'
+
+
+def corresponde(etag, if_none_match):
+    """If-None-Match usa comparação fraca: W/"x" também casa com "x"."""
+    if not if_none_match:
+        return False
+    return etag in {candidato.strip().removeprefix('W/') for candidato in if_none_match.split(',')}
@@ -0,0 +1,142 @@
+# multipla_teste/pagination.py
+"""
+Paginação por cursor (keyset) para as listagens grandes.
+
+A ordenação vem de `keyset_ordering` na view, p.ex. ('-data_pagamento', '-id'):
+o último campo precisa ser único e nenhum pode ser nulo. Cada página filtra
+"depois da última linha vista" por esses campos, então a página 500 custa o
+mesmo que a primeira (sem OFFSET), desde que exista um índice composto na
+mesma ordem (ver Meta.indexes em contas_pagar/models.py).
+
+Resposta: {"next": url | null, "previous": url | null, "results": [...]}.
+A paginação é opcional: sem ?cursor= nem ?page_size= a view devolve a lista
+completa, como antes, para não quebrar quem espera um array.
+"""
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .core.cursors import decode_cursor, encode_cursor
+
+
+def keyset_filter(ordering, valores, reverso=False):
+    """
+    Q para "depois de `valores`" na ordenação composta `ordering`
+    (ou "antes", com reverso=True):
+        (a > va) | (a = va & b > vb) | ...
+    """
+    filtro = Q()
+    iguais = {}
+    for campo, valor in zip(ordering, valores):
+        nome = campo.lstrip('-')
+        descendente = campo.startswith('-') != reverso
+        filtro |= Q(**iguais, **{f"{nome}__{'lt' if descendente else 'gt'}": valor})
+        iguais[nome] = valor
+    return filtro
+
+
+def inverter_ordering(ordering):
+    return [campo[1:] if campo.startswith('-') else f"-{campo}" for campo in ordering]
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'keyset_ordering', None)
+        assert ordering, f"{view.__class__.__name__} precisa definir keyset_ordering"
+        return list(ordering)
+
+    @classmethod
+    def solicitada(cls, request):
+        """True quando a request pediu paginação (?cursor= ou ?page_size=)."""
+        return any(p in request.query_params for p in (cls.cursor_query_param, cls.page_size_query_param))
+
+    def get_page_size(self, request):
+        try:
+            tamanho = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(tamanho, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.solicitada(request):
+            return None
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size_atual = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        posicao = decode_cursor(token) if token else None
+        self.reverso = bool(posicao and posicao.get('r'))
+        if posicao is not None:
+            valores = posicao.get('v')
+            if not isinstance(valores, list) or len(valores) != len(self.ordering):
+                posicao = None
+            else:
+                queryset = self.aplicar_cursor(queryset, valores, self.reverso)
+
+        ordem = inverter_ordering(self.ordering) if self.reverso else self.ordering
+        linhas = list(self.buscar_pagina(queryset, ordem, self.page_size_atual + 1))
+        tem_mais = len(linhas) > self.page_size_atual
+        linhas = linhas[:self.page_size_atual]
+
+        if self.reverso:
+            linhas.reverse()
+            self.tem_anterior, self.tem_proxima = tem_mais, True
+        else:
+            self.tem_anterior, self.tem_proxima = posicao is not None, tem_mais
+        self.linhas = linhas
+        return linhas
+
+    # Pontos de extensão para fontes que não são um QuerySet simples (p.ex. UNION ALL)
+
+    def aplicar_cursor(self, queryset, valores, reverso):
+        return queryset.filter(keyset_filter(self.ordering, valores, reverso))
+
+    def buscar_pagina(self, queryset, ordem, limite):
+        return queryset.order_by(*ordem)[:limite]
+
+    def valor_de(self, obj, campo):
+        # Linhas de .values() (listagens rápidas) chegam como dict
+        return obj[campo] if isinstance(obj, dict) else getattr(obj, campo)
+
+    def _valores(self, obj):
+        return [self.valor_de(obj, campo.lstrip('-')) for campo in self.ordering]
+
+    def _url(self, posicao):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(posicao))
+
+    def get_next_link(self):
+        if not self.tem_proxima or not self.linhas:
+            return None
+        return self._url({'v': self._valores(self.linhas[-1])})
+
+    def get_previous_link(self):
+        if not self.tem_anterior:
+            return None
+        if not self.linhas:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._url({'v': self._valores(self.linhas[0]), 'r': 1})
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
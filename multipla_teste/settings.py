@@ -57,6 +57,7 @@ INSTALLED_APPS = [
     'django_extensions',
     'django_filters',
     'corsheaders',
+    'multipla_teste.core',
     'fornecedores',
     'clientes',
     'contratos',
@@ -68,6 +69,7 @@ INSTALLED_APPS = [
     'empresas',
     'financeiro',
     'notifications',
+    'exportacoes',
 ]
 
 REST_FRAMEWORK = {
@@ -88,8 +90,8 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        
+        # JWTAuthentication + lista de revogação em memória (logout)
+        'usuarios.authentication.JWTRevogavelAuthentication',
     ),
 }
 
@@ -134,6 +136,39 @@ DATABASE_ROUTERS = [
   'multipla_teste.tenant_router.TenantRouter',
 ]
 
+# Isolamento dos tenants (multipla_teste/tenant_schema.py):
+#   'database' -> um banco PostgreSQL por empresa (multipla_financeiro_tenant_{id})
+#   'schema'   -> um schema por empresa (tenant_{id}) dentro do banco default,
+#                 com search_path trocado por request na mesma conexão
+TENANT_MODE = os.environ.get('TENANT_MODE', 'database')
+
+# Réplica de leitura por tenant (multipla_teste/tenant_replicas.py), só no modo 'database'.
+# Chaves que sobrescrevem a config do primário para montar tenant_{id}_ro,
+# ex.: {'HOST': 'pg-replica.interna'}. None desativa.
+TENANT_READ_REPLICA = None
+TENANT_REPLICA_MAX_LAG = 5               # segundos de atraso tolerados antes de voltar ao primário
+TENANT_REPLICA_LAG_CHECK_INTERVAL = 10   # segundos entre medições do atraso por réplica
+
+# Cache em processo dos tenants (multipla_teste/tenant_registry.py)
+TENANT_REGISTRY_TTL = 300        # segundos até reconsultar a empresa no banco default
+TENANT_REGISTRY_MAX_SIZE = 1024  # máximo de empresas em cache por processo (LRU)
+TENANT_REGISTRY_VERSION_INTERVAL = 30  # segundos entre checagens do carimbo de versão (empresas novas)
+# Conexões de tenant abertas no boot de cada worker (0 = nenhuma).
+# Não usar com gunicorn --preload: as conexões seriam herdadas pelos forks.
+TENANT_WARMUP_CONNECTIONS = 0
+
+# Limite de conexões de tenant abertas por processo (multipla_teste/tenant_connections.py).
+# Conexões ociosas além do limite são fechadas por ordem de uso (LRU).
+TENANT_MAX_CONNECTIONS = 50
+
+# Execução cross-tenant (multipla_teste/tenant_fanout.py)
+TENANT_FANOUT_MAX_WORKERS = 16  # tenants consultados em paralelo
+TENANT_FANOUT_TIMEOUT = 10      # prazo por tenant em segundos (vira statement_timeout)
+
+# Banco já migrado clonado no provisionamento de novas empresas (empresas/provisioning.py).
+# Mantido atualizado por `python manage.py atualizar_template_tenants`.
+TENANT_TEMPLATE_DB = 'multipla_tenant_template'
+
 
 WSGI_APPLICATION = 'multipla_teste.wsgi.application'
 
@@ -154,6 +189,27 @@ SIMPLE_JWT = {
     # ... outras configurações
 }
 
+# Segundos que cada processo guarda a versão das permissões do usuário antes de
+# reconsultar o banco (claims de empresa/papel no JWT, usuarios/claims.py)
+PERMISSOES_VERSAO_CACHE_TTL = 30
+
+# Segundos entre sincronizações da lista de tokens revogados em cada worker
+# (usuarios/revogacao.py); é o atraso máximo para um logout valer nos demais
+TOKEN_REVOGACAO_INTERVALO = 5
+
+# Listagem/detalhe consolidados leem do livro de lançamentos (contas_pagar/ledger.py)
+# em vez do UNION das quatro tabelas. Ligar só depois do backfill_lancamentos
+CONSOLIDATED_USE_LEDGER = False
+
+# Segundos que o /api/dashboard/ fica em cache. Escritas trocam a versão do
+# resumo e invalidam na hora; com LocMemCache cada processo só vê a troca feita
+# por ele mesmo, então este TTL é o atraso máximo entre workers
+DASHBOARD_CACHE_TTL = 60
+
+# Exportações em segundo plano (exportacoes/): arquivos em MEDIA_ROOT/exportacoes,
+# baixáveis por este número de horas; depois limpar_exportacoes os remove
+EXPORTACOES_RETENCAO_HORAS = 24
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
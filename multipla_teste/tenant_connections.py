@@ -0,0 +1,215 @@
+# multipla_teste/tenant_connections.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class TenantConnectionManager:
+    """
+    Limita o número de conexões de tenant abertas por processo.
+
+    As conexões do Django são por thread, então cada par (thread, alias) conta
+    como uma conexão. Quando o total passa de `max_connections`, os pares
+    menos usados recentemente e ociosos (alias fora de uso por uma request em
+    andamento) são despejados: se pertencem à thread atual são fechados na
+    hora; se pertencem a outra thread, ficam pendentes e essa thread os fecha
+    no próximo request_started/request_finished.
+
+    Contadores: hits (conexão já aberta), misses (nova conexão) e evictions.
+    """
+
+    def __init__(self, max_connections=None):
+        self.max_connections = (
+            max_connections if max_connections is not None
+            else getattr(settings, 'TENANT_MAX_CONNECTIONS', 50)
+        )
+        self._lock = threading.Lock()
+        self._abertas = OrderedDict()  # (thread_id, alias) -> último uso (ordem LRU)
+        self._em_uso = {}              # thread_id -> {alias: contagem de usos ativos}
+        self._pendentes = {}           # thread_id -> aliases a fechar por essa thread
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, alias):
+        """Registra o uso de `alias` pela thread atual e aplica o limite do pool."""
+        tid = threading.get_ident()
+        chave = (tid, alias)
+        with self._lock:
+            if chave in self._abertas:
+                self.hits += 1
+                self._abertas.move_to_end(chave)
+            else:
+                self.misses += 1
+            self._abertas[chave] = time.monotonic()
+            em_uso = self._em_uso.setdefault(tid, {})
+            em_uso[alias] = em_uso.get(alias, 0) + 1
+            pendentes = self._pendentes.get(tid)
+            if pendentes:
+                pendentes.discard(alias)
+            vitimas = self._selecionar_vitimas()
+
+        self._fechar_locais(vitimas)
+
+    def touch(self, alias):
+        """
+        Registra uso de `alias` sem marcá-lo como em uso (ex.: réplica escolhida
+        pelo router a cada query). Conta para o limite e para o LRU.
+        """
+        tid = threading.get_ident()
+        chave = (tid, alias)
+        with self._lock:
+            if chave in self._abertas:
+                self.hits += 1
+                self._abertas.move_to_end(chave)
+                self._abertas[chave] = time.monotonic()
+                return
+            self.misses += 1
+            self._abertas[chave] = time.monotonic()
+            vitimas = self._selecionar_vitimas()
+
+        self._fechar_locais(vitimas)
+
+    def release(self, alias):
+        """Encerra um uso de `alias` aberto por acquire() (ex.: saída do tenant_context)."""
+        tid = threading.get_ident()
+        with self._lock:
+            em_uso = self._em_uso.get(tid)
+            if not em_uso or alias not in em_uso:
+                return
+            em_uso[alias] -= 1
+            if em_uso[alias] <= 0:
+                del em_uso[alias]
+
+    def release_thread(self):
+        """
+        Fim de uso da thread atual (fim da request ou da tarefa em background):
+        libera os aliases em uso, fecha o que ficou pendente para esta thread e
+        esquece conexões que o próprio Django já fechou (CONN_MAX_AGE).
+        """
+        tid = threading.get_ident()
+        with self._lock:
+            self._em_uso.pop(tid, None)
+            pendentes = self._pendentes.pop(tid, set())
+            for alias in self._aliases_fechados(tid):
+                self._abertas.pop((tid, alias), None)
+            vitimas = self._selecionar_vitimas()
+
+        for alias in pendentes:
+            self._fechar(alias)
+        self._fechar_locais(vitimas)
+
+    def close_pending(self):
+        """Fecha as conexões despejadas desta thread sem liberar as que estão em uso."""
+        tid = threading.get_ident()
+        with self._lock:
+            pendentes = self._pendentes.pop(tid, set())
+        for alias in pendentes:
+            self._fechar(alias)
+
+    def forget_thread(self):
+        """Fecha e esquece todas as conexões de tenant da thread atual (ex.: worker que vai terminar)."""
+        tid = threading.get_ident()
+        with self._lock:
+            aliases = [alias for (t, alias) in self._abertas if t == tid]
+            for alias in aliases:
+                del self._abertas[(tid, alias)]
+            self._em_uso.pop(tid, None)
+            aliases.extend(self._pendentes.pop(tid, set()))
+        for alias in aliases:
+            self._fechar(alias)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_connections': self.max_connections,
+                'abertas': len(self._abertas),
+                'pendentes': sum(len(p) for p in self._pendentes.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    # --- internos (chamados com o lock adquirido) ---
+
+    def _selecionar_vitimas(self):
+        """Remove do pool os pares LRU ociosos até respeitar o limite. Retorna os da thread atual."""
+        excesso = len(self._abertas) - self.max_connections
+        if excesso <= 0:
+            return []
+
+        tid_atual = threading.get_ident()
+        locais = []
+        for chave in list(self._abertas):
+            if excesso <= 0:
+                break
+            tid, alias = chave
+            if self._em_uso.get(tid, {}).get(alias):
+                continue
+            del self._abertas[chave]
+            self.evictions += 1
+            excesso -= 1
+            if tid == tid_atual:
+                locais.append(alias)
+            else:
+                self._pendentes.setdefault(tid, set()).add(alias)
+
+        if excesso > 0:
+            logger.warning(
+                "Pool de tenants acima do limite (%s) com todas as conexões em uso",
+                self.max_connections
+            )
+        return locais
+
+    def _aliases_fechados(self, tid):
+        aliases = [alias for (t, alias) in self._abertas if t == tid]
+        return [
+            alias for alias in aliases
+            if alias not in connections.databases or connections[alias].connection is None
+        ]
+
+    # --- fechamento (fora do lock) ---
+
+    def _fechar_locais(self, aliases):
+        for alias in aliases:
+            self._fechar(alias)
+
+    def _fechar(self, alias):
+        if alias not in connections.databases:
+            return
+        conn = connections[alias]
+        if conn.in_atomic_block:
+            # Nunca fecha uma conexão no meio de uma transação; tenta de novo depois
+            with self._lock:
+                self._pendentes.setdefault(threading.get_ident(), set()).add(alias)
+            return
+        try:
+            conn.close()
+            logger.debug("Conexão ociosa %s fechada pelo pool de tenants", alias)
+        except Exception as e:
+            logger.warning(f"Erro fechando conexão {alias}: {e}")
+
+
+tenant_connections = TenantConnectionManager()
+
+
+@receiver(request_started)
+def _fechar_pendentes(sender, **kwargs):
+    tenant_connections.close_pending()
+
+
+@receiver(request_finished)
+def _liberar_thread(sender, **kwargs):
+    tenant_connections.release_thread()
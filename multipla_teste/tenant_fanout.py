@@ -0,0 +1,221 @@
+# multipla_teste/tenant_fanout.py
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.db import connections
+
+from .tenant_connections import tenant_connections
+from .tenant_registry import TenantDescriptor
+from .tenant_utils import default_db_context, tenant_context
+
+logger = logging.getLogger(__name__)
+
+# Status possíveis de um TenantResult
+OK = 'ok'
+ERRO = 'erro'
+TIMEOUT = 'timeout'
+# Cancelado antes de começar: não é entregue, vai para resumo.nao_executados
+NAO_EXECUTADO = 'nao_executado'
+
+# Resultado de um tenant, entregue assim que ele termina
+TenantResult = namedtuple('TenantResult', ['empresa', 'status', 'result', 'error', 'duracao'])
+
+
+class FanoutResumo:
+    """
+    Resumo de uma execução cross-tenant, preenchido enquanto os resultados saem.
+    `nao_executados` lista as empresas que não chegaram a rodar (cancelamento
+    ou prazo total esgotado); `interrompidos`, as que ainda estavam rodando
+    quando a execução parou e ficaram sem resposta; `completo` indica se todos
+    os tenants responderam.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.ok = 0
+        self.erros = 0
+        self.timeouts = 0
+        self.nao_executados = []
+        self.interrompidos = []
+        self.cancelado = False
+        self.duracao = 0.0
+
+    @property
+    def completo(self):
+        return self.ok == self.total
+
+    def as_dict(self):
+        return {
+            'total': self.total,
+            'ok': self.ok,
+            'erros': self.erros,
+            'timeouts': self.timeouts,
+            'nao_executados': [e.id for e in self.nao_executados],
+            'interrompidos': [e.id for e in self.interrompidos],
+            'cancelado': self.cancelado,
+            'completo': self.completo,
+            'duracao': round(self.duracao, 3),
+        }
+
+
+def _carregar_empresas():
+    from empresas.models import Empresa
+
+    with default_db_context():
+        # Empresas com banco ainda em provisionamento ficam de fora
+        rows = (
+            Empresa.objects.filter(status_provisionamento=Empresa.STATUS_PRONTO)
+            .order_by('id').values('id', 'nome')
+        )
+        return [
+            TenantDescriptor(id=row['id'], nome=row['nome'], alias=f"tenant_{row['id']}")
+            for row in rows
+        ]
+
+
+class TenantFanout:
+    """
+    Executa `fn(empresa)` em cada tenant e entrega os resultados à medida que terminam.
+
+    - max_workers: tenants consultados ao mesmo tempo (TENANT_FANOUT_MAX_WORKERS).
+      Só há no máximo max_workers tarefas submetidas por vez, então cancelar
+      não deixa fila para trás.
+    - timeout: prazo por tenant em segundos (TENANT_FANOUT_TIMEOUT). Vira
+      statement_timeout no PostgreSQL e, se o tenant não responder a tempo,
+      é reportado como TIMEOUT sem segurar os demais.
+    - deadline: prazo total da execução em segundos (orçamento da request).
+      Ao estourar, os tenants ainda não iniciados vão para resumo.nao_executados
+      e os que estavam rodando, para resumo.interrompidos.
+    - cancel_event: threading.Event externo; também é possível chamar cancel()
+      ou simplesmente parar de iterar (fechar o gerador cancela o restante).
+
+    Cada thread do executor fecha as conexões que abriu ao terminar o tenant.
+
+    Usage:
+        fanout = TenantFanout(lambda emp: ContaAPagar.objects.count(), max_workers=16, timeout=2)
+        for r in fanout:
+            ...
+        fanout.resumo.as_dict()
+    """
+
+    def __init__(self, fn, empresas=None, max_workers=None, timeout=None, deadline=None, cancel_event=None):
+        self.fn = fn
+        self.empresas = list(empresas) if empresas is not None else None
+        self.max_workers = max(1, max_workers or getattr(settings, 'TENANT_FANOUT_MAX_WORKERS', 8))
+        self.timeout = timeout if timeout is not None else getattr(settings, 'TENANT_FANOUT_TIMEOUT', None)
+        self.deadline = deadline
+        self.cancel_event = cancel_event or threading.Event()
+        self.resumo = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def __iter__(self):
+        empresas = self.empresas if self.empresas is not None else _carregar_empresas()
+        self.resumo = resumo = FanoutResumo(len(empresas))
+        inicio = time.monotonic()
+        limite_total = inicio + self.deadline if self.deadline else None
+
+        fila = list(reversed(empresas))
+        em_andamento = {}  # future -> (empresa, iniciado_em)
+        parar = threading.Event()  # sinaliza às threads que nada novo deve começar
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='tenant-fanout')
+
+        try:
+            while fila or em_andamento:
+                agora = time.monotonic()
+                if self.cancel_event.is_set() or (limite_total and agora >= limite_total):
+                    resumo.cancelado = self.cancel_event.is_set()
+                    break
+
+                while fila and len(em_andamento) < self.max_workers:
+                    empresa = fila.pop()
+                    future = executor.submit(self._executar, empresa, parar)
+                    em_andamento[future] = (empresa, time.monotonic())
+
+                espera = self._proxima_espera(em_andamento, limite_total)
+                prontos, _ = wait(em_andamento, timeout=espera, return_when=FIRST_COMPLETED)
+
+                for future in prontos:
+                    empresa, iniciado_em = em_andamento.pop(future)
+                    resultado = future.result()
+                    if resultado.status == NAO_EXECUTADO:
+                        resumo.nao_executados.append(empresa)
+                        continue
+                    if resultado.status == OK:
+                        resumo.ok += 1
+                    else:
+                        resumo.erros += 1
+                    yield resultado
+
+                # Tenants que passaram do prazo: reporta e segue sem esperar a thread
+                agora = time.monotonic()
+                for future, (empresa, iniciado_em) in list(em_andamento.items()):
+                    if self.timeout and agora - iniciado_em >= self.timeout:
+                        del em_andamento[future]
+                        resumo.timeouts += 1
+                        logger.warning("Tenant %s excedeu o prazo de %ss", empresa.id, self.timeout)
+                        yield TenantResult(empresa, TIMEOUT, None, 'timeout', agora - iniciado_em)
+        finally:
+            # Gerador fechado, cancelado ou prazo total esgotado: nada novo começa
+            parar.set()
+            resumo.nao_executados.extend(reversed(fila))
+            resumo.interrompidos.extend(empresa for empresa, _ in em_andamento.values())
+            executor.shutdown(wait=False, cancel_futures=True)
+            resumo.duracao = time.monotonic() - inicio
+
+    def _proxima_espera(self, em_andamento, limite_total):
+        """Tempo até o próximo prazo (por tenant ou total) vencer."""
+        prazos = []
+        if self.timeout:
+            prazos.extend(iniciado_em + self.timeout for _, iniciado_em in em_andamento.values())
+        if limite_total:
+            prazos.append(limite_total)
+        if not prazos:
+            return None
+        return max(0, min(prazos) - time.monotonic())
+
+    def _executar(self, empresa, parar):
+        """Roda na thread do executor: aplica o prazo, executa fn e fecha as conexões da thread."""
+        inicio = time.monotonic()
+        if parar.is_set() or self.cancel_event.is_set():
+            return TenantResult(empresa, NAO_EXECUTADO, None, 'cancelado', 0.0)
+        try:
+            with tenant_context(empresa) as tenant, self._statement_timeout(f"tenant_{tenant.id}"):
+                resultado = self.fn(tenant)
+            return TenantResult(empresa, OK, resultado, None, time.monotonic() - inicio)
+        except Exception as e:
+            logger.error(f"Erro no tenant {empresa.id}: {e}")
+            return TenantResult(empresa, ERRO, None, str(e), time.monotonic() - inicio)
+        finally:
+            # Threads do executor não passam pelo ciclo de request: fecha tudo que abriram
+            tenant_connections.forget_thread()
+            connections.close_all()
+
+    def _statement_timeout(self, alias):
+        """
+        Aplica o prazo como statement_timeout antes da primeira query do tenant.
+        Feito via execute_wrapper para não abrir conexão se fn não consultar o banco.
+        """
+        if not self.timeout or alias not in connections.databases:
+            return nullcontext()
+        conn = connections[alias]
+        if conn.vendor != 'postgresql':
+            return nullcontext()
+
+        aplicado = []
+        timeout_ms = int(self.timeout * 1000)
+
+        def wrapper(execute, sql, params, many, context):
+            if not aplicado:
+                aplicado.append(True)
+                # Cursor cru do driver: não passa de novo pelos wrappers
+                context['cursor'].cursor.execute("SET statement_timeout = %s", [timeout_ms])
+            return execute(sql, params, many, context)
+
+        return conn.execute_wrapper(wrapper)
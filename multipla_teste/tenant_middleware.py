@@ -1,11 +1,14 @@
-
 # multipla_teste/tenant_middleware.py
 from django.utils.deprecation import MiddlewareMixin
-from .tenant_utils import set_current_tenant
 from django.http import JsonResponse
 
-from .tenant_utils import set_current_tenant,ensure_tenant_db
 from empresas.models import Empresa
+
+from .tenant_utils import set_current_tenant
+from .tenant_registry import tenant_registry
+from .tenant_connections import tenant_connections
+from .tenant_replicas import limpar_estado_request
+from .core.access import attach_access_context
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,9 +18,14 @@ class TenantMiddleware(MiddlewareMixin):
         """
         Middleware para configurar o tenant baseado no header X-Company-Id.
         Se o header for inválido ou não corresponder a uma Empresa, retorna 400.
+        A empresa é resolvida pelo tenant_registry (cache em processo), então
+        o banco default só é consultado no primeiro acesso ou após expirar o TTL.
         """
         # Limpa o tenant atual no início de cada request
         set_current_tenant(None)
+        limpar_estado_request()
+        # Header interpretado uma vez; mixin e permissões reaproveitam (core/access.py)
+        attach_access_context(request)
 
         company_id = request.headers.get('X-Company-Id')
         if not company_id:
@@ -25,6 +33,11 @@ class TenantMiddleware(MiddlewareMixin):
             logger.debug("Header X-Company-Id não encontrado")
             return  # continua no banco default
 
+        if company_id.strip().lower() == 'all':
+            # Listagem de todas as empresas: cada view faz o fan-out pelos tenants
+            logger.debug("X-Company-Id: all → sem tenant na request")
+            return
+
         # Valida se é inteiro
         try:
             company_id_int = int(company_id)
@@ -35,18 +48,28 @@ class TenantMiddleware(MiddlewareMixin):
                 status=400
             )
 
-        # Busca a empresa
-        try:
-            empresa = Empresa.objects.get(id=company_id_int)
-        except Empresa.DoesNotExist:
+        # Empresas criadas em outro processo: recarrega o registry se o carimbo de versão mudou
+        tenant_registry.refresh_if_changed()
+
+        # Busca a empresa (registry já registra o alias do banco no primeiro acesso)
+        tenant = tenant_registry.get(company_id_int)
+        if tenant is None:
             logger.error(f"Empresa não encontrada para ID: {company_id_int}")
             return JsonResponse(
                 {"detail": f"Empresa não encontrada para ID: {company_id_int}"},
                 status=400
             )
 
-        # Configura o tenant
-        ensure_tenant_db(empresa)
-        set_current_tenant(empresa)
-        logger.info(f"Tenant configurado para empresa: {empresa.nome} (ID: {empresa.id})")
-        # segue para o view normalmente
\ No newline at end of file
+        if tenant.status != Empresa.STATUS_PRONTO:
+            logger.warning("Empresa %s com banco em provisionamento (%s)", tenant.id, tenant.status)
+            return JsonResponse(
+                {"detail": "O banco da empresa ainda está sendo provisionado",
+                 "status_provisionamento": tenant.status},
+                status=503
+            )
+
+        # Configura o tenant e registra o uso da conexão no pool
+        set_current_tenant(tenant)
+        tenant_connections.acquire(tenant.alias)
+        logger.debug("Tenant configurado para empresa: %s (ID: %s)", tenant.nome, tenant.id)
+        # segue para o view normalmente
@@ -0,0 +1,160 @@
+# multipla_teste/tenant_migrations.py
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+logger = logging.getLogger(__name__)
+
+# Status de cada tenant no relatório
+ATUALIZADO = 'atualizado'
+MIGRADO = 'migrado'
+ERRO = 'erro'
+
+
+class PlanoMigracoes:
+    """
+    Grafo de migrations em disco, carregado uma única vez por execução.
+
+    `pendentes(alias)` compara as linhas de django_migrations do tenant com o
+    grafo e devolve o que falta aplicar, sem rodar o migrate. Migrations
+    squashed contam como aplicadas quando todas as que elas substituem estão
+    em django_migrations (mesma regra do MigrationLoader do Django).
+    """
+
+    def __init__(self, app_label=None):
+        self.loader = MigrationLoader(None, ignore_no_migrations=True)
+        graph = self.loader.graph
+        alvos = [no for no in graph.leaf_nodes() if app_label is None or no[0] == app_label]
+        self.necessarias = set()
+        for alvo in alvos:
+            self.necessarias.update(graph.forwards_plan(alvo))
+
+    def pendentes(self, alias):
+        recorder = MigrationRecorder(connections[alias])
+        if not recorder.has_table():
+            return sorted(self.necessarias)
+
+        aplicadas = set(recorder.applied_migrations())
+        for chave, migration in self.loader.replacements.items():
+            if set(migration.replaces) <= aplicadas:
+                aplicadas.add(chave)
+        return sorted(self.necessarias - aplicadas)
+
+
+def _inicializar_worker():
+    """Initializer dos processos filhos (spawn): cada um sobe o seu próprio Django."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'multipla_teste.settings')
+    django.setup()
+
+
+def _migrar_tenant(alias, config, app_label, verbosity):
+    """Executa o migrate de um tenant. Roda no processo filho ou, com --jobs 1, no próprio processo."""
+    from django.core.management import call_command
+
+    settings.DATABASES[alias] = config
+    saida = StringIO()
+    inicio = time.monotonic()
+    try:
+        args = [app_label] if app_label else []
+        call_command('migrate', *args, database=alias, interactive=False,
+                     verbosity=verbosity, stdout=saida)
+        return {'alias': alias, 'status': MIGRADO, 'erro': None,
+                'duracao': time.monotonic() - inicio, 'saida': saida.getvalue()}
+    except Exception as e:
+        return {'alias': alias, 'status': ERRO, 'erro': str(e),
+                'duracao': time.monotonic() - inicio, 'saida': saida.getvalue()}
+    finally:
+        connections.close_all()
+
+
+def migrar_tenants(aliases, jobs=1, app_label=None, force=False, verbosity=0, on_result=None):
+    """
+    Migra os tenants informados (aliases já registrados em settings.DATABASES).
+
+    - Tenants sem migrations pendentes são pulados (a não ser com force=True).
+    - jobs > 1 migra em processos separados (ProcessPoolExecutor com spawn:
+      nenhum processo filho herda conexões abertas do pai).
+    - on_result(resultado) é chamado para cada tenant assim que ele termina.
+
+    Retorna a lista de resultados: alias, status, pendentes, erro e duracao.
+    """
+    plano = PlanoMigracoes(app_label)
+    resultados = []
+    a_migrar = []
+
+    def publicar(resultado):
+        resultados.append(resultado)
+        if on_result:
+            on_result(resultado)
+
+    for alias in aliases:
+        inicio = time.monotonic()
+        try:
+            pendentes = plano.pendentes(alias)
+        except Exception as e:
+            publicar({'alias': alias, 'status': ERRO, 'pendentes': None, 'erro': str(e),
+                      'duracao': time.monotonic() - inicio})
+            continue
+        finally:
+            connections[alias].close()
+
+        if pendentes or force:
+            a_migrar.append((alias, len(pendentes)))
+        else:
+            publicar({'alias': alias, 'status': ATUALIZADO, 'pendentes': 0, 'erro': None,
+                      'duracao': time.monotonic() - inicio})
+
+    if jobs <= 1:
+        for alias, qtd in a_migrar:
+            resultado = _migrar_tenant(alias, settings.DATABASES[alias], app_label, verbosity)
+            resultado['pendentes'] = qtd
+            publicar(resultado)
+        return resultados
+
+    # Nada aberto no pai enquanto os filhos migram
+    connections.close_all()
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=contexto, initializer=_inicializar_worker) as executor:
+        futures = {
+            executor.submit(_migrar_tenant, alias, settings.DATABASES[alias], app_label, verbosity): (alias, qtd)
+            for alias, qtd in a_migrar
+        }
+        for future in as_completed(futures):
+            alias, qtd = futures[future]
+            try:
+                resultado = future.result()
+            except Exception as e:
+                logger.exception(f"Processo de migração do {alias} falhou")
+                resultado = {'alias': alias, 'status': ERRO, 'erro': str(e), 'duracao': 0.0}
+            resultado['pendentes'] = qtd
+            publicar(resultado)
+
+    return resultados
+
+
+def escrever_relatorio(command, resultados, duracao_total):
+    """Relatório por tenant para os commands de migração (ordenado pelos mais lentos)."""
+    command.stdout.write(command.style.MIGRATE_HEADING("\n=== Relatório de migração dos tenants ==="))
+    for r in sorted(resultados, key=lambda r: r['duracao'], reverse=True):
+        pendentes = '-' if r.get('pendentes') is None else r['pendentes']
+        linha = f"{r['alias']:<20} {r['status']:<11} pendentes={pendentes:<4} {r['duracao']:.2f}s"
+        if r['status'] == ERRO:
+            command.stdout.write(command.style.ERROR(f"{linha}  {r['erro']}"))
+        else:
+            command.stdout.write(linha)
+
+    totais = {status: sum(1 for r in resultados if r['status'] == status) for status in (ATUALIZADO, MIGRADO, ERRO)}
+    command.stdout.write(
+        f"\nTenants: {len(resultados)}  Atualizados: {totais[ATUALIZADO]}  "
+        f"Migrados: {totais[MIGRADO]}  Erros: {totais[ERRO]}  Tempo total: {duracao_total:.2f}s"
+    )
@@ -0,0 +1,249 @@
+# multipla_teste/tenant_registry.py
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from empresas.models import Empresa
+
+logger = logging.getLogger(__name__)
+
+# Descritor leve do tenant: é o que fica em get_current_tenant() durante a request.
+# Expõe apenas o necessário para o roteamento (id, nome, alias do banco e
+# status do provisionamento do banco).
+TenantDescriptor = namedtuple('TenantDescriptor', ['id', 'nome', 'alias', 'status'], defaults=(Empresa.STATUS_PRONTO,))
+
+
+def _carregar_empresa(empresa_id):
+    """
+    Loader padrão: busca a empresa no banco default e registra o alias do tenant.
+    Retorna None se a empresa não existir.
+    """
+    from .tenant_utils import ensure_tenant_db
+
+    row = Empresa.objects.filter(id=empresa_id).values('id', 'nome', 'status_provisionamento').first()
+    if row is None:
+        return None
+
+    descriptor = TenantDescriptor(
+        id=row['id'], nome=row['nome'], alias=f"tenant_{row['id']}", status=row['status_provisionamento']
+    )
+    ensure_tenant_db(descriptor)
+    return descriptor
+
+
+def _versao(total, maior_id, ultimo_provisionamento):
+    return (total, maior_id, ultimo_provisionamento)
+
+
+def _carregar_todas():
+    """
+    Bulk loader padrão: todas as empresas numa única query.
+    Retorna (versao, descritores); a versão é calculada sobre as mesmas linhas.
+    """
+
+    rows = list(Empresa.objects.order_by('id').values('id', 'nome', 'status_provisionamento', 'provisionado_em'))
+    descriptors = [
+        TenantDescriptor(id=row['id'], nome=row['nome'], alias=f"tenant_{row['id']}",
+                         status=row['status_provisionamento'])
+        for row in rows
+    ]
+    provisionamentos = [row['provisionado_em'] for row in rows if row['provisionado_em']]
+    versao = _versao(
+        len(rows),
+        rows[-1]['id'] if rows else None,
+        max(provisionamentos) if provisionamentos else None,
+    )
+    return versao, descriptors
+
+
+def _versao_empresas():
+    """
+    Carimbo de versão barato do cadastro de empresas: muda quando uma empresa
+    é criada/removida ou termina de ser provisionada.
+    """
+    from django.db.models import Count, Max
+
+    agg = Empresa.objects.aggregate(total=Count('id'), maior_id=Max('id'), ultimo=Max('provisionado_em'))
+    return _versao(agg['total'], agg['maior_id'], agg['ultimo'])
+
+
+class TenantRegistry:
+    """
+    Cache em processo de empresa_id -> TenantDescriptor, com TTL e despejo LRU.
+
+    Evita o Empresa.objects.get() no banco default a cada request. As entradas
+    são invalidadas pelos sinais post_save/post_delete de empresas.Empresa
+    (ver receivers no fim deste módulo) e expiram após TENANT_REGISTRY_TTL
+    segundos, o que cobre alterações feitas por outros processos.
+
+    load_all() carrega todas as empresas de uma vez (no boot do worker e nos
+    commands que percorrem os tenants) e guarda um carimbo de versão.
+    refresh_if_changed() compara esse carimbo com o banco no máximo a cada
+    TENANT_REGISTRY_VERSION_INTERVAL segundos e recarrega se houver tenant novo.
+    """
+
+    def __init__(self, ttl=None, max_size=None, loader=None, bulk_loader=None,
+                 version_loader=None, version_interval=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, 'TENANT_REGISTRY_TTL', 300)
+        self.max_size = max_size if max_size is not None else getattr(settings, 'TENANT_REGISTRY_MAX_SIZE', 1024)
+        self.version_interval = (
+            version_interval if version_interval is not None
+            else getattr(settings, 'TENANT_REGISTRY_VERSION_INTERVAL', 30)
+        )
+        self._loader = loader or _carregar_empresa
+        self._bulk_loader = bulk_loader or _carregar_todas
+        self._version_loader = version_loader or _versao_empresas
+        self._entries = OrderedDict()  # empresa_id -> (descriptor, expira_em)
+        self._lock = threading.Lock()
+        self.versao = None
+        self._proxima_verificacao = 0.0
+
+    def get(self, empresa_id):
+        """
+        Retorna o descritor do tenant ou None se a empresa não existir.
+        Em caso de miss (ou entrada expirada), consulta o loader uma única vez.
+        """
+        agora = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(empresa_id)
+            if entry is not None:
+                descriptor, expira_em = entry
+                if expira_em > agora:
+                    self._entries.move_to_end(empresa_id)
+                    return descriptor
+                del self._entries[empresa_id]
+
+        # Loader fora do lock: não serializa as requests enquanto o banco responde
+        descriptor = self._loader(empresa_id)
+        if descriptor is None:
+            return None
+        if descriptor.status != Empresa.STATUS_PRONTO:
+            # Banco ainda em provisionamento: não cacheia, para liberar assim que ficar pronto
+            return descriptor
+
+        with self._lock:
+            self._entries[empresa_id] = (descriptor, agora + self.ttl)
+            self._entries.move_to_end(empresa_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return descriptor
+
+    def load_all(self):
+        """
+        Carrega todas as empresas numa única query, registra os aliases em
+        settings.DATABASES e preenche o cache com as que já estão prontas.
+        Retorna a lista de descritores.
+        """
+        from .tenant_utils import ensure_tenant_db
+
+        versao, descriptors = self._bulk_loader()
+        for descriptor in descriptors:
+            ensure_tenant_db(descriptor)
+
+        expira_em = time.monotonic() + self.ttl
+        with self._lock:
+            for descriptor in descriptors:
+                if descriptor.status != Empresa.STATUS_PRONTO:
+                    self._entries.pop(descriptor.id, None)
+                    continue
+                self._entries[descriptor.id] = (descriptor, expira_em)
+                self._entries.move_to_end(descriptor.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self.versao = versao
+            self._proxima_verificacao = time.monotonic() + self.version_interval
+
+        logger.info("Registry de tenants carregado: %s empresa(s)", len(descriptors))
+        return descriptors
+
+    def refresh_if_changed(self):
+        """
+        Recarrega o registry se o carimbo de versão no banco mudou.
+        Consulta o banco no máximo uma vez por version_interval; retorna True se recarregou.
+        """
+        if not self.version_interval:
+            return False
+        agora = time.monotonic()
+        with self._lock:
+            if agora < self._proxima_verificacao:
+                return False
+            # Só uma thread por intervalo vai ao banco
+            self._proxima_verificacao = agora + self.version_interval
+            versao_atual = self.versao
+
+        if versao_atual is not None and self._version_loader() == versao_atual:
+            return False
+        self.load_all()
+        return True
+
+    def invalidate(self, empresa_id):
+        with self._lock:
+            self._entries.pop(empresa_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, empresa_id):
+        return empresa_id in self._entries
+
+
+tenant_registry = TenantRegistry()
+
+
+def carregar_tenants_no_boot():
+    """
+    Chamado pelo wsgi/asgi ao subir o worker: carrega o registry e, se
+    TENANT_WARMUP_CONNECTIONS > 0, já abre conexões para esses tenants.
+    Falhas só são logadas; o registry continua funcionando sob demanda.
+    """
+    from django.db import connections
+
+    try:
+        descriptors = tenant_registry.load_all()
+        limite = getattr(settings, 'TENANT_WARMUP_CONNECTIONS', 0)
+        if limite:
+            aquecer_conexoes(descriptors, limite)
+    except Exception as e:
+        logger.warning(f"Não foi possível carregar os tenants no boot: {e}")
+    finally:
+        # Nada aberto pelo boot pode ser herdado por um fork (gunicorn --preload)
+        if not getattr(settings, 'TENANT_WARMUP_CONNECTIONS', 0):
+            connections.close_all()
+
+
+def aquecer_conexoes(descriptors, limite):
+    """
+    Abre conexões para até `limite` tenants prontos na thread atual,
+    registrando-as no pool (tenant_connections). Retorna {alias: segundos}.
+    """
+    from django.db import connections
+    from .tenant_connections import tenant_connections
+
+    tempos = {}
+    for descriptor in [d for d in descriptors if d.status == Empresa.STATUS_PRONTO][:limite]:
+        inicio = time.monotonic()
+        try:
+            tenant_connections.acquire(descriptor.alias)
+            connections[descriptor.alias].ensure_connection()
+            tempos[descriptor.alias] = time.monotonic() - inicio
+        except Exception as e:
+            logger.warning(f"Erro aquecendo conexão {descriptor.alias}: {e}")
+        finally:
+            tenant_connections.release(descriptor.alias)
+    return tempos
+
+
+@receiver([post_save, post_delete], sender='empresas.Empresa')
+def invalidar_tenant(sender, instance, **kwargs):
+    """Remove a empresa alterada/excluída do registry deste processo."""
+    tenant_registry.invalidate(instance.pk)
+    logger.debug("Tenant %s invalidado no registry", instance.pk)
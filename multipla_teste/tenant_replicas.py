@@ -0,0 +1,165 @@
+# multipla_teste/tenant_replicas.py
+"""
+Réplicas de leitura por tenant (aliases tenant_{id}_ro).
+
+Com TENANT_READ_REPLICA configurado, cada tenant registrado ganha também o
+alias tenant_{id}_ro. O TenantRouter só lê da réplica quando:
+  - a view pediu (ReplicaReadMixin / replica_reads()), p.ex. relatórios e listagens;
+  - não houve escrita no tenant durante a request (leitura após escrita fica no primário);
+  - a conexão primária não está dentro de uma transação;
+  - o atraso da réplica está abaixo de TENANT_REPLICA_MAX_LAG.
+Em qualquer outro caso a leitura vai para o primário.
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .tenant_connections import tenant_connections
+
+logger = logging.getLogger(__name__)
+
+SUFIXO_REPLICA = '_ro'
+
+_prefer_replica = ContextVar('prefer_replica', default=False)
+_houve_escrita = ContextVar('houve_escrita', default=False)
+
+
+def replica_alias(alias):
+    return f"{alias}{SUFIXO_REPLICA}"
+
+
+def is_replica(alias):
+    return alias.endswith(SUFIXO_REPLICA)
+
+
+def registrar_replica(alias):
+    """
+    Registra tenant_{id}_ro a partir da configuração do primário, sobrescrita
+    por TENANT_READ_REPLICA (ex.: {'HOST': 'replica.interna'}). Sem réplica
+    configurada não faz nada.
+    """
+    overrides = getattr(settings, 'TENANT_READ_REPLICA', None)
+    if not overrides or alias not in settings.DATABASES:
+        return None
+    ro = replica_alias(alias)
+    if ro not in settings.DATABASES:
+        cfg = settings.DATABASES[alias].copy()
+        cfg.update(overrides)
+        cfg['TEST'] = {'MIRROR': alias}
+        settings.DATABASES[ro] = cfg
+    return ro
+
+
+class replica_reads:
+    """
+    Context manager que permite leituras na réplica dentro do bloco
+    (`with` e `async with`, como tenant_context).
+    """
+
+    def __init__(self):
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_prefer_replica.set(True))
+
+    def __exit__(self, exc_type, exc, tb):
+        _prefer_replica.reset(self._tokens.pop())
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+def marcar_escrita():
+    """Chamado pelo router a cada escrita em tenant: o resto da request lê do primário."""
+    if not _houve_escrita.get():
+        _houve_escrita.set(True)
+
+
+def limpar_estado_request():
+    """Início de request: sem preferência por réplica e sem escrita registrada."""
+    _prefer_replica.set(False)
+    _houve_escrita.set(False)
+
+
+def _medir_lag(alias):
+    """Atraso da réplica em segundos (0 se ela já reproduziu todo o WAL recebido)."""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "SELECT CASE"
+            " WHEN NOT pg_is_in_recovery() THEN 0"
+            " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            " END"
+        )
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaLagGuard:
+    """
+    Decide se a réplica pode ser usada. O atraso é medido no máximo uma vez a
+    cada TENANT_REPLICA_LAG_CHECK_INTERVAL segundos por alias; enquanto uma
+    thread mede, as outras usam o último resultado. Erro na medição conta
+    como réplica indisponível.
+    """
+
+    def __init__(self, max_lag=None, intervalo=None, medir=None):
+        self.max_lag = max_lag if max_lag is not None else getattr(settings, 'TENANT_REPLICA_MAX_LAG', 5)
+        self.intervalo = (
+            intervalo if intervalo is not None
+            else getattr(settings, 'TENANT_REPLICA_LAG_CHECK_INTERVAL', 10)
+        )
+        self._medir = medir or _medir_lag
+        self._estado = {}  # alias -> (disponivel, proxima_checagem)
+        self._lock = threading.Lock()
+
+    def disponivel(self, alias):
+        agora = time.monotonic()
+        with self._lock:
+            disponivel, proxima = self._estado.get(alias, (False, 0.0))
+            if agora < proxima:
+                return disponivel
+            # Reserva a checagem para esta thread
+            self._estado[alias] = (disponivel, agora + self.intervalo)
+
+        try:
+            lag = self._medir(alias)
+            disponivel = lag <= self.max_lag
+            if not disponivel:
+                logger.warning("Réplica %s com atraso de %.1fs; lendo do primário", alias, lag)
+        except Exception as e:
+            logger.warning(f"Erro medindo atraso da réplica {alias}: {e}")
+            disponivel = False
+
+        with self._lock:
+            self._estado[alias] = (disponivel, agora + self.intervalo)
+        return disponivel
+
+    def reset(self):
+        with self._lock:
+            self._estado.clear()
+
+
+replica_guard = ReplicaLagGuard()
+
+
+def alias_de_leitura(alias):
+    """Alias de leitura para o primário `alias`: a réplica, se as regras permitirem."""
+    if not _prefer_replica.get() or _houve_escrita.get():
+        return alias
+    ro = replica_alias(alias)
+    if ro not in settings.DATABASES:
+        return alias
+    if connections[alias].in_atomic_block:
+        return alias
+    if not replica_guard.disponivel(ro):
+        return alias
+    tenant_connections.touch(ro)
+    return ro
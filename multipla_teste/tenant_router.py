@@ -1,28 +1,43 @@
 # multipla_teste/tenant_router.py
 
-from threading import local
+from contextvars import ContextVar
 from django.conf import settings
 from django.db import connections
 
-_thread_locals = local()
+from .tenant_replicas import alias_de_leitura, is_replica, marcar_escrita, SUFIXO_REPLICA
+from .tenant_schema import schema_mode
+
+# ContextVar em vez de threading.local: cada task asyncio (e cada hop de
+# sync_to_async, que copia o contexto) enxerga o seu próprio tenant.
+_current_tenant = ContextVar('current_tenant', default=None)
 
 def set_current_tenant(tenant):
     """
-    Define o tenant atual na variável thread-local.
+    Define o tenant atual no contexto de execução.
+    Retorna o token do ContextVar, usado por reset_current_tenant().
+    """
+    return _current_tenant.set(tenant)
+
+def reset_current_tenant(token):
+    """
+    Restaura o tenant que estava ativo antes do set_current_tenant() que gerou o token.
     """
-    _thread_locals.tenant = tenant
+    _current_tenant.reset(token)
 
 def get_current_tenant():
     """
-    Retorna o tenant atual armazenado em thread-local (ou None se não existir).
+    Retorna o tenant atual do contexto de execução (ou None se não existir).
     """
-    return getattr(_thread_locals, 'tenant', None)
+    return _current_tenant.get()
 
 class TenantRouter:
     """
     Roteia ORM para 'tenant_X' apenas para apps scoped. 
     Global apps (auth, contenttypes, sessions, admin, empresas, usuarios)
     continuam no default.
+
+    Com TENANT_MODE = 'schema' tudo vai para o default e o tenant é
+    selecionado pelo search_path da conexão (ver tenant_schema.py).
     """
     SHARED_APPS = {
         'auth',
@@ -32,6 +47,7 @@ class TenantRouter:
         'admin_honeypot',  # se usar outros
         'empresas',
         'usuarios',
+        'exportacoes',  # fila de exportações (um job pode cobrir várias empresas)
     }
 
     def db_for_read(self, model, **hints):
@@ -40,10 +56,11 @@ class TenantRouter:
             return 'default'
         # 2) Se houver tenant ativo e o alias existir, usa tenant_{id}
         tenant = get_current_tenant()
-        if tenant:
+        if tenant and not schema_mode():
             alias = f"tenant_{tenant.id}"
             if alias in settings.DATABASES:
-                return alias
+                # Relatórios/listagens podem ir para a réplica (tenant_replicas.py)
+                return alias_de_leitura(alias)
         # 3) Caso contrário, default
         return 'default'
 
@@ -51,9 +68,10 @@ class TenantRouter:
         if model._meta.app_label in self.SHARED_APPS:
             return 'default'
         tenant = get_current_tenant()
-        if tenant:
+        if tenant and not schema_mode():
             alias = f"tenant_{tenant.id}"
             if alias in settings.DATABASES:
+                marcar_escrita()
                 return alias
         return 'default'
 
@@ -61,10 +79,14 @@ class TenantRouter:
         db_obj1 = getattr(obj1._state, 'db', None)
         db_obj2 = getattr(obj2._state, 'db', None)
         if db_obj1 and db_obj2:
-            return db_obj1 == db_obj2
+            # Objeto lido da réplica pode se relacionar com o do primário
+            return db_obj1.removesuffix(SUFIXO_REPLICA) == db_obj2.removesuffix(SUFIXO_REPLICA)
         return None
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Réplicas recebem o schema pela replicação, nunca por migrate
+        if is_replica(db):
+            return False
         # Migrar shared apps só em default
         if app_label in self.SHARED_APPS:
             return db == 'default'
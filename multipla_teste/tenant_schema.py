@@ -0,0 +1,107 @@
+# multipla_teste/tenant_schema.py
+"""
+Modo schema-por-tenant (TENANT_MODE = 'schema').
+
+Todos os tenants ficam no banco default, cada um no schema "tenant_{id}".
+As requests usam a conexão default e o search_path é trocado conforme o
+tenant atual (ContextVar do tenant_router): assim o número de conexões
+não cresce com a quantidade de tenants.
+
+Os aliases tenant_{id} continuam existindo (search_path fixo nas OPTIONS)
+para migrate, provisionamento e consultas explícitas com .using().
+"""
+import logging
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from . import tenant_router
+
+logger = logging.getLogger(__name__)
+
+MODE_DATABASE = 'database'
+MODE_SCHEMA = 'schema'
+
+
+def tenant_mode():
+    return getattr(settings, 'TENANT_MODE', MODE_DATABASE)
+
+
+def schema_mode():
+    return tenant_mode() == MODE_SCHEMA
+
+
+def schema_name(tenant_id):
+    return f"tenant_{int(tenant_id)}"
+
+
+def search_path_para(tenant):
+    """search_path da conexão para o tenant (public fica por último: apps compartilhados)."""
+    if tenant is None:
+        return 'public'
+    return f'"{schema_name(tenant.id)}", public'
+
+
+def alias_config(tenant_id):
+    """Configuração do alias tenant_{id} no modo schema: mesmo banco do default, search_path fixo."""
+    cfg = settings.DATABASES['default'].copy()
+    options = dict(cfg.get('OPTIONS', {}))
+    options['options'] = f"-c search_path={schema_name(tenant_id)},public"
+    cfg['OPTIONS'] = options
+    return cfg
+
+
+def search_path_wrapper(execute, sql, params, many, context):
+    """
+    execute_wrapper da conexão default: antes de cada query garante que o
+    search_path é o do tenant atual. O valor aplicado fica em cache na
+    conexão, então o SET só roda quando o tenant muda.
+
+    Um SET dentro de transação é desfeito por um rollback, por isso ele só
+    entra no cache quando executado em autocommit.
+    """
+    conn = context['connection']
+    path = search_path_para(tenant_router.get_current_tenant())
+    if getattr(conn, 'tenant_search_path', None) != path:
+        # Cursor cru do driver: não passa de novo pelos wrappers
+        context['cursor'].cursor.execute(f"SET search_path TO {path}")
+        em_transacao = conn.in_atomic_block or not conn.get_autocommit()
+        conn.tenant_search_path = None if em_transacao else path
+    return execute(sql, params, many, context)
+
+
+def sincronizar_search_path(conn):
+    """Aplica o search_path do tenant atual já (ex.: antes de abrir uma transação)."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+@receiver(connection_created)
+def _instalar_search_path(sender, connection, **kwargs):
+    if not schema_mode() or connection.alias != 'default' or connection.vendor != 'postgresql':
+        return
+    # Conexão nova começa com o search_path padrão do servidor
+    connection.tenant_search_path = None
+    if search_path_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(search_path_wrapper)
+
+
+def criar_schema(cursor, tenant_id):
+    """
+    Cria o schema do tenant e a sua própria django_migrations. Sem ela, o
+    migrate pelo alias do tenant enxergaria public.django_migrations pelo
+    search_path e acharia que as migrations já foram aplicadas.
+    """
+    schema = schema_name(tenant_id)
+    cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}"')
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{schema}".django_migrations '
+        '(LIKE public.django_migrations INCLUDING ALL)'
+    )
+    logger.info(f"Schema {schema} criado")
+
+
+def schema_existe(cursor, tenant_id):
+    cursor.execute("SELECT 1 FROM information_schema.schemata WHERE schema_name = %s", [schema_name(tenant_id)])
+    return cursor.fetchone() is not None
@@ -1,45 +1,81 @@
 from django.conf import settings
 from django.db import connections, transaction
-from .tenant_router import set_current_tenant, get_current_tenant
+from .tenant_router import set_current_tenant, get_current_tenant, reset_current_tenant
+from .tenant_connections import tenant_connections
+from .tenant_replicas import is_replica, registrar_replica
+from .tenant_schema import alias_config as schema_alias_config, schema_mode, sincronizar_search_path
 from contextlib import contextmanager
 from empresas.models import Empresa
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
-@contextmanager
-def tenant_context(empresa):
+class tenant_context:
     """
-    Context manager para executar operações em um tenant específico
+    Context manager para executar operações em um tenant específico.
+    Funciona com `with` (views e commands síncronos) e `async with`
+    (views async / tasks asyncio). O tenant fica num ContextVar, então
+    tasks concorrentes e hops de sync_to_async não se misturam.
     Usage:
         with tenant_context(empresa):
             # Operações serão executadas no banco do tenant
             clientes = Cliente.objects.all()
+
+        async with tenant_context(empresa):
+            clientes = await sync_to_async(list)(Cliente.objects.all())
     """
-    old_tenant = get_current_tenant()
-    try:
-        set_current_tenant(empresa)
-        ensure_tenant_db(empresa)
-        yield
-    finally:
-        set_current_tenant(old_tenant)
 
-@contextmanager
-def default_db_context():
+    def __init__(self, empresa):
+        self.empresa = empresa
+        self._pilha = []  # (token, alias) por entrada, permite reentrância
+
+    def __enter__(self):
+        alias = ensure_tenant_db(self.empresa)
+        token = set_current_tenant(self.empresa)
+        tenant_connections.acquire(alias)
+        self._pilha.append((token, alias))
+        return self.empresa
+
+    def __exit__(self, exc_type, exc, tb):
+        token, alias = self._pilha.pop()
+        try:
+            tenant_connections.release(alias)
+        finally:
+            reset_current_tenant(token)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class default_db_context:
     """
-    Context manager para forçar operações no banco default
+    Context manager para forçar operações no banco default.
+    Assim como tenant_context, aceita `with` e `async with`.
     Usage:
         with default_db_context():
             # Operações serão executadas no banco default
             empresas = Empresa.objects.all()
     """
-    old_tenant = get_current_tenant()
-    try:
-        set_current_tenant(None)
-        yield
-    finally:
-        set_current_tenant(old_tenant)
+
+    def __init__(self):
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(set_current_tenant(None))
+
+    def __exit__(self, exc_type, exc, tb):
+        reset_current_tenant(self._tokens.pop())
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
 
 
 def ensure_tenant_db(empresa):
@@ -53,10 +89,16 @@ def ensure_tenant_db(empresa):
     alias = f"tenant_{empresa.id}"
 
     if alias not in settings.DATABASES:
-        base = settings.DATABASES["default"].copy()
-        base["NAME"] = f"multipla_financeiro_tenant_{empresa.id}"
+        if schema_mode():
+            # Mesmo banco do default, schema do tenant no search_path
+            base = schema_alias_config(empresa.id)
+        else:
+            base = settings.DATABASES["default"].copy()
+            base["NAME"] = f"multipla_financeiro_tenant_{empresa.id}"
         settings.DATABASES[alias] = base
         logger.info(f"Banco {alias} configurado dinamicamente")
+        if not schema_mode():
+            registrar_replica(alias)
 
         # Fecha qualquer conexão antiga para este alias
         try:
@@ -68,51 +110,29 @@ def ensure_tenant_db(empresa):
     return alias
 
 
-def aggregate_across_tenants(model_class, queryset_fn, include_empresa_info=True, max_workers=None):
+def aggregate_across_tenants(model_class, queryset_fn, include_empresa_info=True, max_workers=None, timeout=None):
     """
     Agrega dados de todos os tenants disponíveis.
-    Se max_workers for None ou <=1, executa serialmente para evitar contenção.
-    Caso contrário, usa ThreadPoolExecutor para paralelismo.
+    Usa o TenantFanout (multipla_teste/tenant_fanout.py): tenants em paralelo
+    até max_workers (padrão TENANT_FANOUT_MAX_WORKERS) e prazo por tenant.
+    Para consumir os resultados conforme chegam, use TenantFanout diretamente.
     """
-    results = []
+    from .tenant_fanout import OK, TenantFanout
 
     # Carrega lista de empresas no DB default
     with default_db_context():
         empresas = list(Empresa.objects.all())
 
     def process_empresa(empresa):
-        try:
-            with tenant_context(empresa):
-                alias = f"tenant_{empresa.id}"
-                if alias not in connections.databases:
-                    return None
-
-                qs = model_class.objects.using(alias).all()
-                return {
-                    'empresa': empresa,
-                    'result': queryset_fn(qs)
-                }
-        except Exception as e:
-            logger.error(f"Erro no tenant {empresa.id}: {e}")
-            return {
-                'empresa': empresa,
-                'error': str(e)
-            }
-
-    # Escolhe execução: paralela ou serial
-    if max_workers and max_workers > 1:
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(process_empresa, emp): emp for emp in empresas}
-            for future in as_completed(futures):
-                res = future.result()
-                if res:
-                    results.append(res)
-    else:
-        for empresa in empresas:
-            res = process_empresa(empresa)
-            if res:
-                results.append(res)
+        qs = model_class.objects.using(f"tenant_{empresa.id}").all()
+        return queryset_fn(qs)
 
+    results = []
+    for res in TenantFanout(process_empresa, empresas=empresas, max_workers=max_workers, timeout=timeout):
+        if res.status == OK:
+            results.append({'empresa': res.empresa, 'result': res.result})
+        else:
+            results.append({'empresa': res.empresa, 'error': res.error})
     return results
 
 
@@ -163,6 +183,7 @@ def get_tenant_stats():
         'tenants_configurados': 0,
         'bancos_default': [],
         'bancos_tenant': [],
+        'pool_conexoes': tenant_connections.stats(),
     }
 
     with default_db_context():
@@ -171,7 +192,7 @@ def get_tenant_stats():
     for alias, config in settings.DATABASES.items():
         if alias == 'default':
             stats['bancos_default'].append(config['NAME'])
-        elif alias.startswith('tenant_'):
+        elif alias.startswith('tenant_') and alias.split('_')[1].isdigit() and not is_replica(alias):
             stats['bancos_tenant'].append({
                 'alias': alias,
                 'database': config['NAME'],
@@ -192,14 +213,20 @@ def tenant_transaction(empresa):
             fatura.save()
     """
     alias = ensure_tenant_db(empresa)
-    old_tenant = get_current_tenant()
+    token = set_current_tenant(empresa)
+    # No modo schema a transação roda na conexão default, com o search_path do tenant
+    alias_transacao = 'default' if schema_mode() else alias
 
     try:
-        set_current_tenant(empresa)
-        with transaction.atomic(using=alias):
+        tenant_connections.acquire(alias)
+        if schema_mode():
+            # Troca o search_path antes do BEGIN, para o SET não depender do commit
+            sincronizar_search_path(connections['default'])
+        with transaction.atomic(using=alias_transacao):
             yield
     finally:
-        set_current_tenant(old_tenant)
+        tenant_connections.release(alias)
+        reset_current_tenant(token)
 
 
 def validate_cross_tenant_access(user, empresa_id):
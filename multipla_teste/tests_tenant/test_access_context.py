@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from multipla_teste.core.access import AccessContext, attach_access_context, get_access_context
+
+
+class _Usuario:
+    pk = 5
+    is_authenticated = True
+
+
+def _contexto(header, empresas=frozenset({20}), roles=None):
+    contexto = AccessContext(header)
+    # Estado já carregado, como depois das 3 queries
+    contexto._tem_perfil, contexto._empresa_padrao_id = True, 10
+    contexto._empresas_acessiveis = frozenset(empresas)
+    contexto._roles = roles or {10: 'leitura', 20: 'admin'}
+    contexto._carregado = True
+    return contexto
+
+
+def _token(pv):
+    token = AccessToken()
+    token['user_id'] = _Usuario.pk
+    token['pad'], token['emp'], token['roles'], token['pv'] = 10, [20], {'10': 'l', '20': 'a'}, pv
+    return token
+
+
+class AccessContextTests(SimpleTestCase):
+    def test_empresa_atual_pelo_header_ou_padrao(self):
+        self.assertEqual(_contexto('20').company_id(), 20)
+        self.assertEqual(_contexto('').company_id(), 10)
+        self.assertEqual(_contexto('all').company_id(), 10)
+        for header in ('30', 'abc'):
+            with self.assertRaises(PermissionDenied):
+                _contexto(header).company_id()
+
+    def test_papel_na_empresa_atual(self):
+        self.assertEqual(_contexto('20').role, 'admin')
+        self.assertEqual(_contexto('').role, 'leitura')
+        # Empresa padrão no header só vale se também estiver em empresas_acessiveis
+        self.assertIsNone(_contexto('10').role)
+
+    def test_mesmo_contexto_do_middleware_ate_a_view(self):
+        http_request = APIRequestFactory().get('/', HTTP_X_COMPANY_ID='all')
+        contexto = attach_access_context(http_request)
+        self.assertIs(get_access_context(http_request), contexto)
+        self.assertTrue(contexto.all_companies)
+
+    def test_claims_com_versao_atual_dispensam_o_banco(self):
+        # SimpleTestCase bloqueia queries: qualquer ida ao banco falharia aqui
+        cache.set('permissoes_versao:5', 3)
+        self.addCleanup(cache.delete, 'permissoes_versao:5')
+        contexto = AccessContext('20')
+        contexto.bind_user(_Usuario(), _token(pv=3))
+        self.assertEqual(contexto.company_id(), 20)
+        self.assertEqual(contexto.role, 'admin')
+        self.assertEqual(contexto.accessible_ids, {10, 20})
+
+    def test_claims_com_versao_antiga_sao_ignoradas(self):
+        from usuarios.claims import ler_claims
+
+        cache.set('permissoes_versao:5', 4)
+        self.addCleanup(cache.delete, 'permissoes_versao:5')
+        self.assertIsNone(ler_claims(_token(pv=3)))
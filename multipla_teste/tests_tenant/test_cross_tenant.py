@@ -0,0 +1,64 @@
+from datetime import date
+
+from django.db.models import Q
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from multipla_teste.core.cross_tenant import keyset_q, mesclar_paginas
+from multipla_teste.core.cursors import decode_cursor, encode_cursor
+
+
+class CursorTests(SimpleTestCase):
+    def test_ida_e_volta(self):
+        token = encode_cursor({'v': date(2024, 5, 1), 'e': 3, 'pk': 42})
+        self.assertEqual(decode_cursor(token), {'v': '2024-05-01', 'e': 3, 'pk': 42})
+
+    def test_cursor_invalido_vira_400(self):
+        for token in ('nao-e-base64!', encode_cursor([1, 2])):
+            with self.assertRaises(ValidationError):
+                decode_cursor(token)
+
+
+class KeysetTests(SimpleTestCase):
+    POSICAO = {'v': '2024-05-01', 'e': 5, 'pk': 10}
+
+    def test_desempate_por_empresa_em_ordem_decrescente(self):
+        # Decrescente: empresas de id menor vêm depois da empresa do cursor
+        self.assertEqual(
+            keyset_q('data_pagamento', True, self.POSICAO, 3),
+            Q(data_pagamento__lte='2024-05-01'),
+        )
+        self.assertEqual(
+            keyset_q('data_pagamento', True, self.POSICAO, 7),
+            Q(data_pagamento__lt='2024-05-01'),
+        )
+        self.assertEqual(
+            keyset_q('data_pagamento', True, self.POSICAO, 5),
+            Q(data_pagamento__lt='2024-05-01') | Q(data_pagamento='2024-05-01', pk__lt=10),
+        )
+
+    def test_paginas_mescladas_cobrem_todos_sem_repetir(self):
+        # Três tenants com datas repetidas entre si; percorre tudo de 4 em 4
+        tenants = {
+            1: [(date(2024, 1, d), pk) for pk, d in enumerate([5, 5, 3, 1], start=1)],
+            2: [(date(2024, 1, d), pk) for pk, d in enumerate([5, 4, 3], start=1)],
+            3: [(date(2024, 1, d), pk) for pk, d in enumerate([6, 3, 3, 2, 1], start=1)],
+        }
+        esperado = sorted(
+            ((v, e, pk) for e, linhas in tenants.items() for v, pk in linhas), reverse=True
+        )
+
+        vistos, ultima = [], None
+        while True:
+            listas = []
+            for empresa, linhas in tenants.items():
+                chaves = sorted(((v, empresa, pk) for v, pk in linhas), reverse=True)
+                if ultima is not None:
+                    chaves = [c for c in chaves if c < ultima]
+                listas.append([(c, c) for c in chaves[:5]])
+            dados, ultima = mesclar_paginas(listas, 4, descendente=True)
+            vistos.extend(dados)
+            if ultima is None:
+                break
+
+        self.assertEqual(vistos, esperado)
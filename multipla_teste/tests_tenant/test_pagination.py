@@ -0,0 +1,34 @@
+from django.db.models import Q
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from multipla_teste.pagination import KeysetPagination, keyset_filter
+
+
+class KeysetPaginationTests(SimpleTestCase):
+    def test_filtro_composto_depois_do_cursor(self):
+        self.assertEqual(
+            keyset_filter(['-data_pagamento', '-id'], ['2024-05-01', 7]),
+            Q(data_pagamento__lt='2024-05-01') | Q(data_pagamento='2024-05-01', id__lt=7),
+        )
+
+    def test_filtro_reverso_para_pagina_anterior(self):
+        self.assertEqual(
+            keyset_filter(['-data_pagamento', '-id'], ['2024-05-01', 7], reverso=True),
+            Q(data_pagamento__gt='2024-05-01') | Q(data_pagamento='2024-05-01', id__gt=7),
+        )
+
+    def test_page_size_limitado(self):
+        paginacao = KeysetPagination()
+        request = Request(APIRequestFactory().get('/', {'page_size': '100000'}))
+        self.assertEqual(paginacao.get_page_size(request), paginacao.max_page_size)
+
+    def test_cursor_invalido(self):
+        class View:
+            keyset_ordering = ('-id',)
+
+        request = Request(APIRequestFactory().get('/', {'cursor': 'lixo!'}))
+        with self.assertRaises(ValidationError):
+            KeysetPagination().paginate_queryset(None, request, View())
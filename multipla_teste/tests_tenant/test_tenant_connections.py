@@ -0,0 +1,64 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from multipla_teste.tenant_connections import TenantConnectionManager
+
+
+class TenantConnectionManagerTests(SimpleTestCase):
+    def setUp(self):
+        # Sem banco nos testes: considera abertas todas as conexões registradas no pool
+        patcher = mock.patch.object(TenantConnectionManager, '_aliases_fechados', return_value=[])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hits_e_misses(self):
+        pool = TenantConnectionManager(max_connections=5)
+        pool.acquire('tenant_1')
+        pool.release_thread()
+        pool.acquire('tenant_1')
+        pool.acquire('tenant_2')
+        stats = pool.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['abertas'], 2)
+
+    def test_despeja_lru_ocioso_ao_exceder_limite(self):
+        pool = TenantConnectionManager(max_connections=2)
+        for alias in ('tenant_1', 'tenant_2', 'tenant_3'):
+            pool.acquire(alias)
+            pool.release(alias)
+        stats = pool.stats()
+        self.assertEqual(stats['abertas'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        # tenant_1 era o menos usado recentemente
+        pool.acquire('tenant_1')
+        self.assertEqual(pool.stats()['misses'], 4)
+
+    def test_nao_despeja_alias_em_uso(self):
+        pool = TenantConnectionManager(max_connections=1)
+        pool.acquire('tenant_1')   # em uso pela request atual
+        pool.acquire('tenant_2')
+        stats = pool.stats()
+        self.assertEqual(stats['evictions'], 0)
+        self.assertEqual(stats['abertas'], 2)
+        pool.release_thread()      # fim da request: agora pode despejar
+        self.assertEqual(pool.stats()['abertas'], 1)
+        self.assertEqual(pool.stats()['evictions'], 1)
+
+    def test_conexao_de_outra_thread_fica_pendente(self):
+        pool = TenantConnectionManager(max_connections=1)
+
+        def outra_request():
+            pool.acquire('tenant_1')
+            pool.release('tenant_1')
+
+        t = threading.Thread(target=outra_request)
+        t.start()
+        t.join()
+
+        pool.acquire('tenant_2')
+        stats = pool.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['pendentes'], 1)
@@ -0,0 +1,63 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from contratos.models import Contrato
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_router import TenantRouter, get_current_tenant
+from multipla_teste.tenant_utils import default_db_context, tenant_context
+
+EMPRESA_A = TenantDescriptor(id=9001, nome='A', alias='tenant_9001')
+EMPRESA_B = TenantDescriptor(id=9002, nome='B', alias='tenant_9002')
+
+
+class TenantContextTests(SimpleTestCase):
+    def setUp(self):
+        self.router = TenantRouter()
+        self.addCleanup(self._remover_aliases)
+
+    def _remover_aliases(self):
+        for empresa in (EMPRESA_A, EMPRESA_B):
+            settings.DATABASES.pop(empresa.alias, None)
+
+    def _alias_leitura(self):
+        return self.router.db_for_read(Contrato)
+
+    def test_sync_restaura_tenant_anterior(self):
+        with tenant_context(EMPRESA_A):
+            with tenant_context(EMPRESA_B):
+                self.assertEqual(self._alias_leitura(), 'tenant_9002')
+                with default_db_context():
+                    self.assertEqual(self._alias_leitura(), 'default')
+                self.assertEqual(self._alias_leitura(), 'tenant_9002')
+            self.assertEqual(self._alias_leitura(), 'tenant_9001')
+        self.assertIsNone(get_current_tenant())
+
+    def test_restaura_tenant_apos_excecao(self):
+        with self.assertRaises(RuntimeError):
+            with tenant_context(EMPRESA_A):
+                raise RuntimeError
+        self.assertIsNone(get_current_tenant())
+
+    def test_tasks_concorrentes_nao_se_misturam(self):
+        async def consultar(empresa):
+            async with tenant_context(empresa):
+                vistos = []
+                for _ in range(5):
+                    # Cede o loop para a outra task entre as leituras
+                    await asyncio.sleep(0)
+                    vistos.append(self._alias_leitura())
+                # Hop para thread via sync_to_async mantém o tenant da task
+                vistos.append(await sync_to_async(self._alias_leitura)())
+                vistos.append(await sync_to_async(self._alias_leitura, thread_sensitive=False)())
+                return vistos
+
+        async def principal():
+            return await asyncio.gather(consultar(EMPRESA_A), consultar(EMPRESA_B))
+
+        vistos_a, vistos_b = asyncio.run(principal())
+        self.assertEqual(set(vistos_a), {'tenant_9001'})
+        self.assertEqual(set(vistos_b), {'tenant_9002'})
+        self.assertIsNone(get_current_tenant())
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from multipla_teste.tenant_fanout import ERRO, NAO_EXECUTADO, OK, TIMEOUT, TenantFanout
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_router import get_current_tenant
+
+EMPRESAS = [TenantDescriptor(id=i, nome=f"Empresa {i}", alias=f"tenant_{i}") for i in range(9101, 9107)]
+
+
+class TenantFanoutTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(self._remover_aliases)
+
+    def _remover_aliases(self):
+        for empresa in EMPRESAS:
+            settings.DATABASES.pop(empresa.alias, None)
+
+    def test_executa_no_tenant_de_cada_empresa(self):
+        fanout = TenantFanout(lambda emp: get_current_tenant().id, empresas=EMPRESAS, max_workers=3)
+        resultados = list(fanout)
+        self.assertEqual({r.empresa.id: r.result for r in resultados}, {e.id: e.id for e in EMPRESAS})
+        self.assertTrue(fanout.resumo.completo)
+
+    def test_respeita_limite_de_concorrencia(self):
+        ativos = {'agora': 0, 'pico': 0}
+        lock = threading.Lock()
+
+        def fn(emp):
+            with lock:
+                ativos['agora'] += 1
+                ativos['pico'] = max(ativos['pico'], ativos['agora'])
+            time.sleep(0.02)
+            with lock:
+                ativos['agora'] -= 1
+
+        list(TenantFanout(fn, empresas=EMPRESAS, max_workers=2))
+        self.assertLessEqual(ativos['pico'], 2)
+
+    def test_timeout_e_erro_viram_resultado_parcial(self):
+        lento = threading.Event()
+
+        def fn(emp):
+            if emp.id == 9101:
+                lento.wait(2)
+            if emp.id == 9102:
+                raise ValueError('falhou')
+            return emp.id
+
+        fanout = TenantFanout(fn, empresas=EMPRESAS, max_workers=6, timeout=0.2)
+        status = {r.empresa.id: r.status for r in fanout}
+        lento.set()
+        self.assertEqual(status[9101], TIMEOUT)
+        self.assertEqual(status[9102], ERRO)
+        self.assertEqual(status[9103], OK)
+        self.assertEqual((fanout.resumo.ok, fanout.resumo.erros, fanout.resumo.timeouts), (4, 1, 1))
+        self.assertFalse(fanout.resumo.completo)
+
+    def test_fechar_gerador_cancela_o_restante(self):
+        executados = []
+        fanout = TenantFanout(lambda emp: executados.append(emp.id), empresas=EMPRESAS, max_workers=1)
+        resultados = iter(fanout)
+        next(resultados)
+        resultados.close()
+        self.assertTrue(fanout.resumo.nao_executados)
+        self.assertLess(len(executados), len(EMPRESAS))
+
+    def test_prazo_total_separa_interrompidos_de_nao_executados(self):
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+
+        fanout = TenantFanout(lambda emp: liberar.wait(2), empresas=EMPRESAS, max_workers=2, deadline=0.2)
+        self.assertEqual(list(fanout), [])
+        self.assertEqual([e.id for e in fanout.resumo.interrompidos], [9101, 9102])
+        self.assertEqual([e.id for e in fanout.resumo.nao_executados], [9103, 9104, 9105, 9106])
+        self.assertEqual(fanout.resumo.erros, 0)
+
+    def test_cancelado_antes_de_rodar_vai_para_nao_executados(self):
+        fanout = TenantFanout(lambda emp: emp.id, empresas=EMPRESAS[:2])
+        parar = threading.Event()
+        parar.set()
+        self.assertEqual(fanout._executar(EMPRESAS[0], parar).status, NAO_EXECUTADO)
+
+        # Thread que só começou depois do cancelamento: não é entregue nem conta como erro
+        executar = fanout._executar
+        fanout._executar = lambda emp, _parar: executar(emp, parar if emp.id == 9101 else threading.Event())
+        resultados = list(fanout)
+        self.assertEqual([r.empresa.id for r in resultados], [9102])
+        self.assertEqual([e.id for e in fanout.resumo.nao_executados], [9101])
+        self.assertEqual((fanout.resumo.ok, fanout.resumo.erros), (1, 0))
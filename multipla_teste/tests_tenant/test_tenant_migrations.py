@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from multipla_teste.tenant_migrations import PlanoMigracoes
+
+
+class PlanoMigracoesTests(SimpleTestCase):
+    def setUp(self):
+        self.plano = PlanoMigracoes()
+        patcher = mock.patch('multipla_teste.tenant_migrations.MigrationRecorder')
+        self.recorder = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_sem_tabela_tudo_pendente(self):
+        self.recorder.has_table.return_value = False
+        self.assertEqual(set(self.plano.pendentes('default')), self.plano.necessarias)
+
+    def test_tenant_atualizado_nao_tem_pendentes(self):
+        self.recorder.has_table.return_value = True
+        self.recorder.applied_migrations.return_value = {chave: None for chave in self.plano.necessarias}
+        self.assertEqual(self.plano.pendentes('default'), [])
+
+    def test_detecta_migration_nova(self):
+        faltando = max(chave for chave in self.plano.necessarias if chave[0] == 'contas_pagar')
+        self.recorder.has_table.return_value = True
+        self.recorder.applied_migrations.return_value = {
+            chave: None for chave in self.plano.necessarias if chave != faltando
+        }
+        self.assertEqual(self.plano.pendentes('default'), [faltando])
+
+    def test_filtra_por_app(self):
+        plano = PlanoMigracoes(app_label='contas_pagar')
+        apps = {app for app, _ in plano.necessarias}
+        self.assertIn('contas_pagar', apps)
+        self.assertNotIn('notifications', apps)
@@ -0,0 +1,133 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from multipla_teste.tenant_registry import TenantDescriptor, TenantRegistry
+
+
+class FakeLoader:
+    """Loader em memória que conta quantas vezes o 'banco' foi consultado."""
+
+    def __init__(self, empresas):
+        self.empresas = empresas
+        self.chamadas = 0
+
+    def __call__(self, empresa_id):
+        self.chamadas += 1
+        nome = self.empresas.get(empresa_id)
+        if nome is None:
+            return None
+        return TenantDescriptor(id=empresa_id, nome=nome, alias=f"tenant_{empresa_id}")
+
+
+class TenantRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.loader = FakeLoader({1: "Empresa 1", 2: "Empresa 2", 3: "Empresa 3"})
+
+    def test_hit_nao_consulta_o_loader(self):
+        registry = TenantRegistry(ttl=60, max_size=10, loader=self.loader)
+        primeiro = registry.get(1)
+        segundo = registry.get(1)
+        self.assertEqual(primeiro, segundo)
+        self.assertEqual(primeiro.alias, "tenant_1")
+        self.assertEqual(self.loader.chamadas, 1)
+
+    def test_empresa_inexistente_retorna_none(self):
+        registry = TenantRegistry(ttl=60, max_size=10, loader=self.loader)
+        self.assertIsNone(registry.get(99))
+        self.assertNotIn(99, registry)
+
+    def test_entrada_expira_apos_ttl(self):
+        registry = TenantRegistry(ttl=10, max_size=10, loader=self.loader)
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=100.0):
+            registry.get(1)
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=105.0):
+            registry.get(1)
+        self.assertEqual(self.loader.chamadas, 1)
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=111.0):
+            registry.get(1)
+        self.assertEqual(self.loader.chamadas, 2)
+
+    def test_despejo_lru(self):
+        registry = TenantRegistry(ttl=60, max_size=2, loader=self.loader)
+        registry.get(1)
+        registry.get(2)
+        registry.get(1)  # 1 passa a ser o mais recente
+        registry.get(3)  # despeja o 2
+        self.assertIn(1, registry)
+        self.assertNotIn(2, registry)
+        self.assertIn(3, registry)
+        self.assertEqual(len(registry), 2)
+
+    def test_invalidate_forca_nova_consulta(self):
+        registry = TenantRegistry(ttl=60, max_size=10, loader=self.loader)
+        registry.get(1)
+        self.loader.empresas[1] = "Empresa 1 renomeada"
+        registry.invalidate(1)
+        self.assertEqual(registry.get(1).nome, "Empresa 1 renomeada")
+        self.assertEqual(self.loader.chamadas, 2)
+
+    def test_empresa_em_provisionamento_nao_fica_em_cache(self):
+        def loader(empresa_id):
+            self.loader.chamadas += 1
+            return TenantDescriptor(id=empresa_id, nome="Nova", alias=f"tenant_{empresa_id}", status="provisionando")
+
+        registry = TenantRegistry(ttl=60, max_size=10, loader=loader)
+        self.assertEqual(registry.get(7).status, "provisionando")
+        self.assertNotIn(7, registry)
+        registry.get(7)
+        self.assertEqual(self.loader.chamadas, 2)
+
+
+class TenantRegistryLoadAllTests(SimpleTestCase):
+    def setUp(self):
+        self.empresas = [
+            TenantDescriptor(id=9201, nome="A", alias="tenant_9201"),
+            TenantDescriptor(id=9202, nome="B", alias="tenant_9202", status="provisionando"),
+        ]
+        self.versao = (2, 9202, None)
+        self.consultas_versao = 0
+        self.addCleanup(self._remover_aliases)
+
+    def _remover_aliases(self):
+        from django.conf import settings
+        for alias in ("tenant_9201", "tenant_9202", "tenant_9203"):
+            settings.DATABASES.pop(alias, None)
+
+    def _bulk_loader(self):
+        return self.versao, list(self.empresas)
+
+    def _version_loader(self):
+        self.consultas_versao += 1
+        return self.versao
+
+    def _registry(self):
+        return TenantRegistry(ttl=60, max_size=10, loader=FakeLoader({}), bulk_loader=self._bulk_loader,
+                              version_loader=self._version_loader, version_interval=30)
+
+    def test_load_all_registra_aliases_e_cacheia_prontas(self):
+        from django.conf import settings
+        registry = self._registry()
+        registry.load_all()
+        self.assertIn("tenant_9201", settings.DATABASES)
+        self.assertIn("tenant_9202", settings.DATABASES)
+        self.assertIn(9201, registry)
+        self.assertNotIn(9202, registry)
+
+    def test_refresh_so_recarrega_quando_versao_muda(self):
+        registry = self._registry()
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=100.0):
+            registry.load_all()
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=110.0):
+            self.assertFalse(registry.refresh_if_changed())  # dentro do intervalo: nem consulta
+        self.assertEqual(self.consultas_versao, 0)
+
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=131.0):
+            self.assertFalse(registry.refresh_if_changed())
+        self.assertEqual(self.consultas_versao, 1)
+
+        self.empresas.append(TenantDescriptor(id=9203, nome="C", alias="tenant_9203"))
+        self.versao = (3, 9203, None)
+        with mock.patch('multipla_teste.tenant_registry.time.monotonic', return_value=162.0):
+            self.assertTrue(registry.refresh_if_changed())
+        self.assertIn(9203, registry)
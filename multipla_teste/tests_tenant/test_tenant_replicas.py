@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from contratos.models import Contrato
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_replicas import ReplicaLagGuard, limpar_estado_request, replica_reads
+from multipla_teste.tenant_router import TenantRouter
+from multipla_teste.tenant_utils import tenant_context
+
+EMPRESA = TenantDescriptor(id=9401, nome='A', alias='tenant_9401')
+
+
+@override_settings(TENANT_READ_REPLICA={'HOST': 'replica.interna'})
+class TenantReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = TenantRouter()
+        self.lag = 0.0
+        guard = ReplicaLagGuard(max_lag=5, intervalo=0, medir=lambda alias: self.lag)
+        patcher = mock.patch('multipla_teste.tenant_replicas.replica_guard', guard)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        limpar_estado_request()
+        self.addCleanup(limpar_estado_request)
+        self.addCleanup(self._remover_aliases)
+
+    def _remover_aliases(self):
+        settings.DATABASES.pop('tenant_9401', None)
+        settings.DATABASES.pop('tenant_9401_ro', None)
+
+    def test_registra_alias_da_replica(self):
+        with tenant_context(EMPRESA):
+            pass
+        self.assertEqual(settings.DATABASES['tenant_9401_ro']['HOST'], 'replica.interna')
+        self.assertFalse(self.router.allow_migrate('tenant_9401_ro', 'contratos'))
+
+    def test_so_le_da_replica_quando_pedido(self):
+        with tenant_context(EMPRESA):
+            self.assertEqual(self.router.db_for_read(Contrato), 'tenant_9401')
+            with replica_reads():
+                self.assertEqual(self.router.db_for_read(Contrato), 'tenant_9401_ro')
+
+    def test_leitura_apos_escrita_fica_no_primario(self):
+        with tenant_context(EMPRESA), replica_reads():
+            self.router.db_for_write(Contrato)
+            self.assertEqual(self.router.db_for_read(Contrato), 'tenant_9401')
+
+    def test_replica_atrasada_volta_ao_primario(self):
+        self.lag = 30.0
+        with tenant_context(EMPRESA), replica_reads():
+            self.assertEqual(self.router.db_for_read(Contrato), 'tenant_9401')
+
+
+class ReplicaLagGuardTests(SimpleTestCase):
+    def test_mede_no_maximo_uma_vez_por_intervalo(self):
+        medicoes = []
+        guard = ReplicaLagGuard(max_lag=5, intervalo=60, medir=lambda alias: medicoes.append(alias) or 0)
+        self.assertTrue(guard.disponivel('tenant_1_ro'))
+        self.assertTrue(guard.disponivel('tenant_1_ro'))
+        self.assertEqual(len(medicoes), 1)
+
+    def test_erro_na_medicao_indisponibiliza(self):
+        def medir(alias):
+            raise RuntimeError('sem conexão')
+        self.assertFalse(ReplicaLagGuard(medir=medir, intervalo=60).disponivel('tenant_1_ro'))
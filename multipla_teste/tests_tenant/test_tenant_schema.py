@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase, override_settings
+
+from contratos.models import Contrato
+from multipla_teste.tenant_registry import TenantDescriptor
+from multipla_teste.tenant_router import TenantRouter
+from multipla_teste.tenant_schema import alias_config, search_path_wrapper
+from multipla_teste.tenant_utils import tenant_context
+
+EMPRESA = TenantDescriptor(id=9301, nome='A', alias='tenant_9301')
+OUTRA = TenantDescriptor(id=9302, nome='B', alias='tenant_9302')
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executados = []
+
+    def execute(self, sql, params=None):
+        self.executados.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_atomic_block = False
+
+    def get_autocommit(self):
+        return not self.in_atomic_block
+
+
+class FakeCursorWrapper:
+    def __init__(self):
+        self.cursor = FakeCursor()
+
+
+@override_settings(TENANT_MODE='schema')
+class TenantSchemaModeTests(SimpleTestCase):
+    def setUp(self):
+        self.conn = FakeConnection()
+        self.cursor = FakeCursorWrapper()
+        self.addCleanup(self._remover_aliases)
+
+    def _remover_aliases(self):
+        from django.conf import settings
+        for empresa in (EMPRESA, OUTRA):
+            settings.DATABASES.pop(empresa.alias, None)
+
+    def _query(self):
+        context = {'connection': self.conn, 'cursor': self.cursor}
+        search_path_wrapper(lambda *args: None, 'SELECT 1', None, False, context)
+
+    def _sets(self):
+        return [sql for sql in self.cursor.cursor.executados if sql.startswith('SET search_path')]
+
+    def test_router_usa_default_no_modo_schema(self):
+        with tenant_context(EMPRESA):
+            self.assertEqual(TenantRouter().db_for_read(Contrato), 'default')
+
+    def test_alias_do_tenant_fixa_search_path(self):
+        self.assertIn('search_path=tenant_9301,public', alias_config(9301)['OPTIONS']['options'])
+
+    def test_set_search_path_so_quando_o_tenant_muda(self):
+        with tenant_context(EMPRESA):
+            self._query()
+            self._query()
+        with tenant_context(OUTRA):
+            self._query()
+        self.assertEqual(self._sets(), [
+            'SET search_path TO "tenant_9301", public',
+            'SET search_path TO "tenant_9302", public',
+        ])
+
+    def test_set_em_transacao_nao_fica_em_cache(self):
+        self.conn.in_atomic_block = True
+        with tenant_context(EMPRESA):
+            self._query()
+            self._query()
+        # Um rollback desfaria o SET: repete até rodar em autocommit
+        self.assertEqual(len(self._sets()), 2)
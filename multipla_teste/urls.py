@@ -28,6 +28,7 @@ from usuarios.serializers import CustomTokenObtainPairSerializer
 from empresas.views import EmpresaViewSet, FilialViewSet, EmpresaListViewSet, FilialListViewSet
 from contratos import views as contratos_views
 from financeiro.views import ContaFinanceiraViewSet, CentroCustoViewSet
+from exportacoes.views import ExportacaoJobViewSet
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -38,7 +39,7 @@ router = routers.DefaultRouter()
 router.register(r'fornecedores', FornecedorViewSet)
 router.register(r'clientes', ClienteViewSet)
 from rest_framework_simplejwt.views import TokenRefreshView
-from usuarios.serializers import CustomTokenObtainPairSerializer
+from usuarios.serializers import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from notifications.views import NotificationViewSet
 
@@ -89,6 +90,8 @@ router.register(r'formas-pagamento', FormaPagamentoViewSet, basename='formas-pag
 router.register(r'contas/contapagar/ultima-conta/', ContaAPagarViewSet, basename='contas/contapagar/ultima-conta/' )
 router.register(r'contas-receber/ultima-conta', views.ContaAReceberViewSet, basename='contas-receber-ultima-conta')
 router.register(r'contas-consolidadas', ConsolidatedViewSet, basename='contas-consolidadas')
+router.register(r'dashboard', views.DashboardViewSet, basename='dashboard')
+router.register(r'exportacoes', ExportacaoJobViewSet, basename='exportacao')
 
 
 router.register(r'funcionarios', FuncionarioViewSet)
@@ -103,11 +106,15 @@ router.register(r'relatorios/operacional', RelatorioOperacionalViewSet, basename
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('api/register/', UserCreate.as_view(), name='user-create'),  # Sem necessidade de decorador
     path('api/logout/', LogoutView.as_view(), name='logout'),
     path('login/', login_view, name='login'), 
@@ -133,6 +140,7 @@ urlpatterns = [
     path('api/contratos/cliente/', contratos_views.ContratosClienteView.as_view(), name='contratos-cliente'),
     path('api/contratos/<int:pk>/soft_delete/', ContratoViewSet.as_view({'delete': 'soft_delete'}), name='contrato-soft-delete'),
     path('api/contratos/projecoes/', ContratoViewSet.as_view({'post': 'gerar_projecoes'}), name='gerar-projecoes'),
+    path('api/projecoes-faturamento/exportar/', contratos_views.ProjecaoFaturamentoViewSet.as_view({'get': 'exportar'}), name='projecoes-faturamento-exportar'),
     #path('api/contratos/salvar/', ContratoViewSet.as_view({'post': 'salvar_contrato'}), name='salvar-contrato'),
     path('api/contas-a-pagar/total-pagas-ano/', views.ContaAPagarViewSet.as_view({'get': 'total_pagas_ano'}), name='total-pagas-ano'),
     path('api/contas-a-receber/total-recebidas-ano/', views.ContaAReceberViewSet.as_view({'get': 'total_recebidas_ano'}), name='total-recebidas-ano'),
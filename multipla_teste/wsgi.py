@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'multipla_teste.settings')
 
 application = get_wsgi_application()
+
+# Registra os aliases de todos os tenants antes da primeira request
+from multipla_teste.tenant_registry import carregar_tenants_no_boot  # noqa: E402
+
+carregar_tenants_no_boot()
@@ -1,8 +1,12 @@
 # notifications/management/commands/migrate_all_tenants.py
+import time
+
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from django.conf import settings
 from multipla_teste.tenant_utils import default_db_context
+from multipla_teste.tenant_migrations import ERRO, escrever_relatorio, migrar_tenants
+from multipla_teste.tenant_registry import tenant_registry
 from empresas.models import Empresa
 
 class Command(BaseCommand):
@@ -15,38 +19,62 @@ class Command(BaseCommand):
             help='App específico para migrar (opcional)',
             default=None
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Quantidade de processos migrando tenants em paralelo'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Roda o migrate mesmo nos tenants sem migrations pendentes'
+        )
 
     def handle(self, *args, **options):
         app = options.get('app')
-        
+
         # Primeiro migra o default
         self.stdout.write("Migrando banco default...")
         if app:
             call_command('migrate', app, database='default')
         else:
             call_command('migrate', database='default')
-        
-        # Depois migra todos os tenants
+
+        # Depois migra todos os tenants. O registry registra os aliases de todas
+        # as empresas (antes só eram migrados os já registrados neste processo)
         with default_db_context():
-            empresas = Empresa.objects.all()
-        
+            empresas = tenant_registry.load_all()
+
+        aliases = []
         for empresa in empresas:
-            alias = f"tenant_{empresa.id}"
-            if alias in settings.DATABASES:
-                self.stdout.write(f"Migrando {alias} ({empresa.nome})...")
-                try:
-                    if app:
-                        call_command('migrate', app, database=alias)
-                    else:
-                        call_command('migrate', database=alias)
-                    self.stdout.write(
-                        self.style.SUCCESS(f"✓ {alias} migrado com sucesso")
-                    )
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f"✗ Erro ao migrar {alias}: {str(e)}")
-                    )
-        
+            if empresa.status != Empresa.STATUS_PRONTO:
+                # Banco ainda sendo criado pelo provisionamento
+                self.stdout.write(self.style.WARNING(f"- {empresa.alias} em provisionamento, ignorado"))
+                continue
+            if empresa.alias in settings.DATABASES:
+                aliases.append(empresa.alias)
+
+        inicio = time.monotonic()
+        resultados = migrar_tenants(
+            aliases,
+            jobs=options['jobs'],
+            app_label=app,
+            force=options['force'],
+            on_result=self._reportar_tenant,
+        )
+        escrever_relatorio(self, resultados, time.monotonic() - inicio)
+
         self.stdout.write(
             self.style.SUCCESS("Migrations concluídas em todos os tenants!")
-        )
\ No newline at end of file
+        )
+
+    def _reportar_tenant(self, resultado):
+        if resultado['status'] == ERRO:
+            self.stdout.write(
+                self.style.ERROR(f"✗ Erro ao migrar {resultado['alias']}: {resultado['erro']}")
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ {resultado['alias']} {resultado['status']}")
+            )
@@ -64,12 +64,8 @@ class FormaPagamentoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
                 {"detail": "Você deve enviar uma lista de IDs."},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        # Garantimos que apenas registros dessa empresa são afetados:
-        company_id = self.get_current_company_id()
-        FormaPagamento.objects.filter(
-            id__in=ids,
-            empresa_id=company_id
-        ).update(is_active=False)
+        # Só registros da empresa atual são afetados
+        self.desativar(ids)
         return Response(
             {"message": "Formas de pagamento marcadas como inativas."},
             status=status.HTTP_200_OK
@@ -43,8 +43,7 @@ class ProjetoViewSet(CompanyScopedMixin, viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request):
-        ids = request.data.get('ids', [])
-        Projeto.objects.filter(id__in=ids).update(is_active=False)
+        self.desativar(request.data.get('ids', []))
         return Response(
             {"message": "Projetos excluídos com sucesso."},
             status=status.HTTP_200_OK
@@ -5,7 +5,7 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from multipla_teste.core.mixins import CompanyScopedMixin
+from multipla_teste.core.mixins import CompanyScopedMixin, ReplicaReadMixin
 
 from .serializers import RelatorioResultadoContratoSerializer
 from .services import montar_relatorio_resultado_por_contrato
@@ -16,7 +16,7 @@ from .services import montar_relatorio_resultado_por_projeto
 from .serializers import RelatorioResultadoProjetoSerializer
 
 
-class RelatorioResultadoPorContratoViewSet(CompanyScopedMixin, viewsets.ViewSet):
+class RelatorioResultadoPorContratoViewSet(ReplicaReadMixin, CompanyScopedMixin, viewsets.ViewSet):
     """
     Endpoint para relatório analítico de Resultado por Contrato.
 
@@ -92,7 +92,7 @@ class RelatorioResultadoPorContratoViewSet(CompanyScopedMixin, viewsets.ViewSet)
         serializer = self.serializer_class(linhas, many=True)
         return Response(serializer.data)
 
-class RelatorioResultadoPorProjetoViewSet(CompanyScopedMixin, viewsets.ViewSet):
+class RelatorioResultadoPorProjetoViewSet(ReplicaReadMixin, CompanyScopedMixin, viewsets.ViewSet):
     """
     Endpoint para relatório analítico de Resultado por Projeto.
 
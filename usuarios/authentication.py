@@ -0,0 +1,19 @@
+# usuarios/authentication.py
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revogacao import revogacoes
+
+
+class JWTRevogavelAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que recusa access tokens revogados no logout.
+    A checagem é em memória (usuarios/revogacao.py), sem ida ao banco por request.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revogacoes.revogado(token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken({"detail": "Token revogado", "code": "token_revoked"})
+        return token
@@ -0,0 +1,90 @@
+# usuarios/claims.py
+"""
+Acesso por empresa embutido no JWT.
+
+No login o access token recebe:
+    pad   empresa padrão
+    emp   ids de perfil.empresas_acessiveis
+    roles {empresa_id: 'a' | 'f' | 'l'} (admin, financeiro, leitura)
+    pv    versão das permissões do perfil (PerfilUsuario.versao_permissoes)
+
+O AccessContext (multipla_teste/core/access.py) usa as claims em vez do banco
+quando `pv` bate com a versão atual, lida do cache. Qualquer mudança em
+empresas_acessiveis, UsuarioEmpresaRole ou empresa_padrao incrementa a versão
+(usuarios/signals.py) e apaga o cache, então tokens antigos voltam a consultar
+o banco até o usuário obter um token novo.
+
+Com cache local (LocMemCache) cada processo só enxerga a mudança quando a
+entrada expira: PERMISSOES_VERSAO_CACHE_TTL limita esse atraso.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import PerfilUsuario, UsuarioEmpresaRole
+
+ROLE_PARA_CLAIM = {'admin': 'a', 'financeiro': 'f', 'leitura': 'l'}
+CLAIM_PARA_ROLE = {v: k for k, v in ROLE_PARA_CLAIM.items()}
+
+
+def _chave_cache(user_id):
+    return f"permissoes_versao:{user_id}"
+
+
+def versao_permissoes(user_id):
+    """Versão atual das permissões do usuário (None se ele não tem perfil)."""
+    chave = _chave_cache(user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        versao = (
+            PerfilUsuario.objects
+            .filter(user_id=user_id)
+            .values_list('versao_permissoes', flat=True)
+            .first()
+        )
+        if versao is None:
+            return None
+        cache.set(chave, versao, getattr(settings, 'PERMISSOES_VERSAO_CACHE_TTL', 30))
+    return versao
+
+
+def incrementar_versao(perfil_ids):
+    """Invalida as claims dos perfis: incrementa a versão e limpa o cache (também após o commit)."""
+    perfil_ids = [pk for pk in perfil_ids if pk is not None]
+    if not perfil_ids:
+        return
+    PerfilUsuario.objects.filter(pk__in=perfil_ids).update(versao_permissoes=F('versao_permissoes') + 1)
+    chaves = [
+        _chave_cache(user_id)
+        for user_id in PerfilUsuario.objects.filter(pk__in=perfil_ids).values_list('user_id', flat=True)
+    ]
+    cache.delete_many(chaves)
+    # Uma leitura concorrente pode ter recolocado a versão antiga antes do commit
+    transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def claims_de_acesso(perfil):
+    """Claims compactas de empresas e papéis do perfil."""
+    roles = UsuarioEmpresaRole.objects.filter(perfil_usuario=perfil).values_list('empresa_id', 'role')
+    return {
+        'pad': perfil.empresa_padrao_id,
+        'emp': sorted(perfil.empresas_acessiveis.values_list('id', flat=True)),
+        'roles': {str(empresa_id): ROLE_PARA_CLAIM.get(role, 'l') for empresa_id, role in roles},
+        'pv': perfil.versao_permissoes,
+    }
+
+
+def ler_claims(token):
+    """
+    (empresa_padrao_id, empresas_acessiveis, roles) a partir do token, ou None
+    se ele não tiver as claims ou a versão não for a atual.
+    """
+    if token is None or 'pv' not in getattr(token, 'payload', {}):
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None or versao_permissoes(user_id) != token['pv']:
+        return None
+    roles = {int(empresa_id): CLAIM_PARA_ROLE.get(codigo) for empresa_id, codigo in token['roles'].items()}
+    return token['pad'], frozenset(token['emp']), roles
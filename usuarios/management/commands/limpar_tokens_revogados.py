@@ -0,0 +1,13 @@
+# usuarios/management/commands/limpar_tokens_revogados.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from usuarios.models import TokenRevogado
+
+
+class Command(BaseCommand):
+    help = 'Remove do banco os tokens revogados que já expiraram (pode rodar diariamente via cron)'
+
+    def handle(self, *args, **options):
+        removidos, _ = TokenRevogado.objects.filter(expira_em__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{removidos} token(s) revogado(s) expirado(s) removido(s)"))
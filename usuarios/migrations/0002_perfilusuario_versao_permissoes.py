@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='versao_permissoes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.14 on 2026-10-18 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_perfilusuario_versao_permissoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevogado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=64, unique=True)),
+                ('expira_em', models.DateTimeField(db_index=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Token revogado',
+                'verbose_name_plural': 'Tokens revogados',
+            },
+        ),
+    ]
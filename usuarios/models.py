@@ -13,6 +13,9 @@ class PerfilUsuario(models.Model):
     )
     # Relação ManyToMany simples para empresas acessíveis
     empresas_acessiveis = models.ManyToManyField(Empresa, related_name='usuarios', blank=True)
+    # Incrementada a cada mudança de empresas/papéis; tokens com versão antiga
+    # deixam de ser confiáveis (ver usuarios/claims.py)
+    versao_permissoes = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.user.username
@@ -36,3 +39,20 @@ class UsuarioEmpresaRole(models.Model):
 
     def __str__(self):
         return f"{self.perfil_usuario.user.username} em {self.empresa.nome} como {self.role}"
+
+
+class TokenRevogado(models.Model):
+    """
+    JWT revogado antes de expirar (logout). Os workers mantêm os jti em memória
+    (usuarios/revogacao.py); a linha pode ser apagada depois de expira_em.
+    """
+    jti = models.CharField(max_length=64, unique=True)
+    expira_em = models.DateTimeField(db_index=True)
+    criado_em = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Token revogado"
+        verbose_name_plural = "Tokens revogados"
+
+    def __str__(self):
+        return self.jti
@@ -1,41 +1,19 @@
 # usuarios/permissions.py
 from rest_framework import permissions
-from .models import UsuarioEmpresaRole, PerfilUsuario
+
+from multipla_teste.core.access import get_access_context
+
 
 class IsEmpresaAdminOrFinanceiro(permissions.BasePermission):
     """
     Permite acesso apenas se o usuário tiver papel 'admin' ou 'financeiro' na empresa corrente.
     Supõe que o tenant (empresa) já foi definido no header 'X-Company-ID',
     e que existe um PerfilUsuario associado a request.user.
+    Perfil, empresas e papéis vêm do contexto de acesso da request (core/access.py).
     """
 
     def has_permission(self, request, view):
-        try:
-            perfil = request.user.perfilusuario
-        except PerfilUsuario.DoesNotExist:
-            return False
-
-        # Descobrimos a empresa atual (via mixin ou header)
-        company_id = request.headers.get('X-Company-Id')
-        if not company_id or company_id.lower() == 'all':
-            # usa a empresa_padrao
-            empresa = perfil.empresa_padrao
-        else:
-            try:
-                empresa = perfil.empresas_acessiveis.get(id=int(company_id))
-            except (ValueError, PerfilUsuario.empresas_acessiveis.through.DoesNotExist):
-                return False
-
-        # Busca a relação no through model:
-        try:
-            user_role = UsuarioEmpresaRole.objects.get(
-                perfil_usuario=perfil,
-                empresa=empresa
-            ).role
-        except UsuarioEmpresaRole.DoesNotExist:
-            return False
-
-        return user_role in ['admin', 'financeiro']
+        return get_access_context(request).role in ['admin', 'financeiro']
 
 
 class IsEmpresaLeitura(permissions.BasePermission):
@@ -45,28 +23,6 @@ class IsEmpresaLeitura(permissions.BasePermission):
 
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
-            try:
-                perfil = request.user.perfilusuario
-            except PerfilUsuario.DoesNotExist:
-                return False
-
-            company_id = request.headers.get('X-Company-Id')
-            if not company_id or company_id.lower() == 'all':
-                empresa = perfil.empresa_padrao
-            else:
-                try:
-                    empresa = perfil.empresas_acessiveis.get(id=int(company_id))
-                except (ValueError, PerfilUsuario.empresas_acessiveis.through.DoesNotExist):
-                    return False
-
-            try:
-                user_role = UsuarioEmpresaRole.objects.get(
-                    perfil_usuario=perfil,
-                    empresa=empresa
-                ).role
-            except UsuarioEmpresaRole.DoesNotExist:
-                return False
-
             # 'leitura' já é papel que permite SAFE_METHODS
-            return user_role in ['leitura', 'financeiro', 'admin']
+            return get_access_context(request).role in ['leitura', 'financeiro', 'admin']
         return False
@@ -0,0 +1,105 @@
+# usuarios/revogacao.py
+"""
+Lista de revogação de JWT em memória.
+
+Cada worker guarda {jti: expira_em} dos tokens revogados e ainda válidos; a
+checagem por request é uma busca num dict. A cada TOKEN_REVOGACAO_INTERVALO
+segundos uma única thread busca no banco só as revogações novas (criado_em
+acima da última marca, com uma margem para transações que commitaram fora de
+ordem) e descarta as entradas já expiradas. Revogações feitas no próprio
+worker valem na hora; nos outros, em até TOKEN_REVOGACAO_INTERVALO segundos.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Releitura que cobre transações que commitaram depois de outra mais nova
+MARGEM_RELEITURA = timedelta(seconds=60)
+
+
+def _carregar_revogacoes(desde):
+    """(jti, expira_em, criado_em) revogados a partir de `desde` (None = todos ainda válidos)."""
+    from .models import TokenRevogado
+
+    qs = TokenRevogado.objects.filter(expira_em__gt=timezone.now())
+    if desde is not None:
+        qs = qs.filter(criado_em__gte=desde)
+    return qs.values_list('jti', 'expira_em', 'criado_em')
+
+
+def _gravar_revogacao(jti, expira_em):
+    from .models import TokenRevogado
+
+    try:
+        TokenRevogado.objects.get_or_create(jti=jti, defaults={'expira_em': expira_em})
+    except IntegrityError:
+        # Outro worker revogou o mesmo token ao mesmo tempo
+        pass
+
+
+class RevogacaoTokens:
+    def __init__(self, intervalo=None, carregar=None, gravar=None):
+        self.intervalo = (
+            intervalo if intervalo is not None
+            else getattr(settings, 'TOKEN_REVOGACAO_INTERVALO', 5)
+        )
+        self._carregar = carregar or _carregar_revogacoes
+        self._gravar = gravar or _gravar_revogacao
+        self._revogados = {}       # jti -> expira_em (epoch)
+        self._marca = None         # maior criado_em já visto
+        self._proxima = 0.0        # monotonic da próxima sincronização
+        self._lock = threading.Lock()
+
+    def revogado(self, jti):
+        """True se o jti foi revogado e ainda não expirou."""
+        if time.monotonic() >= self._proxima:
+            self.sincronizar()
+        expira = self._revogados.get(jti)
+        return expira is not None and expira > time.time()
+
+    def revogar(self, jti, expira_em):
+        """Registra a revogação no banco e já a aplica neste worker."""
+        if not jti:
+            return
+        self._gravar(jti, expira_em)
+        self._revogados[jti] = expira_em.timestamp()
+
+    def sincronizar(self, forcar=False):
+        """Busca revogações novas no banco; só uma thread por vez, as outras seguem com o estado atual."""
+        if not self._lock.acquire(blocking=forcar):
+            return
+        try:
+            if not forcar and time.monotonic() < self._proxima:
+                return
+            desde = self._marca - MARGEM_RELEITURA if self._marca is not None else None
+            try:
+                linhas = list(self._carregar(desde))
+            except Exception as e:
+                # Banco indisponível: mantém o que já temos e tenta no próximo intervalo
+                logger.warning(f"Erro sincronizando tokens revogados: {e}")
+                linhas = []
+
+            agora = time.time()
+            revogados = {jti: exp for jti, exp in self._revogados.items() if exp > agora}
+            for jti, expira_em, criado_em in linhas:
+                revogados[jti] = expira_em.timestamp()
+                if self._marca is None or criado_em > self._marca:
+                    self._marca = criado_em
+            # Troca o dict inteiro: leitores nunca veem um dict pela metade
+            self._revogados = revogados
+            self._proxima = time.monotonic() + self.intervalo
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._revogados)
+
+
+revogacoes = RevogacaoTokens()
@@ -1,7 +1,12 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from .models import PerfilUsuario, UsuarioEmpresaRole
+from .claims import claims_de_acesso
+from .revogacao import revogacoes
 from empresas.models import Empresa
 from empresas.serializers import EmpresaSerializer
 
@@ -231,7 +236,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Aqui poderia adicionar claims customizadas se necessário
+        # Empresas, papéis e versão das permissões (usuarios/claims.py); o access
+        # token herda as claims do refresh
+        perfil = PerfilUsuario.objects.filter(user=user).first()
+        if perfil is not None:
+            for claim, valor in claims_de_acesso(perfil).items():
+                token[claim] = valor
         return token
 
     def validate(self, attrs):
@@ -259,4 +269,14 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             # Caso o usuário não tenha perfil, retorna apenas os tokens
             pass
 
-        return data
\ No newline at end of file
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Recusa refresh tokens revogados no logout (usuarios/revogacao.py)."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if revogacoes.revogado(refresh.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken({"detail": "Token revogado", "code": "token_revoked"})
+        return super().validate(attrs)
@@ -0,0 +1,36 @@
+# usuarios/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .claims import incrementar_versao
+from .models import PerfilUsuario, UsuarioEmpresaRole
+
+
+@receiver(post_save, sender=PerfilUsuario)
+def perfil_alterado(sender, instance, created, **kwargs):
+    """empresa_padrao pode ter mudado: claims antigas deixam de valer."""
+    if created or kwargs.get('raw'):
+        return
+    incrementar_versao([instance.pk])
+
+
+@receiver(m2m_changed, sender=PerfilUsuario.empresas_acessiveis.through)
+def empresas_acessiveis_alteradas(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            incrementar_versao([instance.pk])
+        return
+    # Lado da Empresa (empresa.usuarios): os perfis afetados estão em pk_set,
+    # ou, no clear, são os que ainda estão ligados à empresa antes da limpeza
+    if action in ('post_add', 'post_remove'):
+        incrementar_versao(pk_set or [])
+    elif action == 'pre_clear':
+        incrementar_versao(list(instance.usuarios.values_list('pk', flat=True)))
+
+
+@receiver(post_save, sender=UsuarioEmpresaRole)
+@receiver(post_delete, sender=UsuarioEmpresaRole)
+def papel_alterado(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    incrementar_versao([instance.perfil_usuario_id])
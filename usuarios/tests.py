@@ -1,3 +1,108 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from empresas.models import Empresa
+from multipla_teste.core.mixins import CompanyScopedMixin
+from .claims import ler_claims
+from .models import PerfilUsuario, UsuarioEmpresaRole
+from .permissions import IsEmpresaAdminOrFinanceiro, IsEmpresaLeitura
+from .revogacao import MARGEM_RELEITURA, RevogacaoTokens
+from .serializers import CustomTokenObtainPairSerializer
+
+
+def _empresa(n):
+    return Empresa.objects.create(
+        nome=f"Empresa {n}", cnpj=f"00.000.000/000{n}-00", endereco_matriz="Rua A",
+        cidade="Cidade", estado="SP", cep="00000-000", telefone="0", email=f"e{n}@x.com",
+    )
+
+
+class _ScopedView(CompanyScopedMixin, GenericAPIView):
+    pass
+
+
+class _PerfilComEmpresas:
+    def setUp(self):
+        self.padrao = _empresa(1)
+        self.outra = _empresa(2)
+        self.user = User.objects.create_user('ana', password='x')
+        self.perfil = perfil = PerfilUsuario.objects.create(user=self.user, email='ana@x.com', empresa_padrao=self.padrao)
+        perfil.empresas_acessiveis.add(self.padrao, self.outra)
+        UsuarioEmpresaRole.objects.create(perfil_usuario=perfil, empresa=self.outra, role='financeiro')
+
+    def _request(self):
+        http_request = APIRequestFactory().get('/', HTTP_X_COMPANY_ID=str(self.outra.id))
+        request = Request(http_request)
+        request.user = self.user
+        request.auth = None  # token sem claims de acesso: caminho pelo banco
+        view = _ScopedView()
+        view.request = request
+        return request, view
+
+
+class AccessContextQueryCountTest(_PerfilComEmpresas, TestCase):
+    """Perfil, empresas e papéis são carregados uma vez por request, não a cada uso."""
+
+    def test_consultas_constantes_por_request(self):
+        for repeticoes in (1, 10):
+            request, view = self._request()
+            with self.assertNumQueries(3):
+                for _ in range(repeticoes):
+                    self.assertTrue(IsEmpresaLeitura().has_permission(request, view))
+                    self.assertTrue(IsEmpresaAdminOrFinanceiro().has_permission(request, view))
+                    self.assertEqual(view.get_current_company_id(), self.outra.id)
+                    self.assertEqual(view.get_user_accessible_companies(), {self.padrao.id, self.outra.id})
+
+
+class ClaimsDeAcessoTest(_PerfilComEmpresas, TestCase):
+    def test_token_dispensa_o_banco_ate_a_permissao_mudar(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.assertEqual(token['roles'], {str(self.outra.id): 'f'})
+
+        request, view = self._request()
+        request.auth = token
+        ler_claims(token)  # aquece o cache da versão
+        with self.assertNumQueries(0):
+            self.assertTrue(IsEmpresaAdminOrFinanceiro().has_permission(request, view))
+            self.assertEqual(view.get_current_company_id(), self.outra.id)
+
+        UsuarioEmpresaRole.objects.filter(perfil_usuario=self.perfil).delete()
+        self.perfil.empresas_acessiveis.remove(self.outra)
+        self.assertIsNone(ler_claims(token))
+
+
+class RevogacaoTokensTest(SimpleTestCase):
+    def setUp(self):
+        self.agora = datetime.now(dt_timezone.utc)
+        self.linhas = []
+        self.consultas = []
+
+        def carregar(desde):
+            self.consultas.append(desde)
+            return [linha for linha in self.linhas if desde is None or linha[2] >= desde]
+
+        self.revogacoes = RevogacaoTokens(intervalo=0, carregar=carregar, gravar=lambda jti, exp: None)
+
+    def test_revogacao_local_vale_na_hora(self):
+        self.revogacoes.revogar('abc', self.agora + timedelta(hours=1))
+        self.assertTrue(self.revogacoes.revogado('abc'))
+        self.assertFalse(self.revogacoes.revogado('outro'))
+
+    def test_sincroniza_so_o_que_e_novo_e_descarta_expirados(self):
+        self.linhas.append(('velho', self.agora + timedelta(seconds=1), self.agora - timedelta(hours=2)))
+        self.assertTrue(self.revogacoes.revogado('velho'))
+        self.assertIsNone(self.consultas[0])
+
+        # Outro worker revogou depois; a consulta seguinte parte da última marca
+        self.linhas.append(('novo', self.agora + timedelta(hours=1), self.agora))
+        self.assertTrue(self.revogacoes.revogado('novo'))
+        self.assertEqual(self.consultas[-1], self.agora - timedelta(hours=2) - MARGEM_RELEITURA)
+
+        self.revogacoes._revogados['velho'] = 0  # expirou
+        self.revogacoes.sincronizar(forcar=True)
+        self.assertEqual(set(self.revogacoes._revogados), {'novo'})
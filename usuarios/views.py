@@ -9,8 +9,11 @@ from rest_framework.decorators import action
 from rest_framework.generics import RetrieveAPIView
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
 from .models import PerfilUsuario
+from .revogacao import revogacoes
 from .serializers import UserSerializer, UserDetailSerializer
 from empresas.models import Empresa
 from empresas.serializers import EmpresaSerializer
@@ -163,7 +166,8 @@ class MeView(RetrieveAPIView):
 class LogoutView(APIView):
     """
     View para fazer logout do usuário.
-    Adiciona o refresh token à blacklist.
+    Revoga o refresh token e o access token usado na request
+    (lista de revogação em usuarios/revogacao.py).
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -177,7 +181,17 @@ class LogoutView(APIView):
                 )
             
             token = RefreshToken(refresh_token)
-            token.blacklist()
+            if str(token.get(api_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response(
+                    {"detail": "refresh_token pertence a outro usuário"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            for revogar in (token, request.auth):
+                if revogar is not None:
+                    revogacoes.revogar(
+                        revogar.get(api_settings.JTI_CLAIM),
+                        datetime_from_epoch(revogar['exp'])
+                    )
             return Response(
                 {"detail": "Logout realizado com sucesso"}, 
                 status=status.HTTP_205_RESET_CONTENT